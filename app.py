@@ -4,12 +4,29 @@ Smart Care - Демо-сайт для хакатона
 С поддержкой Firebase Firestore и многоязычности
 """
 
-from flask import Flask, render_template, jsonify, request, session, redirect, url_for
+from flask import Flask, render_template, jsonify, request, session, redirect, url_for, make_response, g
 from flask_caching import Cache
+import click
 from config import config
 from services.firestore_service import firestore_service
+from services.content_cache import ContentCache
+from services.content_bundle import (
+    ContentBundles, aload_roadmap, aload_team, aload_translations, load_roadmap, load_team, load_translations
+)
+from services.page_cache import PageCache, template_version
+from services.static_export import StaticExporter
+from services.compression import ResponseCompressor
+from services.warmup import WarmUp
+import asyncio
 import logging
 import os
+import time
+from functools import partial
+
+try:
+    import asgiref
+except ImportError:  # asgiref (flask[async]) необязателен: без него только синхронные views
+    asgiref = None
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
@@ -22,6 +39,23 @@ app.config.from_object(config.get(env, config['development']))
 
 # Инициализация кэша
 cache = Cache(app)
+content_cache = ContentCache(app, cache)
+page_cache = PageCache(app.config.get('PAGE_CACHE_MAX_ENTRIES', 32), enabled=app.config.get('PAGE_CACHE', True))
+compressor = ResponseCompressor.from_config(app.config)
+warmup = WarmUp()
+
+# Шаблоны главной страницы (index.html наследует base.html) - часть ключа кэша страниц
+INDEX_TEMPLATES = ('index.html', 'base.html')
+ERROR_TEMPLATES = ('404.html', '500.html')
+
+# Статика с отпечатками для export-static: {исходное имя: имя с отпечатком}
+static_asset_names = {}
+
+# Дедлайны чтений и предохранитель Firestore
+firestore_service.configure(app.config)
+
+# Тёплый старт: контент из снимка на диске отдаётся, пока Firestore не ответил
+firestore_service.load_snapshot(app.config.get('CONTENT_SNAPSHOT_PATH'))
 
 # Инициализация Firebase Firestore
 if app.config.get('USE_FIRESTORE', True):
@@ -99,87 +133,183 @@ LOCAL_ROADMAP_DATA = {
 # ==========================================
 
 def get_current_language():
-    """Получить текущий язык из сессии или определить по умолчанию"""
-    if 'language' in session:
+    """Получить текущий язык из сессии или определить по Accept-Language"""
+    # В режиме LANGUAGE_URL_ONLY сессия не читается: ответ не получает Vary: Cookie
+    if not app.config.get('LANGUAGE_URL_ONLY') and 'language' in session:
         return session['language']
     
-    # Автоопределение языка браузера
-    accept_language = request.headers.get('Accept-Language', '')
-    if 'en' in accept_language.lower():
-        return 'en'
+    return negotiate_language()
     
-    return app.config['DEFAULT_LANGUAGE']
+def negotiate_language():
+    """Автоопределение языка браузера по Accept-Language с учётом q-значений"""
+    # Ответ зависит от заголовка - after_request добавит Vary: Accept-Language
+    g.language_negotiated = True
+    return request.accept_languages.best_match(
+        app.config['SUPPORTED_LANGUAGES'],
+        default=app.config['DEFAULT_LANGUAGE']
+    )
 
 def set_language(lang):
-    """Установить язык в сессии"""
+    """Установить язык в сессии (в режиме LANGUAGE_URL_ONLY - только проверить)"""
     if lang in app.config['SUPPORTED_LANGUAGES']:
-        session['language'] = lang
+        if not app.config.get('LANGUAGE_URL_ONLY'):
+            session['language'] = lang
         return True
     return False
 
-@cache.memoize(timeout=3600)
+def conditional_response(etag, build):
+    """
+    Ответ с ETag; если у клиента та же версия (If-None-Match) - 304 без построения тела
+    
+    Args:
+        etag: Версия ответа, собранная из отпечатков контента (тело не хэшируется)
+        build: Функция, возвращающая тело ответа (рендер шаблона, jsonify)
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        response = make_response(build())
+    
+    response.set_etag(etag)
+    return response
+
+# Загрузчики контента кэшируются через ContentCache (stale-while-revalidate):
+# исключение внутри загрузчика не затирает последнее удачное значение,
+# а при пустом кэше отдаётся fallback с локальными данными.
+# Чтения идут со strict=True: ошибки, дедлайны и разомкнутый предохранитель
+# доходят до ContentCache, а не превращаются в пустые данные
+
+@content_cache.cached('team', collections=['team_members'], fallback=lambda lang: LOCAL_TEAM_DATA)
 def get_team_from_firestore(lang='ru'):
     """Получить данные команды из Firestore с кэшированием"""
-    if not firestore_service.is_available:
+    if not firestore_service.has_content:
         return LOCAL_TEAM_DATA
     
-    try:
-        team = firestore_service.get_collection('team_members', lang)
-        return team if team else LOCAL_TEAM_DATA
-    except Exception as e:
-        logger.error(f"Ошибка получения команды: {e}")
+    team = load_team(firestore_service, lang)
+    return team if team else LOCAL_TEAM_DATA
+
+@get_team_from_firestore.asynchronous
+async def aget_team_from_firestore(lang='ru'):
+    """Асинхронная версия get_team_from_firestore (async views)"""
+    if not firestore_service.has_content:
         return LOCAL_TEAM_DATA
+    
+    team = await aload_team(firestore_service, lang)
+    return team if team else LOCAL_TEAM_DATA
 
-@cache.memoize(timeout=3600)
+@content_cache.cached(
+    'roadmap',
+    collections=['translations', 'roadmap_milestones', 'roadmap_next_steps'],
+    fallback=lambda lang: LOCAL_ROADMAP_DATA
+)
 def get_roadmap_from_firestore(lang='ru'):
     """Получить дорожную карту из Firestore с кэшированием"""
-    if not firestore_service.is_available:
+    if not firestore_service.has_content:
         return LOCAL_ROADMAP_DATA
     
-    try:
-        # Получаем заголовки секции
-        roadmap_meta = firestore_service.get_document('translations', f'{lang}_roadmap', lang)
-        
-        # Получаем milestones
-        milestones = firestore_service.get_collection('roadmap_milestones', lang)
-        
-        # Получаем next steps
-        next_steps = firestore_service.get_collection('roadmap_next_steps', lang)
-        
-        return {
-            'current_stage': roadmap_meta.get('current_stage', 'MVP Development') if roadmap_meta else 'MVP Development',
-            'milestones': milestones if milestones else LOCAL_ROADMAP_DATA['milestones'],
-            'next_steps': next_steps
-        }
-    except Exception as e:
-        logger.error(f"Ошибка получения roadmap: {e}")
+    roadmap = load_roadmap(firestore_service, lang)
+    if not roadmap['milestones']:
+        roadmap['milestones'] = LOCAL_ROADMAP_DATA['milestones']
+    return roadmap
+
+@get_roadmap_from_firestore.asynchronous
+async def aget_roadmap_from_firestore(lang='ru'):
+    """Асинхронная версия get_roadmap_from_firestore (async views)"""
+    if not firestore_service.has_content:
         return LOCAL_ROADMAP_DATA
+    
+    roadmap = await aload_roadmap(firestore_service, lang)
+    if not roadmap['milestones']:
+        roadmap['milestones'] = LOCAL_ROADMAP_DATA['milestones']
+    return roadmap
 
-@cache.memoize(timeout=3600)
+@content_cache.cached('translations', collections=['translations'], fallback=lambda lang: {})
 def get_translations(lang='ru'):
     """Получить все переводы для языка"""
-    if not firestore_service.is_available:
+    if not firestore_service.has_content:
         return {}
     
-    try:
-        translations = {}
+    return load_translations(firestore_service, lang)
+
+@get_translations.asynchronous
+async def aget_translations(lang='ru'):
+    """Асинхронная версия get_translations (async views)"""
+    if not firestore_service.has_content:
+        return {}
+    
+    return await aload_translations(firestore_service, lang)
         
-        # Получаем все документы переводов
-        translation_keys = [
-            'navigation', 'hero', 'problem', 'solution', 'sectors',
-            'team_section', 'why_us', 'roadmap', 'implementation',
-            'additional', 'meta', 'footer', 'errors'
-        ]
+# Бандлы (CONTENT_BUNDLES): главная страница читает один документ bundles/{lang}
+# вместо 13 документов переводов и трёх коллекций
+content_bundles = None
+if app.config.get('CONTENT_BUNDLES'):
+    content_bundles = ContentBundles(firestore_service, app.config['SUPPORTED_LANGUAGES'])
+    # Запись контента через сервис меняет версию и пересобирает бандлы
+    firestore_service.add_write_listener(content_bundles.on_write)
         
-        for key in translation_keys:
-            doc = firestore_service.get_document('translations', f'{lang}_{key}', lang)
-            if doc:
-                translations[key] = doc
+@content_cache.cached('bundle', collections=['bundles', 'meta'], fallback=lambda lang: None)
+def get_content_bundle(lang='ru'):
+    """Получить бандл языка (None - бандлы выключены или Firestore недоступен)"""
+    if content_bundles is None:
+        return None
+    return content_bundles.get(lang)
         
-        return translations
-    except Exception as e:
-        logger.error(f"Ошибка получения переводов: {e}")
-        return {}
+def get_page_content(lang):
+    """Данные главной страницы: (команда, дорожная карта, переводы, отпечаток контента)"""
+    bundle, fingerprint = get_content_bundle.versioned(lang)
+    if bundle:
+        roadmap = bundle['roadmap']
+        return (
+            bundle['team'] or LOCAL_TEAM_DATA,
+            dict(roadmap, milestones=roadmap['milestones'] or LOCAL_ROADMAP_DATA['milestones']),
+            bundle['translations'],
+            fingerprint
+        )
+        
+    # Загрузчики независимы: промахи кэша читаются из Firestore параллельно
+    (team, team_fingerprint), (roadmap, roadmap_fingerprint), (translations, translations_fingerprint) = \
+        firestore_service.fan_out(
+            partial(get_team_from_firestore.versioned, lang),
+            partial(get_roadmap_from_firestore.versioned, lang),
+            partial(get_translations.versioned, lang)
+        )
+    return team, roadmap, translations, f'{team_fingerprint}.{roadmap_fingerprint}.{translations_fingerprint}'
+
+async def aget_page_content(lang):
+    """Асинхронный get_page_content: промахи кэша читаются через AsyncClient одновременно"""
+    if content_bundles is not None:
+        # Бандлы читаются и пересобираются синхронным API
+        return await asyncio.to_thread(get_page_content, lang)
+    
+    (team, team_fingerprint), (roadmap, roadmap_fingerprint), (translations, translations_fingerprint) = \
+        await asyncio.gather(
+            get_team_from_firestore.aversioned(lang),
+            get_roadmap_from_firestore.aversioned(lang),
+            get_translations.aversioned(lang)
+        )
+    return team, roadmap, translations, f'{team_fingerprint}.{roadmap_fingerprint}.{translations_fingerprint}'
+
+def invalidate_content(collection, lang=None):
+    """Сбросить кэш загрузчиков, зависящих от коллекции (lang=None - для всех языков); количество ключей"""
+    cleared = content_cache.invalidate(lang=lang, collection=collection)
+    # Ключи страниц сменятся вместе с отпечатком контента, старые страницы больше не нужны
+    page_cache.clear()
+    # Остальные воркеры сбросят L1 и кэш чтений Firestore на следующем запросе
+    bump_version = getattr(cache.cache, 'bump_version', None)
+    if bump_version is not None:
+        bump_version()
+    return cleared
+
+# Записи через FirestoreService и события слушателей сбрасывают только затронутое
+firestore_service.add_change_listener(invalidate_content)
+
+# Режим слушателей: кэш обновляется по событиям Firestore, а не по истечении timeout
+if app.config.get('FIRESTORE_LISTENERS') and firestore_service.is_available:
+    firestore_service.start_listeners()
+
+# Сверка снимка с Firestore в фоне: первые запросы уже обслуживаются из снимка
+if firestore_service.snapshot_info and firestore_service.is_available:
+    firestore_service.reconcile_snapshot_async(app.config.get('CONTENT_SNAPSHOT_PATH'))
 
 # ==========================================
 # МАРШРУТЫ
@@ -191,36 +321,53 @@ def index(lang=None):
     """Главная страница с презентацией проекта"""
     
     # Определение языка
+    language_redirect = index_language_redirect(lang)
+    if language_redirect is not None:
+        return language_redirect
+    
+    current_lang = lang or get_current_language()
+    
+    # Получение данных (при заполненном кэше контента - без обращения к Firestore)
+    return render_index(current_lang, get_page_content(current_lang))
+
+def index_language_redirect(lang):
+    """Запомнить язык из URL; redirect, если язык не поддерживается или должен быть в URL"""
     if lang:
         if lang in app.config['SUPPORTED_LANGUAGES']:
             set_language(lang)
-        else:
-            return redirect(url_for('index'))
+            return None
+        return redirect(url_for('index'))
     
-    current_lang = get_current_language()
-    
-    # Получение данных
-    team = get_team_from_firestore(current_lang)
-    roadmap = get_roadmap_from_firestore(current_lang)
-    translations = get_translations(current_lang)
+    if app.config.get('LANGUAGE_URL_ONLY'):
+        # Язык только из URL: / перенаправляет на /<lang>, контентные страницы без cookie
+        return redirect(url_for('index', lang=negotiate_language()))
+    return None
+
+def render_index(current_lang, content):
+    """Ответ главной страницы из (команда, дорожная карта, переводы, отпечаток контента)"""
+    team, roadmap, translations, fingerprint = content
     
-    return render_template(
-        'index.html',
-        team=team,
-        roadmap=roadmap,
-        translations=translations,
-        colors=app.config['COLORS'],
-        current_lang=current_lang,
-        supported_languages=app.config['SUPPORTED_LANGUAGES']
-    )
+    # Тот же язык, контент и шаблоны - 304 по ETag или готовый HTML без повторного рендера
+    templates_version = template_version(os.path.join(app.root_path, app.template_folder), INDEX_TEMPLATES)
+    page_key = (current_lang, fingerprint, templates_version)
+    return conditional_response('page-{}-{}-{}'.format(*page_key), lambda: page_cache.get_or_render(
+        page_key,
+        lambda: render_template(
+            'index.html',
+            team=team,
+            roadmap=roadmap,
+            translations=translations,
+            colors=app.config['COLORS'],
+            current_lang=current_lang,
+            supported_languages=app.config['SUPPORTED_LANGUAGES']
+        )
+    ))
 
 @app.route('/set-language/<lang>')
 def set_lang(lang):
     """Установить язык и перенаправить на главную"""
     if set_language(lang):
         logger.info(f"Язык изменён на: {lang}")
-        # Очищаем кэш при смене языка
-        cache.clear()
     return redirect(url_for('index', lang=lang))
 
 @app.route('/admin')
@@ -242,29 +389,40 @@ def admin():
 # API эндпоинты
 @app.route('/api/health')
 def health():
-    """Проверка здоровья приложения"""
+    """Проверка здоровья приложения (503, пока воркер не прогрет)"""
     return jsonify({
-        'status': 'healthy',
+        'status': 'healthy' if warmup.ready else 'warming_up',
         'service': 'smart_care',
         'version': app.config['APP_VERSION'],
-        'firestore_available': firestore_service.is_available
-    })
+        'firestore_available': firestore_service.is_available,
+        'content_cache': content_cache.stats(),
+        'content_snapshot': firestore_service.snapshot_info,
+        'firestore_breaker': firestore_service.breaker_stats(),
+        'firestore_cache': firestore_service.cache_stats(),
+        'page_cache': page_cache.stats(),
+        'compression': compressor.stats(),
+        'cache_backend': dict(
+            cache.cache.stats() if hasattr(cache.cache, 'stats') else {},
+            type=type(cache.cache).__name__
+        ),
+        'warmup': warmup.stats()
+    }), 200 if warmup.ready else 503
 
 @app.route('/api/team')
 @app.route('/api/team/<lang>')
 def get_team(lang=None):
     """Получить данные команды через API"""
     current_lang = lang if lang in app.config['SUPPORTED_LANGUAGES'] else get_current_language()
-    team = get_team_from_firestore(current_lang)
-    return jsonify(team)
+    team, fingerprint = get_team_from_firestore.versioned(current_lang)
+    return conditional_response(f'team-{current_lang}-{fingerprint}', lambda: jsonify(team))
 
 @app.route('/api/roadmap')
 @app.route('/api/roadmap/<lang>')
 def get_roadmap(lang=None):
     """Получить дорожную карту через API"""
     current_lang = lang if lang in app.config['SUPPORTED_LANGUAGES'] else get_current_language()
-    roadmap = get_roadmap_from_firestore(current_lang)
-    return jsonify(roadmap)
+    roadmap, fingerprint = get_roadmap_from_firestore.versioned(current_lang)
+    return conditional_response(f'roadmap-{current_lang}-{fingerprint}', lambda: jsonify(roadmap))
 
 @app.route('/api/translations/<lang>')
 def get_translations_api(lang):
@@ -272,14 +430,101 @@ def get_translations_api(lang):
     if lang not in app.config['SUPPORTED_LANGUAGES']:
         return jsonify({'error': 'Unsupported language'}), 400
     
-    translations = get_translations(lang)
-    return jsonify(translations)
+    translations, fingerprint = get_translations.versioned(lang)
+    return conditional_response(f'translations-{lang}-{fingerprint}', lambda: jsonify(translations))
+
+# Асинхронные версии views с данными Firestore (ASYNC_VIEWS): при промахе кэша
+# все чтения запроса выполняются одновременно через AsyncClient, а поток
+# воркера только ждёт их завершения
+
+async def index_async(lang=None):
+    """Асинхронная главная страница"""
+    language_redirect = index_language_redirect(lang)
+    if language_redirect is not None:
+        return language_redirect
+    
+    current_lang = lang or get_current_language()
+    return render_index(current_lang, await aget_page_content(current_lang))
+
+async def get_team_async(lang=None):
+    """Асинхронный /api/team"""
+    current_lang = lang if lang in app.config['SUPPORTED_LANGUAGES'] else get_current_language()
+    team, fingerprint = await get_team_from_firestore.aversioned(current_lang)
+    return conditional_response(f'team-{current_lang}-{fingerprint}', lambda: jsonify(team))
+
+async def get_roadmap_async(lang=None):
+    """Асинхронный /api/roadmap"""
+    current_lang = lang if lang in app.config['SUPPORTED_LANGUAGES'] else get_current_language()
+    roadmap, fingerprint = await get_roadmap_from_firestore.aversioned(current_lang)
+    return conditional_response(f'roadmap-{current_lang}-{fingerprint}', lambda: jsonify(roadmap))
+
+async def get_translations_api_async(lang):
+    """Асинхронный /api/translations/<lang>"""
+    if lang not in app.config['SUPPORTED_LANGUAGES']:
+        return jsonify({'error': 'Unsupported language'}), 400
+    
+    translations, fingerprint = await get_translations.aversioned(lang)
+    return conditional_response(f'translations-{lang}-{fingerprint}', lambda: jsonify(translations))
+
+if app.config.get('ASYNC_VIEWS'):
+    if asgiref is None:
+        logger.warning("ASYNC_VIEWS: не установлен asgiref (pip install 'flask[async]'), используются синхронные views")
+    else:
+        # Те же маршруты и имена endpoint (url_for, CACHE_CONTROL), другие функции
+        app.view_functions.update({
+            'index': index_async,
+            'get_team': get_team_async,
+            'get_roadmap': get_roadmap_async,
+            'get_translations_api': get_translations_api_async
+        })
+        logger.info("✓ Асинхронные views: главная страница и API контента")
+
+@app.before_request
+def sync_cache_version():
+    """Сверить версию общего кэша: L1 воркера сбрасывается после инвалидации в другом воркере"""
+    sync = getattr(cache.cache, 'sync', None)
+    if sync is not None and sync():
+        # Кэш чтений Firestore этого воркера тоже устарел: без сброса загрузчики
+        # вернули бы в общий кэш документы, прочитанные до записи
+        firestore_service.clear_cache()
+
+@app.url_defaults
+def fingerprint_static_url(endpoint, values):
+    """Имена статики с отпечатком содержимого (заполняются при export-static)"""
+    if endpoint == 'static' and static_asset_names:
+        values['filename'] = static_asset_names.get(values['filename'], values['filename'])
+
+@app.after_request
+def apply_cache_control(response):
+    """Cache-Control по endpoint из CACHE_CONTROL (если view не задал свой)"""
+    policy = app.config.get('CACHE_CONTROL', {}).get(request.endpoint)
+    if policy and 'Cache-Control' not in response.headers:
+        response.headers['Cache-Control'] = policy
+    
+    # Язык выбран по Accept-Language - общие кэши должны учитывать заголовок
+    if g.get('language_negotiated'):
+        response.vary.add('Accept-Language')
+    return response
+
+@app.after_request
+def compress_response(response):
+    """Сжатие gzip/br по Accept-Encoding (сжатые тела с ETag берутся из кэша)"""
+    return compressor.process(response, request.accept_encodings)
 
 @app.route('/api/clear-cache')
 def clear_cache():
-    """Очистить кэш (для разработки)"""
+    """Очистить кэш (для разработки); ?lang=en&collection=team_members - точечно"""
     if app.config['DEBUG']:
+        lang = request.args.get('lang')
+        collection = request.args.get('collection')
+        
+        if lang or collection:
+            cleared = invalidate_content(collection, lang)
+            return jsonify({'status': 'cache invalidated', 'keys': cleared})
+        
         cache.clear()
+        page_cache.clear()
+        compressor.clear()
         firestore_service.clear_cache()
         return jsonify({'status': 'cache cleared'})
     return jsonify({'error': 'not allowed'}), 403
@@ -307,6 +552,124 @@ def internal_error(error):
         current_lang=current_lang
     ), 500
 
+# ==========================================
+# CLI КОМАНДЫ
+# ==========================================
+
+@app.cli.command('clear-cache')
+def clear_cache_command():
+    """Сбросить кэш контента всех воркеров после записи в Firestore в обход сервиса"""
+    cache.clear()
+    click.echo("✓ Кэш очищен, воркеры перечитают контент на следующем запросе")
+
+@app.cli.command('content-snapshot')
+@click.option('--path', default=None, help='Путь к файлу снимка (по умолчанию CONTENT_SNAPSHOT_PATH)')
+def content_snapshot(path):
+    """Создать или обновить снимок контента Firestore на диске"""
+    path = path or app.config['CONTENT_SNAPSHOT_PATH']
+    
+    if not firestore_service.is_available:
+        raise click.ClickException("Firestore недоступен. Проверьте credentials.")
+    
+    header = firestore_service.save_snapshot(path)
+    if header is None:
+        raise click.ClickException("Не удалось создать снимок контента")
+    
+    click.echo(f"✓ Снимок {header['version']} ({header['created_at']}) сохранён: {path}")
+
+@app.cli.command('export-static')
+@click.option('--output', default='dist', help='Каталог экспорта')
+@click.option('--incremental', is_flag=True, help='Рендерить только языки с изменившимся контентом')
+def export_static(output, incremental):
+    """Экспортировать все языковые версии сайта и JSON API в статические файлы"""
+    # Прогрев рендерит страницы в кэш - дожидаемся его до подмены имён статики
+    warmup.wait()
+    started = time.time()
+    exporter = StaticExporter(output, app.static_folder)
+    if not incremental:
+        exporter.manifest['languages'].clear()
+    
+    # Страницы рендерятся заново со ссылками на статику с отпечатками
+    static_asset_names.update(exporter.export_assets(app.static_url_path.strip('/')))
+    page_cache.clear()
+    
+    template_folder = os.path.join(app.root_path, app.template_folder)
+    templates_version = template_version(template_folder, INDEX_TEMPLATES + ERROR_TEMPLATES)
+    assets_version = StaticExporter.assets_version(static_asset_names)
+    default_lang = app.config['DEFAULT_LANGUAGE']
+    client = app.test_client()
+    rendered = []
+    
+    for lang in app.config['SUPPORTED_LANGUAGES']:
+        fingerprint = get_page_content(lang)[3]
+        key = f'{fingerprint}-{templates_version}-{assets_version}'
+        if incremental and exporter.is_current(lang, key):
+            continue
+        
+        response = client.get(f'/{lang}')
+        if response.status_code != 200:
+            raise click.ClickException(f"/{lang}: HTTP {response.status_code}")
+        exporter.write(f'{lang}/index.html', response.data)
+        
+        for name in ('team', 'roadmap', 'translations'):
+            response = client.get(f'/api/{name}/{lang}')
+            exporter.write(f'api/{name}/{lang}.json', response.data)
+        
+        # Страницы ошибок - теми же обработчиками, язык из Accept-Language
+        with app.test_request_context(f'/{lang}', headers={'Accept-Language': lang}):
+            errors = {'404.html': not_found(None)[0], '500.html': internal_error(None)[0]}
+        for name, html in errors.items():
+            exporter.write(f'{lang}/{name}', html.encode('utf-8'))
+        
+        # Переключатель языка ведёт на /set-language/<lang> - на статике это перенаправление
+        exporter.write_redirect(f'set-language/{lang}/index.html', f'/{lang}')
+        
+        if lang == default_lang:
+            for name in ('index.html', '404.html', '500.html'):
+                with open(os.path.join(output, lang, name), 'rb') as f:
+                    exporter.write(name, f.read())
+        
+        exporter.mark(lang, key)
+        rendered.append(lang)
+    
+    exporter.save_manifest(static_asset_names)
+    static_asset_names.clear()
+    page_cache.clear()
+    
+    click.echo(f"✓ Языки: {', '.join(rendered) or 'без изменений'}; файлов: {exporter.files}, "
+               f"сжатых копий: {exporter.compressed} ({time.time() - started:.2f} сек) -> {output}")
+
+# ==========================================
+# ПРОГРЕВ
+# ==========================================
+
+def warmup_tasks():
+    """Задачи прогрева: шаблоны, затем контент и страницы каждого языка"""
+    yield 'templates', lambda: [app.jinja_env.get_template(name) for name in INDEX_TEMPLATES + ERROR_TEMPLATES]
+    
+    client = app.test_client()
+    for lang in app.config['SUPPORTED_LANGUAGES']:
+        def load_content(lang=lang):
+            get_team_from_firestore(lang)
+            get_roadmap_from_firestore(lang)
+            get_translations(lang)
+            get_page_content(lang)
+        
+        def render_page(lang=lang):
+            # Готовый HTML в кэше страниц и его сжатые копии для каждой кодировки
+            for encoding in ('identity',) + compressor.encodings:
+                client.get(f'/{lang}', headers={'Accept-Encoding': encoding})
+        
+        yield f'content_{lang}', load_content
+        yield f'page_{lang}', render_page
+
+# Прогрев после инициализации Firestore и регистрации маршрутов, в фоне:
+# до его завершения /api/health отвечает 503 и балансировщик не шлёт сюда трафик
+if app.config.get('WARMUP', True):
+    warmup.start(warmup_tasks())
+else:
+    warmup.skip()
+
 # ==========================================
 # ЗАПУСК ПРИЛОЖЕНИЯ
 # ==========================================
@@ -0,0 +1,6 @@
+"""
+Бенчмарки Smart Care
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_translations
+"""
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк холодного рендера главной страницы: независимые чтения Firestore
+одно за другим против параллельного FirestoreService.fan_out
+
+Последовательно время рендера - сумма чтений (переводы, команда, документ
+дорожной карты, milestones, next steps), с fan_out - максимум из них.
+
+Запуск:
+    python -m benchmarks.bench_fan_out --latency 0.02 --runs 20
+"""
+
+import argparse
+
+from app import app, warmup
+from services.firestore_service import firestore_service
+from benchmarks.cold_render import measure, report, sequential_fan_out
+from benchmarks.fake_firestore import FakeFirestoreClient, install, sample_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=0.02, help='Задержка одного RPC, сек')
+    parser.add_argument('--runs', type=int, default=20, help='Количество холодных рендеров')
+    parser.add_argument('--lang', default='ru')
+    args = parser.parse_args()
+    
+    warmup.wait()
+    fake = install(firestore_service, FakeFirestoreClient(sample_data(), latency=args.latency))
+    client = app.test_client()
+    
+    print(f"Задержка RPC: {args.latency * 1000:.0f} ms, рендеров: {args.runs}\n")
+    
+    firestore_service.fan_out = sequential_fan_out
+    try:
+        report('sequential', *measure(client, fake, args.runs, args.lang))
+    finally:
+        # Снова метод класса
+        del firestore_service.fan_out
+    
+    report('fan_out', *measure(client, fake, args.runs, args.lang))
+
+
+if __name__ == '__main__':
+    main()
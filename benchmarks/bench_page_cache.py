@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк кэша страниц: запросы в секунду к /ru и /en под gunicorn
+с раскладкой воркеров из gunicorn.conf.py, с PAGE_CACHE=false и PAGE_CACHE=true
+
+Запуск:
+    python -m benchmarks.bench_page_cache --duration 10 --concurrency 8
+"""
+
+import argparse
+import http.client
+import os
+import runpy
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def server_layout():
+    """Количество воркеров и потоков из gunicorn.conf.py (по умолчанию 2 × 2)"""
+    settings = runpy.run_path(os.path.join(ROOT, 'gunicorn.conf.py'))
+    return settings.get('workers', 2), settings.get('threads', 2)
+
+
+def start_server(port, workers, threads, page_cache, latency):
+    """Запустить gunicorn с фейковым Firestore и дождаться готовности"""
+    env = dict(os.environ, PAGE_CACHE=str(page_cache).lower(), BENCH_LATENCY=str(latency))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'benchmarks.fake_app:app',
+         '--config', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--threads', str(threads),
+         '--log-level', 'warning'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/health')
+            if conn.getresponse().status == 200:
+                return server
+        except OSError:
+            pass
+        # 503 - воркер ещё прогревается
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError('gunicorn не запустился')
+
+
+def load(port, duration, concurrency):
+    """Нагрузить /ru и /en; вернуть (запросов в секунду, задержки в мс)"""
+    latencies = []
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+    
+    def worker(index):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        paths = ['/ru', '/en']
+        local = []
+        i = index
+        while time.time() < stop_at:
+            started = time.perf_counter()
+            conn.request('GET', paths[i % 2])
+            response = conn.getresponse()
+            response.read()
+            local.append((time.perf_counter() - started) * 1000)
+            i += 1
+        with lock:
+            latencies.extend(local)
+    
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies) / duration, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=10, help='Длительность нагрузки, сек')
+    parser.add_argument('--concurrency', type=int, default=8, help='Одновременных клиентов')
+    parser.add_argument('--latency', type=float, default=0.02, help='Задержка RPC фейкового Firestore, сек')
+    parser.add_argument('--port', type=int, default=5099)
+    args = parser.parse_args()
+    
+    workers, threads = server_layout()
+    print(f"gunicorn: {workers} воркера × {threads} потока, клиентов: {args.concurrency}, "
+          f"длительность: {args.duration:.0f} сек\n")
+    
+    for page_cache in (False, True):
+        server = start_server(args.port, workers, threads, page_cache, args.latency)
+        try:
+            # Прогрев: кэш контента заполнен, сравниваются только рендеры
+            load(args.port, 1, 2)
+            rps, latencies = load(args.port, args.duration, args.concurrency)
+        finally:
+            server.terminate()
+            server.wait()
+        
+        latencies.sort()
+        print(f"PAGE_CACHE={str(page_cache).lower():5s}  {rps:8.1f} req/s   "
+              f"p50 {statistics.median(latencies):6.1f} ms   p99 {latencies[int(len(latencies) * 0.99)]:6.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
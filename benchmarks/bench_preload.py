@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк gunicorn --preload: время старта и память воркеров
+с GUNICORN_PRELOAD=false и GUNICORN_PRELOAD=true (конфиг gunicorn.conf.py)
+
+RSS - вся резидентная память процесса, PSS - с учётом страниц, разделённых
+с другими процессами (copy-on-write после fork делится между воркерами).
+
+Запуск:
+    python -m benchmarks.bench_preload --workers 2 --requests 200
+"""
+
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def memory_kb(pid):
+    """(RSS, PSS) процесса в КБ из /proc"""
+    rss = pss = 0
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                rss = int(line.split()[1])
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            if line.startswith('Pss:'):
+                pss = int(line.split()[1])
+    return rss, pss
+
+
+def worker_pids(master_pid):
+    """PID воркеров gunicorn (дочерние процессы мастера)"""
+    with open(f'/proc/{master_pid}/task/{master_pid}/children') as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def health_status(port):
+    """HTTP статус /api/health или None, если сервер не принимает соединения"""
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+        conn.request('GET', '/api/health')
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    except OSError:
+        return None
+
+
+def start_server(port, workers, preload, latency):
+    """
+    Запустить gunicorn с фейковым Firestore
+    
+    Returns:
+        (процесс, сек до первого 200, сек до готовности всех воркеров)
+    """
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers),
+               GUNICORN_PRELOAD=str(preload).lower(), BENCH_LATENCY=str(latency))
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'benchmarks.fake_app:app',
+         '--config', 'gunicorn.conf.py', '--log-level', 'warning'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    
+    first_ready = None
+    in_a_row = 0
+    deadline = time.time() + 60
+    # Все воркеры готовы, когда 20 новых соединений подряд получили 200 (не 503 прогрева)
+    while time.time() < deadline and in_a_row < 20:
+        if health_status(port) == 200:
+            first_ready = first_ready or time.perf_counter() - started
+            in_a_row += 1
+        else:
+            in_a_row = 0
+            time.sleep(0.05)
+    
+    if in_a_row < 20:
+        server.terminate()
+        raise RuntimeError('gunicorn не запустился')
+    return server, first_ready, time.perf_counter() - started
+
+
+def load(port, requests):
+    """Запросы к /ru и /en, чтобы воркеры отработали реальные страницы"""
+    for i in range(requests):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        conn.request('GET', ('/ru', '/en')[i % 2])
+        conn.getresponse().read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=2, help='Количество воркеров')
+    parser.add_argument('--requests', type=int, default=200, help='Запросов после старта перед замером памяти')
+    parser.add_argument('--latency', type=float, default=0.02, help='Задержка RPC фейкового Firestore, сек')
+    parser.add_argument('--port', type=int, default=5098)
+    args = parser.parse_args()
+    
+    print(f"gunicorn: {args.workers} воркера, gunicorn.conf.py\n")
+    
+    for preload in (False, True):
+        server, first_ready, all_ready = start_server(args.port, args.workers, preload, args.latency)
+        try:
+            load(args.port, args.requests)
+            master = memory_kb(server.pid)
+            workers = [memory_kb(pid) for pid in worker_pids(server.pid)]
+        finally:
+            server.terminate()
+            server.wait()
+        
+        rss = sum(w[0] for w in workers) / len(workers) / 1024
+        pss = sum(w[1] for w in workers) / len(workers) / 1024
+        total_pss = (master[1] + sum(w[1] for w in workers)) / 1024
+        print(f"GUNICORN_PRELOAD={str(preload).lower():5s}  старт: первый 200 {first_ready:5.2f} сек, "
+              f"все воркеры {all_ready:5.2f} сек   воркер: RSS {rss:6.1f} МБ, PSS {pss:6.1f} МБ   "
+              f"всего PSS (мастер + воркеры): {total_pss:6.1f} МБ")
+
+
+if __name__ == '__main__':
+    main()
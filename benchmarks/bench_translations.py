@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк холодного рендера главной страницы: последовательные чтения
+переводов (13 × get_document) против одного пакетного get_documents
+
+Меняется только способ чтения переводов: в обоих прогонах независимые чтения
+идут по очереди (fan_out без пула), чтобы выигрыш не смешивался с параллельностью.
+
+Запуск:
+    python -m benchmarks.bench_translations --latency 0.02 --runs 20
+"""
+
+import argparse
+
+from app import app, warmup
+from services.firestore_service import firestore_service
+from benchmarks.cold_render import measure, report, sequential_fan_out
+from benchmarks.fake_firestore import FakeFirestoreClient, install, sample_data
+
+
+def sequential_get_documents(collection, document_ids, lang='ru', strict=False, cache=True):
+    """Старый путь: отдельный get_document на каждую секцию"""
+    result = {}
+    for document_id in document_ids:
+        doc = firestore_service.get_document(collection, document_id, lang, strict=strict, cache=cache)
+        if doc:
+            result[document_id] = doc
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=0.02, help='Задержка одного RPC, сек')
+    parser.add_argument('--runs', type=int, default=20, help='Количество холодных рендеров')
+    parser.add_argument('--lang', default='ru')
+    args = parser.parse_args()
+    
+    warmup.wait()
+    fake = install(firestore_service, FakeFirestoreClient(sample_data(), latency=args.latency))
+    client = app.test_client()
+    
+    print(f"Задержка RPC: {args.latency * 1000:.0f} ms, рендеров: {args.runs}\n")
+    
+    firestore_service.fan_out = sequential_fan_out
+    try:
+        firestore_service.get_documents = sequential_get_documents
+        try:
+            report('sequential', *measure(client, fake, args.runs, args.lang))
+        finally:
+            # Снова метод класса
+            del firestore_service.get_documents
+        
+        report('batched', *measure(client, fake, args.runs, args.lang))
+    finally:
+        del firestore_service.fan_out
+
+
+if __name__ == '__main__':
+    main()
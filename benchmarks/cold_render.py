@@ -0,0 +1,37 @@
+"""
+Замер холодного рендера главной страницы для бенчмарков чтений Firestore
+(общий для bench_translations и bench_fan_out)
+"""
+
+import statistics
+import time
+
+from app import cache, page_cache
+from services.firestore_service import firestore_service
+
+
+def sequential_fan_out(*calls):
+    """fan_out без пула: вызовы по очереди в потоке запроса"""
+    return [call() for call in calls]
+
+
+def measure(client, fake, runs, lang):
+    """Замерить время холодного рендера /<lang> (кэши очищаются перед каждым запросом)"""
+    timings = []
+    fake.calls.clear()
+    for _ in range(runs):
+        cache.clear()
+        page_cache.clear()
+        firestore_service.clear_cache()
+        started = time.perf_counter()
+        response = client.get(f'/{lang}')
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.status_code
+    rpc_per_render = sum(fake.calls.values()) / runs
+    return timings, rpc_per_render
+
+
+def report(name, timings, rpc_per_render):
+    print(f"{name:12s} mean {statistics.mean(timings):8.1f} ms   "
+          f"p50 {statistics.median(timings):8.1f} ms   "
+          f"max {max(timings):8.1f} ms   RPC/рендер {rpc_per_render:5.1f}")
@@ -0,0 +1,16 @@
+"""
+WSGI-точка входа для бенчмарков под gunicorn: приложение с фейковым Firestore
+
+    gunicorn benchmarks.fake_app:app
+
+Задержка RPC задаётся переменной окружения BENCH_LATENCY (сек).
+"""
+
+import os
+
+from services.firestore_service import firestore_service
+from benchmarks.fake_firestore import FakeFirestoreClient, install, sample_data
+
+install(firestore_service, FakeFirestoreClient(sample_data(), latency=float(os.environ.get('BENCH_LATENCY') or 0.02)))
+
+from app import app  # noqa: E402  (импорт после подмены клиента)
@@ -0,0 +1,416 @@
+"""
+In-memory замена клиента Firestore для бенчмарков
+
+Повторяет ту часть API google-cloud-firestore, которой пользуется
+FirestoreService, и добавляет искусственную задержку на каждый RPC,
+чтобы сравнивать количество сетевых round-trip'ов без реального Firebase.
+Поддерживает on_snapshot: записи через клиент рассылают события изменений
+подписчикам синхронно, в том же потоке.
+FakeAsyncClient - асинхронная обёртка (аналог AsyncClient) над теми же данными.
+"""
+
+import asyncio
+import copy
+import enum
+import threading
+import time
+from collections import Counter
+from typing import Dict, Any, Optional
+
+from services import firestore_query
+
+
+class ChangeType(enum.Enum):
+    """Тип изменения документа (аналог google.cloud.firestore_v1.watch.ChangeType)"""
+    ADDED = 1
+    REMOVED = 2
+    MODIFIED = 3
+
+
+class FakeDocumentChange:
+    """Изменение документа в событии слушателя"""
+    
+    def __init__(self, change_type: ChangeType, document):
+        self.type = change_type
+        self.document = document
+
+
+class FakeWatch:
+    """Подписка на коллекцию (аналог Watch)"""
+    
+    def __init__(self, client, collection: str, callback):
+        self._client = client
+        self._collection = collection
+        self.callback = callback
+    
+    def unsubscribe(self):
+        with self._client._lock:
+            watches = self._client._watches.get(self._collection, [])
+            if self in watches:
+                watches.remove(self)
+
+
+def _merge(target: Dict, data: Dict):
+    """Рекурсивное слияние map-полей, как set(..., merge=True) в Firestore"""
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = value
+
+
+class FakeDocumentSnapshot:
+    """Снимок документа (аналог DocumentSnapshot)"""
+    
+    def __init__(self, reference, data: Optional[Dict]):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+    
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+    
+    def to_dict(self) -> Optional[Dict]:
+        return copy.deepcopy(self._data)
+
+
+class FakeDocumentReference:
+    """Ссылка на документ (аналог DocumentReference)"""
+    
+    def __init__(self, client, collection: str, document_id: str):
+        self._client = client
+        self._collection = collection
+        self.id = document_id
+    
+    def _snapshot(self) -> FakeDocumentSnapshot:
+        docs = self._client._data.get(self._collection, {})
+        return FakeDocumentSnapshot(self, docs.get(self.id))
+    
+    def get(self, **kwargs) -> FakeDocumentSnapshot:
+        self._client._rpc('get')
+        return self._snapshot()
+    
+    def set(self, data: Dict, merge: bool = False, **kwargs):
+        self._client._rpc('set')
+        self._apply_set(data, merge)
+    
+    def delete(self, **kwargs):
+        self._client._rpc('delete')
+        self._apply_delete()
+    
+    def _apply_set(self, data: Dict, merge: bool = False):
+        with self._client._lock:
+            docs = self._client._data.setdefault(self._collection, {})
+            existed = self.id in docs
+            if merge and existed:
+                _merge(docs[self.id], copy.deepcopy(data))
+            else:
+                docs[self.id] = copy.deepcopy(data)
+        self._client._emit(self._collection, ChangeType.MODIFIED if existed else ChangeType.ADDED, self)
+    
+    def _apply_delete(self):
+        with self._client._lock:
+            existed = self._client._data.get(self._collection, {}).pop(self.id, None) is not None
+        if existed:
+            self._client._emit(self._collection, ChangeType.REMOVED, self)
+
+
+class FakeWriteBatch:
+    """Пакет записей (аналог WriteBatch): все операции уходят одним RPC commit"""
+    
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+    
+    def set(self, reference, data: Dict, merge: bool = False):
+        self._writes.append(lambda: reference._apply_set(data, merge))
+    
+    def delete(self, reference):
+        self._writes.append(reference._apply_delete)
+    
+    def commit(self, **kwargs):
+        if len(self._writes) > 500:
+            raise ValueError("Batch too big")
+        self._client._rpc('commit')
+        for write in self._writes:
+            write()
+        self._writes = []
+
+
+class FakeQuery:
+    """Запрос к коллекции (аналог Query): where/order_by/limit/select/start_after"""
+    
+    def __init__(self, collection, orders=(), filters=(), limit=None, fields=None, cursor=None):
+        self._collection = collection
+        self._orders = list(orders)
+        self._filters = list(filters)
+        self._limit = limit
+        self._fields = fields
+        self._cursor = cursor
+    
+    def _copy(self, **changes):
+        params = dict(orders=self._orders, filters=self._filters, limit=self._limit, fields=self._fields,
+                      cursor=self._cursor)
+        params.update(changes)
+        return FakeQuery(self._collection, **params)
+    
+    def where(self, filter):
+        return self._copy(filters=self._filters + [(filter.field_path, filter.op_string, filter.value)])
+    
+    def order_by(self, field_path: str, direction: str = 'ASCENDING'):
+        return self._copy(orders=self._orders + [(field_path, direction == 'DESCENDING')])
+    
+    def limit(self, count: int):
+        return self._copy(limit=count)
+    
+    def select(self, field_paths):
+        return self._copy(fields=list(field_paths))
+    
+    def start_after(self, document_fields: Dict):
+        """Курсор по значениям полей сортировки (поддерживается только сортировка по возрастанию)"""
+        return self._copy(cursor=document_fields)
+    
+    def stream(self, **kwargs):
+        self._collection._client._rpc('stream')
+        return self._snapshots()
+    
+    def _snapshots(self):
+        """Документы запроса (без RPC)"""
+        client = self._collection._client
+        with client._lock:
+            docs = client._data.get(self._collection.id, {})
+            # Как и Firestore, без сортировки документы идут по ID
+            rows = [dict(copy.deepcopy(docs[document_id]), __name__=document_id) for document_id in sorted(docs)]
+        
+        rows = firestore_query.apply(rows, self._orders, self._filters, None, None)
+        if self._cursor is not None:
+            cursor = tuple(self._cursor[field] for field, _ in self._orders)
+            rows = [row for row in rows if tuple(row[field] for field, _ in self._orders) > cursor]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        
+        for row in rows:
+            if self._fields is not None:
+                row = firestore_query.project(row, self._fields + ['__name__'])
+            document_id = row.pop('__name__')
+            yield FakeDocumentSnapshot(self._collection.document(document_id), row)
+
+
+class FakeCollectionReference:
+    """Ссылка на коллекцию (аналог CollectionReference)"""
+    
+    def __init__(self, client, name: str):
+        self._client = client
+        self.id = name
+    
+    def document(self, document_id: str) -> FakeDocumentReference:
+        return FakeDocumentReference(self._client, self.id, document_id)
+    
+    def where(self, filter) -> FakeQuery:
+        return FakeQuery(self).where(filter)
+    
+    def order_by(self, field_path: str, direction: str = 'ASCENDING') -> FakeQuery:
+        return FakeQuery(self).order_by(field_path, direction)
+    
+    def limit(self, count: int) -> FakeQuery:
+        return FakeQuery(self).limit(count)
+    
+    def select(self, field_paths) -> FakeQuery:
+        return FakeQuery(self).select(field_paths)
+    
+    def stream(self, **kwargs):
+        return FakeQuery(self).stream(**kwargs)
+    
+    def _snapshots(self):
+        docs = self._client._data.get(self.id, {})
+        return [self.document(document_id)._snapshot() for document_id in sorted(docs)]
+    
+    def on_snapshot(self, callback) -> FakeWatch:
+        """Подписаться на коллекцию; первое событие содержит все документы"""
+        watch = FakeWatch(self._client, self.id, callback)
+        with self._client._lock:
+            self._client._watches.setdefault(self.id, []).append(watch)
+            docs = self._snapshots()
+        callback(docs, [FakeDocumentChange(ChangeType.ADDED, doc) for doc in docs], time.time())
+        return watch
+
+
+class FakeFirestoreClient:
+    """
+    Клиент Firestore в памяти
+    
+    Args:
+        data: Начальные данные {коллекция: {ID документа: данные}}
+        latency: Задержка одного RPC в секундах
+    """
+    
+    def __init__(self, data: Dict[str, Dict[str, Any]] = None, latency: float = 0.0):
+        self._data = copy.deepcopy(data) if data else {}
+        self._lock = threading.RLock()
+        self._watches = {}
+        self.latency = latency
+        self.calls = Counter()
+    
+    def _rpc(self, name: str):
+        """Учесть вызов и сымитировать сетевую задержку"""
+        self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+    
+    def _emit(self, collection: str, change_type: ChangeType, reference: FakeDocumentReference):
+        """Разослать событие изменения документа подписчикам коллекции"""
+        with self._lock:
+            watches = list(self._watches.get(collection, []))
+            docs = self.collection(collection)._snapshots()
+        change = FakeDocumentChange(change_type, reference._snapshot())
+        for watch in watches:
+            watch.callback(docs, [change], time.time())
+    
+    def collection(self, name: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, name)
+    
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+    
+    def close(self):
+        pass
+    
+    def get_all(self, references, **kwargs):
+        self._rpc('get_all')
+        for ref in references:
+            yield ref._snapshot()
+
+
+class FakeAsyncDocumentReference:
+    """Ссылка на документ (аналог AsyncDocumentReference)"""
+    
+    def __init__(self, client, reference: FakeDocumentReference):
+        self._client = client
+        self._reference = reference
+        self.id = reference.id
+    
+    async def get(self, **kwargs) -> FakeDocumentSnapshot:
+        await self._client._rpc('get')
+        return self._reference._snapshot()
+
+
+class FakeAsyncQuery:
+    """Запрос (аналог AsyncQuery): stream - асинхронный генератор"""
+    
+    def __init__(self, client, query: FakeQuery):
+        self._client = client
+        self._query = query
+    
+    def where(self, filter) -> 'FakeAsyncQuery':
+        return FakeAsyncQuery(self._client, self._query.where(filter))
+    
+    def order_by(self, field_path: str, direction: str = 'ASCENDING') -> 'FakeAsyncQuery':
+        return FakeAsyncQuery(self._client, self._query.order_by(field_path, direction))
+    
+    def limit(self, count: int) -> 'FakeAsyncQuery':
+        return FakeAsyncQuery(self._client, self._query.limit(count))
+    
+    def select(self, field_paths) -> 'FakeAsyncQuery':
+        return FakeAsyncQuery(self._client, self._query.select(field_paths))
+    
+    async def stream(self, **kwargs):
+        await self._client._rpc('stream')
+        for doc in self._query._snapshots():
+            yield doc
+
+
+class FakeAsyncCollectionReference(FakeAsyncQuery):
+    """Ссылка на коллекцию (аналог AsyncCollectionReference)"""
+    
+    def __init__(self, client, collection: FakeCollectionReference):
+        super().__init__(client, FakeQuery(collection))
+        self._collection = collection
+        self.id = collection.id
+    
+    def document(self, document_id: str) -> FakeAsyncDocumentReference:
+        return FakeAsyncDocumentReference(self._client, self._collection.document(document_id))
+
+
+class FakeAsyncClient:
+    """
+    Асинхронный клиент поверх FakeFirestoreClient: те же данные и счётчики,
+    задержка RPC - asyncio.sleep, так что одновременные чтения не блокируют друг друга
+    """
+    
+    def __init__(self, client: FakeFirestoreClient):
+        self._sync = client
+        self.closed = False
+    
+    async def _rpc(self, name: str):
+        """Учесть вызов и сымитировать сетевую задержку без блокировки цикла"""
+        self._sync.calls[name] += 1
+        if self._sync.latency:
+            await asyncio.sleep(self._sync.latency)
+    
+    def collection(self, name: str) -> FakeAsyncCollectionReference:
+        return FakeAsyncCollectionReference(self, self._sync.collection(name))
+    
+    async def get_all(self, references, **kwargs):
+        await self._rpc('get_all')
+        for ref in references:
+            yield ref._reference._snapshot()
+    
+    def close(self):
+        self.closed = True
+
+
+def install(service, client: FakeFirestoreClient):
+    """Подключить фейковый клиент к FirestoreService вместо настоящего"""
+    service._db = client
+    service._initialized = True
+    # После fork воркер продолжает работать с тем же клиентом в памяти
+    service._client_factory = lambda: client
+    service._async_client_factory = lambda: FakeAsyncClient(client)
+    return client
+
+
+def sample_data(languages=('ru', 'en'), team_size: int = 2, milestones: int = 4,
+                next_steps: int = 4) -> Dict[str, Dict[str, Any]]:
+    """
+    Сгенерировать контент в той же структуре, что и migrate_to_firestore.py
+    
+    Returns:
+        Данные для FakeFirestoreClient
+    """
+    sections = [
+        'navigation', 'hero', 'problem', 'solution', 'sectors',
+        'team_section', 'why_us', 'roadmap', 'implementation',
+        'additional', 'meta', 'footer', 'errors'
+    ]
+    
+    translations = {}
+    for lang in languages:
+        for section in sections:
+            translations[f'{lang}_{section}'] = {
+                'title': f'{section} ({lang})',
+                'subtitle': f'{section} subtitle ({lang})',
+                'items': [{'title': f'{section} item {i}', 'text': 'x' * 80} for i in range(6)]
+            }
+        translations[f'{lang}_roadmap']['current_stage'] = 'MVP Development'
+    
+    def multilingual(prefix, count, extra=None):
+        docs = {}
+        for i in range(1, count + 1):
+            docs[f'{prefix}_{i}'] = {
+                lang: dict({'title': f'{prefix} {i} ({lang})', 'description': 'y' * 120}, **(extra(i) if extra else {}))
+                for lang in languages
+            }
+        return docs
+    
+    return {
+        'translations': translations,
+        'team_members': multilingual('member', team_size, lambda i: {
+            'name': f'Member {i}', 'role': 'Developer', 'experience': ['A', 'B'],
+            'links': {'linkedin': '#', 'github': '#', 'portfolio': '#'}
+        }),
+        'roadmap_milestones': multilingual('milestone', milestones, lambda i: {
+            'date': '2025', 'status': 'upcoming'
+        }),
+        'roadmap_next_steps': multilingual('step', next_steps, lambda i: {'number': i}),
+    }
@@ -0,0 +1,133 @@
+"""
+Redis в памяти для проверки L2 уровня TieredCache без сервера Redis
+
+Поддерживает команды, которые вызывает RedisCache из Flask-Caching:
+
+    from flask_caching.backends.rediscache import RedisCache
+    l2 = RedisCache(host=FakeRedis())
+"""
+
+import fnmatch
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+
+def _now() -> float:
+    """Текущее время (параметр time в командах redis-py скрывает модуль time)"""
+    return time.time()
+
+
+class FakeRedis:
+    """
+    Подмножество API redis-py: get/mget/set/setex/setnx/expire/delete/exists/keys/flushdb/incr
+    
+    Args:
+        latency: Задержка одной команды в секундах (имитация сети)
+    """
+    
+    def __init__(self, latency: float = 0.0):
+        self._data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.Lock()
+        self.latency = latency
+        self.calls = Counter()
+    
+    def _command(self, name: str):
+        """Учесть вызов и сымитировать сетевую задержку"""
+        self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+    
+    @staticmethod
+    def _key(name) -> bytes:
+        return name.encode('utf-8') if isinstance(name, str) else name
+    
+    @staticmethod
+    def _value(value) -> bytes:
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode('utf-8')
+    
+    def _alive(self, key: bytes) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and expires <= time.time():
+            del self._data[key]
+            return None
+        return value
+    
+    def get(self, name) -> Optional[bytes]:
+        self._command('get')
+        with self._lock:
+            return self._alive(self._key(name))
+    
+    def mget(self, keys) -> List[Optional[bytes]]:
+        self._command('mget')
+        with self._lock:
+            return [self._alive(self._key(name)) for name in keys]
+    
+    def set(self, name, value, ex: Optional[int] = None) -> bool:
+        self._command('set')
+        with self._lock:
+            self._data[self._key(name)] = (self._value(value), time.time() + ex if ex else None)
+        return True
+    
+    def setex(self, name, time: int, value) -> bool:
+        self._command('setex')
+        with self._lock:
+            self._data[self._key(name)] = (self._value(value), _now() + time)
+        return True
+    
+    def setnx(self, name, value) -> bool:
+        self._command('setnx')
+        with self._lock:
+            key = self._key(name)
+            if self._alive(key) is not None:
+                return False
+            self._data[key] = (self._value(value), None)
+            return True
+    
+    def expire(self, name, time: int) -> bool:
+        self._command('expire')
+        with self._lock:
+            key = self._key(name)
+            value = self._alive(key)
+            if value is None:
+                return False
+            self._data[key] = (value, _now() + time)
+            return True
+    
+    def delete(self, *names) -> int:
+        self._command('delete')
+        with self._lock:
+            return sum(1 for name in names if self._data.pop(self._key(name), None) is not None)
+    
+    def exists(self, *names) -> int:
+        self._command('exists')
+        with self._lock:
+            return sum(1 for name in names if self._alive(self._key(name)) is not None)
+    
+    def keys(self, pattern='*') -> List[bytes]:
+        self._command('keys')
+        pattern = pattern.decode('utf-8') if isinstance(pattern, bytes) else pattern
+        with self._lock:
+            return [key for key in list(self._data) if self._alive(key) is not None
+                    and fnmatch.fnmatchcase(key.decode('utf-8'), pattern)]
+    
+    def flushdb(self) -> bool:
+        self._command('flushdb')
+        with self._lock:
+            self._data.clear()
+        return True
+    
+    def incr(self, name, amount: int = 1) -> int:
+        self._command('incr')
+        with self._lock:
+            key = self._key(name)
+            value = int(self._alive(key) or 0) + amount
+            expires = self._data.get(key, (None, None))[1]
+            self._data[key] = (str(value).encode('utf-8'), expires)
+            return value
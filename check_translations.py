@@ -42,12 +42,9 @@ def check_translations():
     print("-" * 60)
     
     try:
-        coll = db.collection('translations')
-        docs = list(coll.stream())
-        
-        for doc in docs:
-            doc_id = doc.id
-            data = doc.to_dict()
+        # Постраничный перебор: память не растёт вместе с коллекцией
+        for data in firestore_service.iter_collection('translations', lang=None):
+            doc_id = data.pop('id')
             stats['total'] += 1
             
             # Проверяем какие языки есть
@@ -81,12 +78,9 @@ def check_translations():
     print("-" * 60)
     
     try:
-        coll = db.collection('team_members')
-        docs = list(coll.stream())
-        
-        for doc in docs:
-            doc_id = doc.id
-            data = doc.to_dict()
+        # Постраничный перебор: память не растёт вместе с коллекцией
+        for data in firestore_service.iter_collection('team_members', lang=None):
+            doc_id = data.pop('id')
             stats['total'] += 1
             
             has_ru = 'ru' in data
@@ -114,12 +108,9 @@ def check_translations():
     print("-" * 60)
     
     try:
-        coll = db.collection('roadmap_milestones')
-        docs = list(coll.stream())
-        
-        for doc in docs:
-            doc_id = doc.id
-            data = doc.to_dict()
+        # Постраничный перебор: память не растёт вместе с коллекцией
+        for data in firestore_service.iter_collection('roadmap_milestones', lang=None):
+            doc_id = data.pop('id')
             stats['total'] += 1
             
             has_ru = 'ru' in data
@@ -147,12 +138,9 @@ def check_translations():
     print("-" * 60)
     
     try:
-        coll = db.collection('roadmap_next_steps')
-        docs = list(coll.stream())
-        
-        for doc in docs:
-            doc_id = doc.id
-            data = doc.to_dict()
+        # Постраничный перебор: память не растёт вместе с коллекцией
+        for data in firestore_service.iter_collection('roadmap_next_steps', lang=None):
+            doc_id = data.pop('id')
             stats['total'] += 1
             
             has_ru = 'ru' in data
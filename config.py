@@ -5,6 +5,8 @@
 import os
 from dotenv import load_dotenv
 
+basedir = os.path.abspath(os.path.dirname(__file__))
+
 # Загрузка переменных окружения
 load_dotenv()
 
@@ -24,14 +26,83 @@ class Config:
     # Firebase настройки
     FIREBASE_CREDENTIALS_PATH = os.environ.get('FIREBASE_CREDENTIALS_PATH') or 'firebase-credentials.json'
     USE_FIRESTORE = True  # Использовать Firestore для данных (если False - локальные данные)
+    # Режим слушателей: подписка на изменения контента вместо периодического перечитывания
+    FIRESTORE_LISTENERS = (os.environ.get('FIRESTORE_LISTENERS') or 'false').lower() == 'true'
+    # Дедлайн одного чтения Firestore (сек) с учётом повторов
+    FIRESTORE_TIMEOUT = float(os.environ.get('FIRESTORE_TIMEOUT') or 5.0)
+    # Предохранитель: размыкается после N ошибок/медленных чтений подряд,
+    # пока разомкнут - отдаётся кэш или локальные данные без обращения к Firestore
+    FIRESTORE_BREAKER_FAILURES = int(os.environ.get('FIRESTORE_BREAKER_FAILURES') or 5)
+    FIRESTORE_BREAKER_SLOW_CALL = float(os.environ.get('FIRESTORE_BREAKER_SLOW_CALL') or 2.0)  # сек
+    FIRESTORE_BREAKER_RESET_TIMEOUT = float(os.environ.get('FIRESTORE_BREAKER_RESET_TIMEOUT') or 30.0)  # сек до пробного запроса
+    # Интервал до пробы удваивается после каждой неудачной пробы, но не больше этого (сек)
+    FIRESTORE_BREAKER_MAX_RESET_TIMEOUT = float(os.environ.get('FIRESTORE_BREAKER_MAX_RESET_TIMEOUT') or 300.0)
+    # Отрицательный кэш: отсутствующий документ не перечитывается N сек,
+    # после ошибки чтения ключ пропускается с экспоненциальной задержкой (база, предел в сек)
+    FIRESTORE_NEGATIVE_TTL = int(os.environ.get('FIRESTORE_NEGATIVE_TTL') or 30)
+    FIRESTORE_BACKOFF_BASE = float(os.environ.get('FIRESTORE_BACKOFF_BASE') or 1.0)
+    FIRESTORE_BACKOFF_MAX = float(os.environ.get('FIRESTORE_BACKOFF_MAX') or 60.0)
+    # Кэш чтений в FirestoreService: время жизни записи и лимит объёма (LRU вытеснение)
+    FIRESTORE_CACHE_TTL = int(os.environ.get('FIRESTORE_CACHE_TTL') or 300)  # 5 минут
+    FIRESTORE_CACHE_MAX_BYTES = int(os.environ.get('FIRESTORE_CACHE_MAX_BYTES') or 8 * 1024 * 1024)  # 8 МБ
+    # Потоки для параллельных независимых чтений одной страницы (0 - чтения по очереди)
+    FIRESTORE_FAN_OUT_WORKERS = int(os.environ.get('FIRESTORE_FAN_OUT_WORKERS') or 8)
+    # Асинхронные views главной страницы и API контента (чтения через AsyncClient, нужен flask[async])
+    ASYNC_VIEWS = (os.environ.get('ASYNC_VIEWS') or 'false').lower() == 'true'
+    # Бандлы контента: главная страница читает один документ bundles/{lang},
+    # который пересобирается при записи контента (выключено - чтение из исходных коллекций)
+    CONTENT_BUNDLES = (os.environ.get('CONTENT_BUNDLES') or 'false').lower() == 'true'
+    # Снимок контента на диске: загружается при старте, затем сверяется с Firestore в фоне
+    # (создать/обновить: flask --app app content-snapshot)
+    CONTENT_SNAPSHOT_PATH = os.environ.get('CONTENT_SNAPSHOT_PATH') or os.path.join(basedir, 'instance', 'content_snapshot.json')
     
     # Настройки кэширования
     CACHE_TYPE = os.environ.get('CACHE_TYPE') or 'simple'
     CACHE_DEFAULT_TIMEOUT = int(os.environ.get('CACHE_DEFAULT_TIMEOUT') or 3600)  # 1 час
+    # Общий кэш воркеров на хосте (CACHE_TYPE=services.shared_cache.SharedMemoryCache):
+    # mmap-файл из слотов фиксированного размера, по умолчанию /dev/shm/smart_care_cache_<хэш каталога приложения>
+    CACHE_SHARED_PATH = os.environ.get('CACHE_SHARED_PATH')
+    CACHE_SHARED_SLOTS = int(os.environ.get('CACHE_SHARED_SLOTS') or 512)
+    CACHE_SHARED_SLOT_SIZE = int(os.environ.get('CACHE_SHARED_SLOT_SIZE') or 32 * 1024)  # байт
+    # L2 в Redis (CACHE_TYPE=services.shared_cache.TieredCache): копия в кэше хоста
+    # живёт не дольше CACHE_L1_TIMEOUT, чтобы видеть изменения с других хостов
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL') or os.environ.get('REDIS_URL')
+    CACHE_L1_TIMEOUT = int(os.environ.get('CACHE_L1_TIMEOUT') or 60)  # сек
+    # Кэш в памяти процесса перед общим (CACHE_TYPE=services.shared_cache.ProcessCache):
+    # общий кэш - CACHE_L2_TYPE, L1 сбрасывается при смене версии содержимого общего кэша
+    CACHE_L2_TYPE = os.environ.get('CACHE_L2_TYPE') or 'services.shared_cache.SharedMemoryCache'
+    CACHE_L1_MAX_ENTRIES = int(os.environ.get('CACHE_L1_MAX_ENTRIES') or 256)
+    # Кэш контента (stale-while-revalidate): после мягкого TTL данные отдаются
+    # из кэша и обновляются в фоне, после жёсткого TTL - загружаются синхронно
+    CONTENT_CACHE_SOFT_TTL = int(os.environ.get('CONTENT_CACHE_SOFT_TTL') or 600)  # 10 минут
+    CONTENT_CACHE_HARD_TTL = int(os.environ.get('CONTENT_CACHE_HARD_TTL') or 86400)  # 24 часа
+    # Кэш отрендеренной главной страницы: ключ (язык, отпечаток контента, версия шаблонов)
+    PAGE_CACHE = (os.environ.get('PAGE_CACHE') or 'true').lower() == 'true'
+    PAGE_CACHE_MAX_ENTRIES = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES') or 32)
+    # Cache-Control по endpoint (имя view-функции). Ответы с ETag перепроверяются
+    # через If-None-Match и при неизменном контенте получают 304 без тела
+    CACHE_CONTROL = {
+        'index': 'no-cache',
+        'get_team': 'private, max-age=60',
+        'get_roadmap': 'private, max-age=60',
+        'get_translations_api': 'public, max-age=300',
+    }
+    # Сжатие ответов gzip/br: тела с ETag сжимаются один раз на версию и хранятся в кэше
+    COMPRESSION = (os.environ.get('COMPRESSION') or 'true').lower() == 'true'
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL') or 6)  # gzip 1-9
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY') or 6)  # brotli 0-11
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE') or 500)  # байт
+    COMPRESSION_CACHE_ENTRIES = int(os.environ.get('COMPRESSION_CACHE_ENTRIES') or 64)
     
     # Настройки многоязычности
     SUPPORTED_LANGUAGES = ['ru', 'en']
     DEFAULT_LANGUAGE = 'ru'
+    # Язык только из URL (/ru, /en): без сессии и Set-Cookie, / перенаправляет
+    # по Accept-Language - страницы можно кэшировать на CDN/прокси
+    LANGUAGE_URL_ONLY = (os.environ.get('LANGUAGE_URL_ONLY') or 'false').lower() == 'true'
+    # Прогрев кэшей и шаблонов для всех языков при старте воркера
+    # (до завершения /api/health отвечает 503)
+    WARMUP = (os.environ.get('WARMUP') or 'true').lower() == 'true'
     
     # Цветовая схема приложения (бело-синяя)
     COLORS = {
@@ -59,9 +130,8 @@ class ProductionConfig(Config):
     SECRET_KEY = os.environ.get('SECRET_KEY')
     HOST = '0.0.0.0'
     PORT = int(os.environ.get('PORT', 10000))
-    # Redis cache для production (опционально)
-    # CACHE_TYPE = 'redis'
-    # CACHE_REDIS_URL = os.environ.get('REDIS_URL')
+    # Кэш процесса перед общим кэшем воркеров на хосте (с Redis - CACHE_L2_TYPE=services.shared_cache.TieredCache)
+    CACHE_TYPE = os.environ.get('CACHE_TYPE') or 'services.shared_cache.ProcessCache'
 
 
 class TestingConfig(Config):
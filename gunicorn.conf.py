@@ -0,0 +1,53 @@
+"""
+Конфигурация gunicorn для Smart Care
+
+    gunicorn app:app --config gunicorn.conf.py
+
+С preload_app приложение импортируется один раз в мастере: Firestore
+инициализируется, прогрев заполняет кэши контента и страниц, и воркеры
+получают их после fork copy-on-write, без повторных чтений Firestore.
+Клиент Firestore (gRPC) в мастере закрывается перед fork и создаётся
+заново в каждом воркере (pre_fork / post_fork).
+"""
+
+import os
+
+# gRPC должен знать о fork до первого импорта (приложение импортируется после загрузки конфига)
+os.environ.setdefault('GRPC_ENABLE_FORK_SUPPORT', '1')
+os.environ.setdefault('GRPC_POLL_STRATEGY', 'poll')
+
+# С ASYNC_VIEWS поток запроса только ждёт чтения, которые идут через один
+# цикл событий и один AsyncClient на воркер, поэтому потоков можно держать много
+async_views = (os.environ.get('ASYNC_VIEWS') or 'false').lower() == 'true'
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY') or 2)
+threads = int(os.environ.get('GUNICORN_THREADS') or (64 if async_views else 2))
+timeout = 120
+
+# Загрузка приложения в мастере (GUNICORN_PRELOAD=false - каждый воркер импортирует сам)
+preload_app = (os.environ.get('GUNICORN_PRELOAD') or 'true').lower() == 'true'
+
+
+def pre_fork(server, worker):
+    """Мастер: дождаться прогрева и закрыть клиент Firestore перед fork"""
+    if not server.cfg.preload_app:
+        return
+    
+    from app import warmup
+    from services.firestore_service import firestore_service
+    
+    # Потоки не переживают fork: воркер должен получить уже заполненные кэши,
+    # release_client дожидается фоновой сверки снимка контента
+    warmup.wait()
+    firestore_service.release_client()
+
+
+def post_fork(server, worker):
+    """Воркер: новый клиент Firestore, подписки слушателей и незавершённая сверка снимка"""
+    if not server.cfg.preload_app:
+        return
+    
+    from services.firestore_service import firestore_service
+    
+    firestore_service.reset_client()
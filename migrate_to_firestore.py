@@ -7,7 +7,12 @@
 import os
 import sys
 import json
+import time
+import hashlib
+import argparse
+from config import Config
 from services.firestore_service import firestore_service
+from services.content_bundle import ContentBundles
 
 # Инициализация Firestore
 print("🔥 Инициализация Firebase Firestore...")
@@ -807,24 +812,24 @@ errors_data = {
 # ФУНКЦИИ ЗАГРУЗКИ
 # ==========================================
 
-def upload_navigation():
+def upload_navigation(batch):
     """Загрузка навигации"""
     print("📍 Загрузка навигации...")
     for lang in ['ru', 'en']:
-        firestore_service.create_document(
+        batch.set(
             'translations',
             f'{lang}_navigation',
             navigation_data[lang]
         )
     print("✓ Навигация загружена\n")
 
-def upload_home_content():
+def upload_home_content(batch):
     """Загрузка контента главной страницы"""
     print("🏠 Загрузка контента главной страницы...")
     
     # Hero
     for lang in ['ru', 'en']:
-        firestore_service.create_document(
+        batch.set(
             'translations',
             f'{lang}_hero',
             hero_data[lang]
@@ -832,7 +837,7 @@ def upload_home_content():
     
     # Problem
     for lang in ['ru', 'en']:
-        firestore_service.create_document(
+        batch.set(
             'translations',
             f'{lang}_problem',
             problem_data[lang]
@@ -840,7 +845,7 @@ def upload_home_content():
     
     # Solution
     for lang in ['ru', 'en']:
-        firestore_service.create_document(
+        batch.set(
             'translations',
             f'{lang}_solution',
             solution_data[lang]
@@ -848,7 +853,7 @@ def upload_home_content():
     
     # Sectors
     for lang in ['ru', 'en']:
-        firestore_service.create_document(
+        batch.set(
             'translations',
             f'{lang}_sectors',
             sectors_data[lang]
@@ -856,13 +861,13 @@ def upload_home_content():
     
     print("✓ Контент главной страницы загружен\n")
 
-def upload_team():
+def upload_team(batch):
     """Загрузка данных команды"""
     print("👥 Загрузка команды...")
     
     # Заголовки секции
     for lang in ['ru', 'en']:
-        firestore_service.create_document(
+        batch.set(
             'translations',
             f'{lang}_team_section',
             team_section_data[lang]
@@ -870,7 +875,7 @@ def upload_team():
     
     # Члены команды (ОБНОВЛЕННАЯ СТРУКТУРА)
     for member in team_members:
-        firestore_service.create_document(
+        batch.set(
             'team_members',
             member['id'],
             {
@@ -881,24 +886,24 @@ def upload_team():
     
     print("✓ Команда загружена\n")
 
-def upload_why_us():
+def upload_why_us(batch):
     """Загрузка секции 'Почему мы'"""
     print("⭐ Загрузка секции 'Почему мы'...")
     for lang in ['ru', 'en']:
-        firestore_service.create_document(
+        batch.set(
             'translations',
             f'{lang}_why_us',
             why_us_data[lang]
         )
     print("✓ Секция 'Почему мы' загружена\n")
 
-def upload_roadmap():
+def upload_roadmap(batch):
     """Загрузка дорожной карты"""
     print("🛣️  Загрузка дорожной карты...")
     
     # Заголовки секции
     for lang in ['ru', 'en']:
-        firestore_service.create_document(
+        batch.set(
             'translations',
             f'{lang}_roadmap',
             roadmap_data[lang]
@@ -906,7 +911,7 @@ def upload_roadmap():
     
     # Milestones (ОБНОВЛЕННАЯ СТРУКТУРА)
     for milestone in milestones:
-        firestore_service.create_document(
+        batch.set(
             'roadmap_milestones',
             milestone['id'],
             {
@@ -917,7 +922,7 @@ def upload_roadmap():
     
     # Next steps (ОБНОВЛЕННАЯ СТРУКТУРА)
     for step in next_steps:
-        firestore_service.create_document(
+        batch.set(
             'roadmap_next_steps',
             step['id'],
             {
@@ -928,28 +933,28 @@ def upload_roadmap():
     
     print("✓ Дорожная карта загружена\n")
 
-def upload_implementation():
+def upload_implementation(batch):
     """Загрузка секции реализации (НОВАЯ ФУНКЦИЯ)"""
     print("🚀 Загрузка секции реализации...")
     for lang in ['ru', 'en']:
-        firestore_service.create_document(
+        batch.set(
             'translations',
             f'{lang}_implementation',
             implementation_data[lang]
         )
     print("✓ Секция реализации загружена\n")
 
-def upload_meta_and_footer():
+def upload_meta_and_footer(batch):
     """Загрузка метаданных и footer"""
     print("📄 Загрузка метаданных и footer...")
     
     for lang in ['ru', 'en']:
-        firestore_service.create_document(
+        batch.set(
             'translations',
             f'{lang}_meta',
             meta_data[lang]
         )
-        firestore_service.create_document(
+        batch.set(
             'translations',
             f'{lang}_footer',
             footer_data[lang]
@@ -957,37 +962,182 @@ def upload_meta_and_footer():
     
     print("✓ Метаданные и footer загружены\n")
 
-def upload_errors():
+def upload_errors(batch):
     """Загрузка страниц ошибок"""
     print("❌ Загрузка страниц ошибок...")
     for lang in ['ru', 'en']:
-        firestore_service.create_document(
+        batch.set(
             'translations',
             f'{lang}_errors',
             errors_data[lang]
         )
     print("✓ Страницы ошибок загружены\n")
 
+# ==========================================
+# СРАВНЕНИЕ С FIRESTORE
+# ==========================================
+
+# Функции загрузки в порядке выполнения
+UPLOADS = [
+    upload_navigation,
+    upload_home_content,
+    upload_team,
+    upload_why_us,
+    upload_roadmap,
+    upload_implementation,  # НОВАЯ ФУНКЦИЯ!
+    upload_meta_and_footer,
+    upload_errors
+]
+
+# Языки документов translations/{lang}_*, которыми управляет миграция
+LANGUAGES = ['ru', 'en']
+
+# Манифест: хэши документов, записанных миграцией, {коллекция: {ID документа: хэш}}
+MANIFEST_COLLECTION = 'meta'
+MANIFEST_DOCUMENT = 'migration'
+
+
+class DocumentCollector:
+    """Собирает документы из upload_* вместо записи (тот же интерфейс, что у BatchWriter)"""
+    
+    def __init__(self):
+        self.documents = {}
+    
+    def set(self, collection, document_id, data, merge=False):
+        self.documents.setdefault(collection, {})[document_id] = data
+
+
+def content_hash(data):
+    """Стабильный хэш содержимого документа (не зависит от порядка ключей)"""
+    payload = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def collect_documents():
+    """Целевое состояние: {коллекция: {ID документа: данные}}"""
+    collector = DocumentCollector()
+    for upload in UPLOADS:
+        upload(collector)
+    return collector.documents
+
+
+def read_manifest():
+    """
+    Хэши документов, записанных прошлой миграцией: {коллекция: {ID документа: хэш}}
+    
+    Одно чтение документа meta/migration вместо чтения всех коллекций. Документы,
+    которых нет в манифесте (созданные в консоли Firebase), миграция не трогает;
+    правка в консоли документа из манифеста тоже не видна - он перезаписывается,
+    только когда меняются данные миграции.
+    """
+    manifest = firestore_service.get_document(MANIFEST_COLLECTION, MANIFEST_DOCUMENT, strict=True, cache=False)
+    return manifest.get('documents', {}) if manifest else {}
+
+
+def manifest_for(target):
+    """Манифест целевого состояния"""
+    return {
+        collection: {document_id: content_hash(data) for document_id, data in documents.items()}
+        for collection, documents in target.items()
+    }
+
+
+def diff_documents(target, current):
+    """
+    Сравнить целевое состояние с манифестом прошлой миграции
+    
+    Returns:
+        Словарь {'added': [...], 'changed': [...], 'removed': [...]} со списками (коллекция, ID);
+        removed - только документы, которые записала миграция
+    """
+    diff = {'added': [], 'changed': [], 'removed': []}
+    
+    for collection, documents in target.items():
+        existing = current.get(collection, {})
+        for document_id, data in documents.items():
+            if document_id not in existing:
+                diff['added'].append((collection, document_id))
+            elif existing[document_id] != content_hash(data):
+                diff['changed'].append((collection, document_id))
+        
+    for collection, existing in current.items():
+        documents = target.get(collection, {})
+        for document_id in existing:
+            if document_id not in documents:
+                diff['removed'].append((collection, document_id))
+    
+    return diff
+
+
+def print_diff(diff):
+    """Вывести список изменений"""
+    marks = {'added': '+', 'changed': '~', 'removed': '-'}
+    for kind, mark in marks.items():
+        for collection, document_id in sorted(diff[kind]):
+            print(f"  {mark} {collection}/{document_id}")
+    
+    print(f"\n📊 Добавлено: {len(diff['added'])}, изменено: {len(diff['changed'])}, "
+          f"удалено: {len(diff['removed'])}")
+
+
+def apply_diff(target, diff):
+    """Записать только изменившиеся документы и новый манифест одним пакетом"""
+    with firestore_service.batch() as batch:
+        for collection, document_id in diff['added'] + diff['changed']:
+            batch.set(collection, document_id, target[collection][document_id])
+        for collection, document_id in diff['removed']:
+            batch.delete(collection, document_id)
+        batch.set(MANIFEST_COLLECTION, MANIFEST_DOCUMENT, {
+            'documents': manifest_for(target),
+            'updated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        })
+    return batch
+
 # ==========================================
 # ГЛАВНАЯ ФУНКЦИЯ
 # ==========================================
 
-def main():
-    """Запуск миграции"""
+def main(argv=None):
+    """Запуск миграции: записываются только добавленные, изменённые и удалённые документы"""
+    parser = argparse.ArgumentParser(description='Миграция данных Smart Care в Firestore')
+    parser.add_argument('--dry-run', action='store_true', help='Показать изменения без записи')
+    args = parser.parse_args(argv)
+    
     print("\n" + "="*60)
-    print("  МИГРАЦИЯ ДАННЫХ SMART CARE В FIRESTORE")
+    print("  МИГРАЦИЯ ДАННЫХ SMART CARE В FIRESTORE" + (" (DRY RUN)" if args.dry_run else ""))
     print("="*60 + "\n")
     
     try:
-        # Загрузка всех данных
-        upload_navigation()
-        upload_home_content()
-        upload_team()
-        upload_why_us()
-        upload_roadmap()
-        upload_implementation()  # НОВАЯ ФУНКЦИЯ!
-        upload_meta_and_footer()
-        upload_errors()
+        started = time.perf_counter()
+        target = collect_documents()
+        collected = time.perf_counter()
+        
+        current = read_manifest()
+        read_done = time.perf_counter()
+        
+        diff = diff_documents(target, current)
+        print("\n🔍 Изменения:")
+        print_diff(diff)
+        
+        total = sum(len(documents) for documents in target.values())
+        print(f"\n⏱  Подготовка {total} документов: {(collected - started) * 1000:.0f} ms, "
+              f"чтение Firestore: {(read_done - collected) * 1000:.0f} ms")
+        
+        if args.dry_run:
+            print("\nℹ️  Dry run: запись не выполнялась\n")
+            return
+        
+        if not any(diff.values()):
+            print("\n✓ Изменений нет, запись не требуется\n")
+            return
+        
+        if Config.CONTENT_BUNDLES:
+            # Бандлы bundles/{lang} пересобираются после записи пакета
+            firestore_service.add_write_listener(ContentBundles(firestore_service, LANGUAGES).on_write)
+        
+        batch = apply_diff(target, diff)
+        print(f"⏱  Запись: {(time.perf_counter() - read_done) * 1000:.0f} ms "
+              f"({batch.written} операций, commit: {batch.commits})")
         
         print("\n" + "="*60)
         print("  ✅ МИГРАЦИЯ ЗАВЕРШЕНА УСПЕШНО!")
@@ -1003,6 +1153,9 @@ def main():
         print("  • Метаданные и footer")
         print("  • Страницы ошибок (404, 500)")
         print("\n✨ Все данные успешно загружены в Firebase Firestore!\n")
+        if batch.written:
+            # Запущенные воркеры держат прочитанный контент до истечения кэшей
+            print("💡 Чтобы сайт показал изменения сразу: flask --app app clear-cache\n")
         
     except Exception as e:
         print(f"\n❌ Ошибка миграции: {e}\n")
@@ -0,0 +1,186 @@
+"""
+Circuit breaker для Smart Care
+Защищает воркеры от зависания на деградировавшем Firestore
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Dict
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Вызов отклонён: предохранитель разомкнут"""
+
+
+class CircuitBreaker:
+    """
+    Предохранитель с тремя состояниями
+    
+    - closed: вызовы проходят; ошибки и медленные вызовы подряд считаются;
+    - open: после failure_threshold таких вызовов подряд все вызовы отклоняются
+      без обращения к бэкенду в течение reset_timeout секунд;
+    - half_open: по истечении reset_timeout пропускается одна пробная попытка;
+      успех замыкает предохранитель, ошибка снова размыкает с удвоенным
+      reset_timeout (не больше max_reset_timeout), чтобы не нагружать
+      восстанавливающийся бэкенд пробами.
+    
+    Args:
+        name: Имя для логов
+        failure_threshold: Количество ошибок/медленных вызовов подряд до размыкания
+        slow_call_duration: Вызов дольше этого (сек) считается неудачным
+        reset_timeout: Время (сек) в состоянии open до пробной попытки
+        max_reset_timeout: Предел reset_timeout при повторных неудачных пробах
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, name: str, failure_threshold: int = 5, slow_call_duration: float = 2.0,
+                 reset_timeout: float = 30.0, max_reset_timeout: float = 300.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_duration = slow_call_duration
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max(max_reset_timeout, reset_timeout)
+        # Текущий интервал до пробы: удваивается после каждой неудачной пробы
+        self._open_timeout = reset_timeout
+        
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._trips = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """Текущее состояние (open переходит в half_open по истечении reset_timeout)"""
+        with self._lock:
+            return self._current_state()
+    
+    def allow_request(self) -> bool:
+        """
+        Можно ли выполнить вызов
+        
+        Returns:
+            True если вызов разрешён (в half_open - только одна пробная попытка)
+        """
+        with self._lock:
+            state = self._current_state()
+            
+            if state == self.CLOSED:
+                return True
+            
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            
+            self._rejected += 1
+            return False
+    
+    def record_success(self, duration: float = 0.0):
+        """Учесть завершённый вызов; слишком медленный считается неудачным"""
+        if duration > self.slow_call_duration:
+            logger.warning(f"{self.name}: медленный вызов {duration:.2f} сек")
+            self.record_failure()
+            return
+        
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"✓ {self.name}: предохранитель замкнут")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+            self._open_timeout = self.reset_timeout
+    
+    def record_failure(self):
+        """Учесть неудачный вызов"""
+        with self._lock:
+            self._failures += 1
+            probe_failed = self._probe_in_flight
+            self._probe_in_flight = False
+            
+            if probe_failed or self._failures >= self.failure_threshold:
+                if self._state == self.CLOSED:
+                    self._trips += 1
+                    logger.error(f"{self.name}: предохранитель разомкнут после {self._failures} неудач подряд")
+                elif probe_failed:
+                    self._open_timeout = min(self._open_timeout * 2, self.max_reset_timeout)
+                    logger.warning(f"{self.name}: пробная попытка неудачна, следующая через {self._open_timeout:.0f} сек")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+    
+    def release_probe(self):
+        """Вызов прерван без результата (отмена, KeyboardInterrupt): освободить пробу, не считая неудачей"""
+        with self._lock:
+            self._probe_in_flight = False
+    
+    def call(self, operation, *args, **kwargs) -> Any:
+        """
+        Выполнить вызов через предохранитель
+        
+        Raises:
+            CircuitOpenError: если предохранитель разомкнут
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(f"{self.name}: предохранитель разомкнут")
+        
+        started = time.monotonic()
+        try:
+            result = operation(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            self.release_probe()
+            raise
+        
+        self.record_success(time.monotonic() - started)
+        return result
+    
+    async def call_async(self, operation, *args, **kwargs) -> Any:
+        """
+        То же, что call, для корутины operation(*args, **kwargs)
+        
+        Raises:
+            CircuitOpenError: если предохранитель разомкнут
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(f"{self.name}: предохранитель разомкнут")
+        
+        started = time.monotonic()
+        try:
+            result = await operation(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            # Отмена (asyncio.gather, завершение цикла asgiref) - не ошибка бэкенда
+            self.release_probe()
+            raise
+        
+        self.record_success(time.monotonic() - started)
+        return result
+    
+    def stats(self) -> Dict[str, Any]:
+        """Состояние и счётчики для /api/health"""
+        with self._lock:
+            return {
+                'state': self._current_state(),
+                'consecutive_failures': self._failures,
+                'trips': self._trips,
+                'rejected': self._rejected,
+                'reset_timeout': self._open_timeout
+            }
+    
+    def _current_state(self) -> str:
+        """Состояние с учётом истечения reset_timeout (вызывать под блокировкой)"""
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self._open_timeout:
+            return self.HALF_OPEN
+        return self._state
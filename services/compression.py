@@ -0,0 +1,135 @@
+"""
+Сжатие ответов для Smart Care
+Согласование gzip/br по Accept-Encoding. Ответы с ETag (главная страница,
+JSON API, статика) сжимаются один раз на версию содержимого: сжатые байты
+хранятся в LRU кэше по ключу (ETag, кодировка).
+"""
+
+import gzip
+import logging
+from typing import Any, Dict
+
+from services.page_cache import PageCache
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него только gzip
+    brotli = None
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+# Типы содержимого, которые имеет смысл сжимать
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/javascript', 'text/xml',
+    'application/javascript', 'application/json', 'application/xml', 'image/svg+xml',
+}
+
+
+class ResponseCompressor:
+    """
+    Сжатие ответов Flask в after_request
+    
+    Кодировка выбирается по Accept-Encoding клиента (br предпочтительнее gzip).
+    Ответ с ETag - это конкретная версия содержимого, поэтому сжатые байты
+    кэшируются и CPU тратится один раз на версию, а не на каждый запрос.
+    ETag ответа, который мог быть сжат (тип содержимого сжимается, клиент
+    принимает сжатие), становится слабым: тело другое, но смысл тот же, и
+    If-None-Match по-прежнему даёт 304. Правило не зависит от размера тела,
+    поэтому у 304 те же валидаторы (слабый ETag, Vary: Accept-Encoding), что у 200.
+    
+    Args:
+        level: Уровень gzip (1-9)
+        brotli_quality: Качество brotli (0-11)
+        min_size: Ответы меньше этого размера (байт) не сжимаются
+        cache_entries: Сколько сжатых тел хранить в кэше
+        enabled: False - ответы отдаются без сжатия
+    """
+    
+    def __init__(self, level: int = 6, brotli_quality: int = 6, min_size: int = 500,
+                 cache_entries: int = 64, enabled: bool = True):
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.min_size = min_size
+        self.enabled = enabled
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+        self._cache = PageCache(cache_entries)
+    
+    @classmethod
+    def from_config(cls, config) -> 'ResponseCompressor':
+        """Создать из конфигурации приложения"""
+        return cls(
+            level=config.get('COMPRESSION_LEVEL', 6),
+            brotli_quality=config.get('COMPRESSION_BROTLI_QUALITY', 6),
+            min_size=config.get('COMPRESSION_MIN_SIZE', 500),
+            cache_entries=config.get('COMPRESSION_CACHE_ENTRIES', 64),
+            enabled=config.get('COMPRESSION', True)
+        )
+    
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        """Сжать байты выбранной кодировкой"""
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        # mtime=0: одинаковое тело - одинаковые сжатые байты
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+    
+    def process(self, response, accept_encodings):
+        """
+        Сжать ответ, если клиент и содержимое это допускают
+        
+        Args:
+            response: Ответ Flask
+            accept_encodings: request.accept_encodings
+        
+        Returns:
+            Тот же ответ (сжатый или без изменений)
+        """
+        if not self.enabled or response.status_code not in (200, 304) or 'Content-Encoding' in response.headers:
+            return response
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES or 'no-transform' in response.headers.get('Cache-Control', ''):
+            return response
+        if response.is_streamed and not response.direct_passthrough:
+            return response
+        
+        # Представление зависит от Accept-Encoding, даже если этот клиент сжатие не принял
+        response.vary.add('Accept-Encoding')
+        encoding = accept_encodings.best_match(self.encodings)
+        if encoding is None:
+            return response
+        
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        if response.status_code == 304:
+            return response
+        
+        length = response.content_length
+        if length is None:
+            if response.direct_passthrough:
+                return response
+            length = len(response.get_data())
+        if length < self.min_size:
+            return response
+        
+        # Файл статики (send_file) читается в память, только если его нет в кэше сжатых тел
+        response.direct_passthrough = False
+        source = response.response
+        if etag:
+            body = self._cache.get_or_render((etag, encoding), lambda: self.compress(response.get_data(), encoding))
+        else:
+            body = self.compress(response.get_data(), encoding)
+        
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        # Исходный файл статики (send_file) заменён телом из памяти - закрываем его
+        if source is not response.response and hasattr(source, 'close'):
+            source.close()
+        return response
+    
+    def clear(self):
+        """Сбросить кэш сжатых тел"""
+        self._cache.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Счётчики для /api/health"""
+        return dict(self._cache.stats(), enabled=self.enabled, encodings=list(self.encodings))
@@ -0,0 +1,209 @@
+"""
+Бандлы контента для Smart Care
+Всё, что нужно главной странице на одном языке, в одном документе bundles/{lang}.
+Запись контента меняет версию в meta/content_version, а бандл, собранный
+из другой версии, пересобирается при следующем чтении.
+"""
+
+import time
+import uuid
+import asyncio
+import logging
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional
+
+from services.content_cache import SingleFlight
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+# Секции переводов главной страницы: документы translations/{lang}_{секция}
+TRANSLATION_KEYS = [
+    'navigation', 'hero', 'problem', 'solution', 'sectors',
+    'team_section', 'why_us', 'roadmap', 'implementation',
+    'additional', 'meta', 'footer', 'errors'
+]
+
+# Коллекции, из которых собирается бандл
+SOURCE_COLLECTIONS = ('translations', 'team_members', 'roadmap_milestones', 'roadmap_next_steps')
+
+BUNDLE_COLLECTION = 'bundles'
+VERSION_COLLECTION = 'meta'
+VERSION_DOCUMENT = 'content_version'
+
+
+def load_translations(service, lang: str, cache: bool = True) -> Dict[str, Dict]:
+    """Переводы главной страницы: {секция: данные} (cache=False - мимо кэша чтений)"""
+    # Одним пакетным запросом вместо отдельного чтения на каждую секцию
+    docs = service.get_documents(
+        'translations',
+        [f'{lang}_{key}' for key in TRANSLATION_KEYS],
+        lang,
+        strict=True,
+        cache=cache
+    )
+    return _translations(docs, lang)
+
+
+async def aload_translations(service, lang: str) -> Dict[str, Dict]:
+    """Асинхронный load_translations"""
+    docs = await service.aget_documents(
+        'translations',
+        [f'{lang}_{key}' for key in TRANSLATION_KEYS],
+        lang,
+        strict=True
+    )
+    return _translations(docs, lang)
+
+
+def _translations(docs: Dict[str, Dict], lang: str) -> Dict[str, Dict]:
+    """{ID документа: данные} -> {секция: данные}"""
+    return {key: docs[f'{lang}_{key}'] for key in TRANSLATION_KEYS if docs.get(f'{lang}_{key}')}
+
+
+def load_team(service, lang: str, cache: bool = True) -> List[Dict]:
+    """Члены команды на одном языке"""
+    # Читаем только поля нужного языка, а не весь многоязычный документ
+    return service.get_collection('team_members', lang, strict=True, select=['{lang}'], cache=cache)
+
+
+async def aload_team(service, lang: str) -> List[Dict]:
+    """Асинхронный load_team"""
+    return await service.aget_collection('team_members', lang, strict=True, select=['{lang}'])
+
+
+def load_roadmap(service, lang: str, cache: bool = True) -> Dict[str, Any]:
+    """Дорожная карта: текущий этап, milestones и next steps"""
+    # Три независимых чтения параллельно
+    roadmap_meta, milestones, next_steps = service.fan_out(
+        partial(service.get_document, 'translations', f'{lang}_roadmap', lang, strict=True, cache=cache),
+        partial(service.get_collection, 'roadmap_milestones', lang, strict=True, select=['{lang}'], cache=cache),
+        partial(service.get_collection, 'roadmap_next_steps', lang, strict=True,
+                order_by='{lang}.number', select=['{lang}'], cache=cache)
+    )
+    return _roadmap(roadmap_meta, milestones, next_steps)
+    
+
+async def aload_roadmap(service, lang: str) -> Dict[str, Any]:
+    """Асинхронный load_roadmap: три чтения одновременно в одном цикле событий"""
+    roadmap_meta, milestones, next_steps = await asyncio.gather(
+        service.aget_document('translations', f'{lang}_roadmap', lang, strict=True),
+        service.aget_collection('roadmap_milestones', lang, strict=True, select=['{lang}']),
+        service.aget_collection('roadmap_next_steps', lang, strict=True,
+                                order_by='{lang}.number', select=['{lang}'])
+    )
+    return _roadmap(roadmap_meta, milestones, next_steps)
+
+
+def _roadmap(roadmap_meta: Optional[Dict], milestones: List[Dict], next_steps: List[Dict]) -> Dict[str, Any]:
+    """Дорожная карта из документа {lang}_roadmap и двух выборок"""
+    return {
+        'current_stage': roadmap_meta.get('current_stage', 'MVP Development') if roadmap_meta else 'MVP Development',
+        'milestones': milestones,
+        'next_steps': next_steps
+    }
+
+
+class ContentBundles:
+    """
+    Денормализованные бандлы контента bundles/{lang}
+    
+    Бандл хранит переводы, команду и дорожную карту уже на нужном языке и версию
+    контента, из которой он собран. Запись в исходные коллекции через FirestoreService
+    только меняет версию в meta/content_version (on_write). При чтении бандл с версией,
+    отличной от текущей, считается устаревшим и пересобирается - только для
+    запрошенного языка, одновременные пересборки одного языка объединяются (SingleFlight).
+    
+    Args:
+        service: FirestoreService
+        languages: Языки, для которых собираются бандлы
+    """
+    
+    def __init__(self, service, languages: Iterable[str] = ('ru', 'en')):
+        self._service = service
+        self.languages = list(languages)
+        self._flights = SingleFlight()
+    
+    def get(self, lang: str) -> Optional[Dict[str, Any]]:
+        """
+        Прочитать бандл языка; устаревший или отсутствующий бандл пересобирается
+        
+        Returns:
+            {'translations': ..., 'team': ..., 'roadmap': ..., 'version': ...} или None
+        """
+        if not self._service.is_available:
+            return None
+        
+        bundle, version = self._service.fan_out(
+            partial(self._service.get_document, BUNDLE_COLLECTION, lang, lang, strict=True),
+            self.content_version
+        )
+        
+        if bundle is None or bundle.get('version') != version:
+            bundle = self._flights.call(lang, partial(self._rebuild_stale, lang, version))
+        return bundle
+    
+    def _rebuild_stale(self, lang: str, version: Optional[str]) -> Dict[str, Any]:
+        """Пересобрать устаревший бандл, если его ещё не пересобрал другой процесс"""
+        # Бандл из кэша чтений мог устареть раньше, чем его пересобрали
+        bundle = self._service.get_document(BUNDLE_COLLECTION, lang, lang, strict=True, cache=False)
+        if bundle is not None and bundle.get('version') == version:
+            return bundle
+        
+        logger.info(f"Бандл {lang} устарел ({bundle.get('version') if bundle else None} != {version}), пересборка")
+        return self.rebuild(lang, version)
+    
+    def content_version(self) -> Optional[str]:
+        """Текущая версия контента из meta/content_version (мимо кэша чтений)"""
+        # Версию меняют и другие процессы (миграция): закэшированная скрыла бы их запись
+        meta = self._service.get_document(VERSION_COLLECTION, VERSION_DOCUMENT, strict=True, cache=False)
+        return meta.get('version') if meta else None
+    
+    def bump_version(self) -> str:
+        """Записать новую версию контента (все бандлы становятся устаревшими)"""
+        version = uuid.uuid4().hex[:12]
+        self._service.create_document(VERSION_COLLECTION, VERSION_DOCUMENT, {
+            'version': version,
+            'updated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        })
+        return version
+    
+    def rebuild(self, lang: str, version: Optional[str]) -> Dict[str, Any]:
+        """Собрать бандл языка из исходных коллекций и сохранить его"""
+        started = time.time()
+        # Бандл собирается из Firestore, а не из кэша чтений, который мог устареть
+        translations, team, roadmap = self._service.fan_out(
+            partial(load_translations, self._service, lang, cache=False),
+            partial(load_team, self._service, lang, cache=False),
+            partial(load_roadmap, self._service, lang, cache=False)
+        )
+        bundle = {'translations': translations, 'team': team, 'roadmap': roadmap, 'version': version}
+        self._service.create_document(BUNDLE_COLLECTION, lang, bundle)
+        logger.info(f"✓ Бандл {lang} собран за {time.time() - started:.2f} сек (версия {version})")
+        return bundle
+    
+    def rebuild_all(self) -> str:
+        """Сменить версию контента и пересобрать бандлы всех языков"""
+        version = self.bump_version()
+        for lang in self.languages:
+            self.rebuild(lang, version)
+        return version
+    
+    def on_write(self, changes: Dict[str, List[str]]):
+        """
+        Обработчик записи через FirestoreService (add_write_listener)
+        
+        Только меняет версию: бандлы пересобираются при следующем чтении каждого
+        языка, а не все сразу в потоке записи.
+        
+        Args:
+            changes: {коллекция: [ID изменённых документов]}
+        """
+        if not any(collection in SOURCE_COLLECTIONS for collection in changes):
+            return
+        
+        try:
+            self.bump_version()
+        except Exception as e:
+            # Без новой версии бандлы остаются прежними до следующей записи
+            logger.error(f"Ошибка обновления версии контента: {e}")
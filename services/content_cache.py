@@ -0,0 +1,399 @@
+"""
+Кэш контента для Smart Care
+Stale-while-revalidate поверх Flask-Caching: после мягкого TTL запись
+продолжает отдаваться, а обновляется в фоновом потоке.
+Промахи по одному ключу объединяются (single-flight): загружает один поток,
+остальные ждут его результат. Записи разложены по пространствам имён
+(язык, коллекция Firestore) и сбрасываются точечно через invalidate().
+Для каждого значения при загрузке считается отпечаток содержимого - по нему
+строятся ключи кэша страниц и ETag без хэширования ответа на каждый запрос.
+У загрузчика может быть асинхронная версия (для async views): записи, single-flight
+и фоновое обновление у обеих версий общие.
+"""
+
+import json
+import asyncio
+import time
+import hashlib
+import logging
+import threading
+from collections import Counter
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """Загрузка ключа, результат которой ждут другие потоки"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+    
+    def result(self) -> Any:
+        """Результат завершённой загрузки или её исключение"""
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class SingleFlight:
+    """
+    Объединение одновременных загрузок по ключу (single-flight)
+    
+    Первый поток становится ведущим и выполняет загрузку, остальные ждут
+    и получают тот же результат или то же исключение.
+    """
+    
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+    
+    def __len__(self) -> int:
+        return len(self._flights)
+    
+    def call(self, key: Any, func: Callable[[], Any]) -> Any:
+        """Вызвать func, если загрузка ключа ещё не идёт, иначе дождаться её результата"""
+        flight, is_leader = self.join(key)
+        
+        if not is_leader:
+            flight.done.wait()
+            return flight.result()
+        
+        try:
+            flight.value = func()
+            return flight.value
+        except BaseException as e:
+            flight.error = self.error(key, e)
+            raise
+        finally:
+            self.leave(key, flight)
+    
+    def join(self, key: Any) -> Tuple[_Flight, bool]:
+        """Загрузка ключа и признак ведущего (первым начал загрузку)"""
+        with self._lock:
+            flight = self._flights.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+        return flight, is_leader
+    
+    def leave(self, key: Any, flight: _Flight):
+        """Завершить загрузку ключа и разбудить ожидающих"""
+        with self._lock:
+            self._flights.pop(key, None)
+        flight.done.set()
+    
+    @staticmethod
+    def error(key: Any, error: BaseException) -> Exception:
+        """Исключение для ожидающих: прерывание ведущего для них - обычная ошибка загрузки (fallback)"""
+        if isinstance(error, Exception):
+            return error
+        return RuntimeError(f"Загрузка {key} прервана ({type(error).__name__})")
+
+
+class ContentCache:
+    """
+    Кэш результатов загрузчиков контента (команда, дорожная карта, переводы)
+    
+    Каждая запись хранится в бэкенде Flask-Caching вместе со временем загрузки
+    и отпечатком содержимого:
+    - моложе soft_ttl - отдаётся как есть;
+    - старше soft_ttl - отдаётся устаревшее значение, а обновление уходит в фоновый поток;
+    - старше hard_ttl - запись удаляется бэкендом, следующий запрос загружает синхронно.
+    
+    Ключ записи - content:{lang}:{name}; для каждого загрузчика известны коллекции,
+    из которых он читает, поэтому изменение документа сбрасывает только записи
+    затронутого языка, зависящие от изменённой коллекции.
+    
+    Одновременные промахи по одному ключу (после cache.clear() или истечения hard_ttl)
+    не идут в Firestore параллельно: загрузку выполняет первый поток, остальные
+    получают его результат (счётчик coalesced).
+    """
+    
+    KEY_PREFIX = 'content'
+    
+    def __init__(self, app=None, cache=None):
+        self._cache = None
+        self.soft_ttl = 600
+        self.hard_ttl = 86400
+        self.languages = ['ru', 'en']
+        self._collections = {}
+        self._refreshing = set()
+        self._flights = SingleFlight()
+        self._lock = threading.Lock()
+        self._stats = Counter()
+        
+        if app is not None and cache is not None:
+            self.init_app(app, cache)
+    
+    def init_app(self, app, cache):
+        """
+        Подключить кэш к приложению
+        
+        Args:
+            app: Flask приложение
+            cache: Экземпляр flask_caching.Cache (бэкенд хранения)
+        """
+        self._cache = cache
+        self.soft_ttl = app.config.get('CONTENT_CACHE_SOFT_TTL', self.soft_ttl)
+        self.hard_ttl = app.config.get('CONTENT_CACHE_HARD_TTL', self.hard_ttl)
+        self.languages = list(app.config.get('SUPPORTED_LANGUAGES', self.languages))
+        
+        if self.soft_ttl > self.hard_ttl:
+            logger.warning("CONTENT_CACHE_SOFT_TTL больше CONTENT_CACHE_HARD_TTL, фоновое обновление не сработает")
+    
+    def cached(self, name: str, collections: Iterable[str], fallback: Callable[[str], Any] = None):
+        """
+        Декоратор для загрузчика контента вида loader(lang)
+        
+        Args:
+            name: Имя загрузчика (часть ключа кэша)
+            collections: Коллекции Firestore, из которых читает загрузчик
+            fallback: fallback(lang) - значение, если загрузчик упал и в кэше ничего нет
+        """
+        self._collections[name] = set(collections)
+        
+        def decorator(func):
+            async_loader = None
+            
+            @wraps(func)
+            def wrapper(lang='ru'):
+                return self.get(
+                    self.make_key(name, lang),
+                    lambda: func(lang),
+                    (lambda: fallback(lang)) if fallback else None
+                )
+            
+            def versioned(lang='ru'):
+                """(значение, отпечаток содержимого)"""
+                return self.get_versioned(
+                    self.make_key(name, lang),
+                    lambda: func(lang),
+                    (lambda: fallback(lang)) if fallback else None
+                )
+            
+            async def aversioned(lang='ru'):
+                """Асинхронный versioned: промах загружается асинхронной версией загрузчика"""
+                if async_loader is None:
+                    return await asyncio.to_thread(versioned, lang)
+                return await self.aget_versioned(
+                    self.make_key(name, lang),
+                    lambda: async_loader(lang),
+                    lambda: func(lang),
+                    (lambda: fallback(lang)) if fallback else None
+                )
+            
+            def asynchronous(async_func):
+                """Декоратор: асинхронная версия загрузчика async_func(lang) с тем же ключом"""
+                nonlocal async_loader
+                async_loader = async_func
+                return async_func
+            
+            wrapper.uncached = func
+            wrapper.versioned = versioned
+            wrapper.aversioned = aversioned
+            wrapper.asynchronous = asynchronous
+            return wrapper
+        return decorator
+    
+    def make_key(self, name: str, lang: str) -> str:
+        """Ключ записи в бэкенде"""
+        return f'{self.KEY_PREFIX}:{lang}:{name}'
+    
+    def get(self, key: str, loader: Callable[[], Any], fallback: Callable[[], Any] = None) -> Any:
+        """
+        Получить значение из кэша или загрузить его
+        
+        Args:
+            key: Ключ записи
+            loader: Функция загрузки без аргументов
+            fallback: Функция, возвращающая значение при ошибке загрузки
+        
+        Returns:
+            Значение из кэша, свежезагруженное или fallback
+        """
+        return self.get_versioned(key, loader, fallback)[0]
+    
+    def get_versioned(self, key: str, loader: Callable[[], Any],
+                      fallback: Callable[[], Any] = None) -> Tuple[Any, str]:
+        """
+        То же, что get(), вместе с отпечатком содержимого значения
+        
+        Returns:
+            (значение, отпечаток); отпечаток меняется только при изменении содержимого
+        """
+        entry = self._cache.get(key)
+        
+        if entry is not None:
+            value, loaded_at, fingerprint = entry
+            if time.time() - loaded_at < self.soft_ttl:
+                self._stats['hits'] += 1
+            else:
+                # Отдаём устаревшее значение, обновляем в фоне
+                self._stats['stale_hits'] += 1
+                self._refresh_async(key, loader)
+            return value, fingerprint
+        
+        self._stats['misses'] += 1
+        try:
+            return self._load_once(key, loader)
+        except Exception as e:
+            logger.error(f"Ошибка загрузки контента {key}: {e}")
+            self._stats['load_errors'] += 1
+            if fallback is None:
+                raise
+            value = fallback()
+            return value, self.fingerprint(value)
+    
+    async def aget_versioned(self, key: str, loader: Callable[[], Awaitable[Any]], refresh_loader: Callable[[], Any],
+                             fallback: Callable[[], Any] = None) -> Tuple[Any, str]:
+        """
+        Асинхронный get_versioned
+        
+        Args:
+            key: Ключ записи
+            loader: Асинхронная функция загрузки без аргументов (промах)
+            refresh_loader: Синхронная функция загрузки для фонового обновления
+            fallback: Функция, возвращающая значение при ошибке загрузки
+        """
+        entry = self._cache.get(key)
+        
+        if entry is not None:
+            value, loaded_at, fingerprint = entry
+            if time.time() - loaded_at < self.soft_ttl:
+                self._stats['hits'] += 1
+            else:
+                self._stats['stale_hits'] += 1
+                self._refresh_async(key, refresh_loader)
+            return value, fingerprint
+        
+        self._stats['misses'] += 1
+        try:
+            return await self._aload_once(key, loader)
+        except Exception as e:
+            logger.error(f"Ошибка загрузки контента {key}: {e}")
+            self._stats['load_errors'] += 1
+            if fallback is None:
+                raise
+            value = fallback()
+            return value, self.fingerprint(value)
+    
+    @staticmethod
+    def fingerprint(value: Any) -> str:
+        """Отпечаток содержимого (не зависит от порядка ключей)"""
+        payload = json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+    
+    def invalidate(self, lang: Optional[str] = None, collection: Optional[str] = None) -> int:
+        """
+        Сбросить записи пространства имён (язык, коллекция)
+        
+        Args:
+            lang: Язык (None - все поддерживаемые языки)
+            collection: Коллекция Firestore (None - записи всех загрузчиков)
+        
+        Returns:
+            Количество сброшенных ключей
+        """
+        names = [
+            name for name, collections in self._collections.items()
+            if collection is None or collection in collections
+        ]
+        keys = [
+            self.make_key(name, key_lang)
+            for key_lang in ([lang] if lang else self.languages)
+            for name in names
+        ]
+        
+        if keys:
+            # Не delete_many: в Flask-Caching он останавливается на первом отсутствующем ключе
+            for key in keys:
+                self._cache.delete(key)
+            self._stats['invalidations'] += len(keys)
+            logger.info(f"✓ Кэш контента сброшен: lang={lang or '*'}, collection={collection or '*'} ({len(keys)} кл.)")
+        return len(keys)
+    
+    def stats(self) -> Dict[str, int]:
+        """Счётчики кэша"""
+        stats = dict(self._stats, refreshing=len(self._refreshing), inflight=len(self._flights))
+        if self._flights.coalesced:
+            stats['coalesced'] = self._flights.coalesced
+        return stats
+    
+    def _load_once(self, key: str, loader: Callable[[], Any]) -> Tuple[Any, str]:
+        """
+        Загрузить значение при промахе, объединяя одновременные запросы по ключу
+        
+        Первый поток становится ведущим и вызывает загрузчик, остальные ждут
+        и получают тот же результат или то же исключение.
+        """
+        return self._flights.call(key, lambda: self._load_missing(key, loader))
+        
+    def _load_missing(self, key: str, loader: Callable[[], Any]) -> Tuple[Any, str]:
+        """Загрузка ведущего: предыдущий ведущий мог записать значение между нашим промахом и захватом ключа"""
+        entry = self._cache.get(key)
+        return (entry[0], entry[2]) if entry is not None else self._load(key, loader)
+    
+    async def _aload_once(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+        """Асинхронный _load_once: ведущие и ожидающие общие с синхронными загрузками"""
+        flight, is_leader = self._flights.join(key)
+        
+        if not is_leader:
+            # Ведущий может быть синхронным потоком: ждём событие, не блокируя цикл
+            await asyncio.to_thread(flight.done.wait)
+            return flight.result()
+        
+        try:
+            entry = self._cache.get(key)
+            if entry is not None:
+                flight.value = (entry[0], entry[2])
+            else:
+                self._stats['loads'] += 1
+                flight.value = self._store(key, await loader())
+            return flight.value
+        except BaseException as e:
+            # В т.ч. отмена ведущего (asyncio.gather, завершение цикла asgiref)
+            flight.error = self._flights.error(key, e)
+            raise
+        finally:
+            self._flights.leave(key, flight)
+    
+    def _load(self, key: str, loader: Callable[[], Any]) -> Tuple[Any, str]:
+        """Синхронно загрузить значение и сохранить его вместе с отпечатком"""
+        self._stats['loads'] += 1
+        return self._store(key, loader())
+    
+    def _store(self, key: str, value: Any) -> Tuple[Any, str]:
+        """Сохранить загруженное значение вместе с отпечатком"""
+        fingerprint = self.fingerprint(value)
+        self._cache.set(key, (value, time.time(), fingerprint), timeout=self.hard_ttl)
+        return value, fingerprint
+    
+    def _refresh_async(self, key: str, loader: Callable[[], Any]):
+        """Запустить фоновое обновление записи, если оно ещё не идёт"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        thread = threading.Thread(target=self._refresh, args=(key, loader), name=f'refresh-{key}', daemon=True)
+        thread.start()
+    
+    def _refresh(self, key: str, loader: Callable[[], Any]):
+        """Фоновое обновление: при ошибке остаётся последнее удачное значение"""
+        try:
+            self._load(key, loader)
+            self._stats['refreshes'] += 1
+        except Exception as e:
+            logger.error(f"Ошибка фонового обновления {key}: {e}")
+            self._stats['refresh_errors'] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
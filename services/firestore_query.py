@@ -0,0 +1,141 @@
+"""
+Параметры выборки коллекции для Smart Care
+Сортировка, фильтры, лимит и проекция полей: построение запроса Firestore
+и та же семантика в памяти для материализованных копий коллекций
+"""
+
+import operator
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# Фильтр: (путь поля, оператор, значение), например ('{lang}.status', '==', 'completed')
+Filter = Tuple[str, str, Any]
+
+_MISSING = object()
+
+# Операторы Firestore и их вычисление в памяти
+_OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda value, options: value in options,
+    'not-in': lambda value, options: value not in options,
+    'array-contains': lambda value, item: isinstance(value, list) and item in value,
+    'array-contains-any': lambda value, items: isinstance(value, list) and any(item in value for item in items),
+}
+
+
+def localize(path: str, lang: str) -> str:
+    """Подставить язык в путь поля: '{lang}.title' -> 'ru.title'"""
+    return path.replace('{lang}', lang)
+
+
+def normalize(lang: str, order_by: Union[str, Sequence[str]] = None, where: Iterable[Filter] = None,
+              select: Iterable[str] = None) -> Tuple[List[Tuple[str, bool]], List[Filter], Optional[List[str]]]:
+    """
+    Привести параметры выборки к единому виду с подставленным языком
+    
+    Args:
+        lang: Язык для плейсхолдера {lang}
+        order_by: Поле или список полей; префикс '-' - по убыванию
+        where: Фильтры (поле, оператор, значение)
+        select: Поля проекции
+    
+    Returns:
+        ([(поле, по убыванию)], [фильтры], [поля проекции] или None)
+    
+    Raises:
+        ValueError: если оператор фильтра не поддерживается
+    """
+    if isinstance(order_by, str):
+        order_by = [order_by]
+    
+    orders = [
+        (localize(field.lstrip('-'), lang), field.startswith('-'))
+        for field in order_by or []
+    ]
+    
+    filters = []
+    for field, op, value in where or []:
+        if op not in _OPERATORS:
+            raise ValueError(f"Неподдерживаемый оператор фильтра: {op}")
+        filters.append((localize(field, lang), op, value))
+    
+    fields = [localize(field, lang) for field in select] if select is not None else None
+    return orders, filters, fields
+
+
+def get_field(data: Dict, path: str) -> Any:
+    """Значение поля по пути через точку или _MISSING"""
+    value = data
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def project(data: Dict, fields: Iterable[str]) -> Dict:
+    """Оставить в документе только указанные поля (как select() в Firestore)"""
+    result = {}
+    for path in fields:
+        value = get_field(data, path)
+        if value is _MISSING:
+            continue
+        
+        target = result
+        parts = path.split('.')
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = value
+    return result
+
+
+def apply(docs: Iterable[Dict], orders: List[Tuple[str, bool]], filters: List[Filter],
+          limit: Optional[int], fields: Optional[List[str]]) -> List[Dict]:
+    """
+    Выполнить выборку над документами в памяти
+    
+    Как и Firestore, документы без поля из фильтра или сортировки не попадают
+    в результат. Порядок применения: фильтры, сортировка, лимит, проекция.
+    
+    Args:
+        docs: Документы (словари)
+        orders, filters, fields: Результат normalize()
+        limit: Максимальное количество документов
+    
+    Returns:
+        Список документов
+    """
+    result = [doc for doc in docs if _matches(doc, filters)]
+    
+    if orders:
+        result = [doc for doc in result if all(get_field(doc, field) is not _MISSING for field, _ in orders)]
+        # Устойчивая сортировка: сначала по последнему ключу
+        for field, descending in reversed(orders):
+            result.sort(key=lambda doc: get_field(doc, field), reverse=descending)
+    
+    if limit is not None:
+        result = result[:limit]
+    
+    if fields is not None:
+        result = [project(doc, fields) for doc in result]
+    
+    return result
+
+
+def _matches(doc: Dict, filters: List[Filter]) -> bool:
+    """Удовлетворяет ли документ всем фильтрам"""
+    for field, op, expected in filters:
+        value = get_field(doc, field)
+        if value is _MISSING:
+            return False
+        try:
+            if not _OPERATORS[op](value, expected):
+                return False
+        except TypeError:
+            # Несравнимые типы Firestore тоже не считает совпадением
+            return False
+    return True
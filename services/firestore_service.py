@@ -4,32 +4,198 @@ Firestore Service для Smart Care
 """
 
 import os
+import copy
 import json
+import time
+import asyncio
+import hashlib
 import logging
-from typing import Dict, Any, Optional
-from functools import lru_cache
+import tempfile
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Sequence, Union
+from functools import partial
 import firebase_admin
 from firebase_admin import credentials, firestore
+from google.cloud import firestore as cloud_firestore
+from google.api_core.retry import Retry
+from google.api_core.retry_async import AsyncRetry
+from google.cloud.firestore_v1.base_query import FieldFilter
 from flask import current_app
+from services import firestore_query
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.ttl_cache import BackoffError, NegativeCache, TTLCache
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class BatchWriter:
+    """
+    Пакетная запись документов (WriteBatch) с автоматическим разбиением
+    
+    Операции копятся в WriteBatch и отправляются одним commit по MAX_BATCH_SIZE штук.
+    При выходе из контекста отправляется остаток, а кэши сбрасываются и подписчики
+    уведомляются один раз на коллекцию, а не на каждый документ.
+    
+    Пример:
+        with firestore_service.batch() as batch:
+            batch.set('translations', 'ru_hero', data)
+            batch.delete('translations', 'ru_old')
+    """
+    
+    # Лимит операций в одном commit Firestore
+    MAX_BATCH_SIZE = 500
+    
+    def __init__(self, service: 'FirestoreService'):
+        self._service = service
+        self._batch = None
+        self._pending = []
+        self._changed = {}
+        self.commits = 0
+        self.written = 0
+    
+    def set(self, collection: str, document_id: str, data: Dict, merge: bool = False):
+        """Записать документ (merge=True - обновить только переданные поля)"""
+        ref = self._service.db.collection(collection).document(document_id)
+        self._current().set(ref, data, merge=merge)
+        self._added(collection, document_id)
+    
+    def delete(self, collection: str, document_id: str):
+        """Удалить документ"""
+        ref = self._service.db.collection(collection).document(document_id)
+        self._current().delete(ref)
+        self._added(collection, document_id)
+    
+    def flush(self):
+        """Отправить накопленные операции одним commit"""
+        if self._batch is None:
+            return
+        
+        batch, pending = self._batch, self._pending
+        self._batch, self._pending = None, []
+        batch.commit()
+        
+        self.commits += 1
+        self.written += len(pending)
+        for collection, document_id in pending:
+            self._changed.setdefault(collection, []).append(document_id)
+    
+    def __enter__(self) -> 'BatchWriter':
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            # Уведомляем и о частично отправленных пакетах, если что-то упало
+            for collection, document_ids in self._changed.items():
+                self._service._notify_change(collection, document_ids)
+            if self._changed:
+                self._service._notify_write(self._changed)
+            self._changed = {}
+        return False
+    
+    def _current(self):
+        """Текущий WriteBatch (создаётся при первой операции)"""
+        if self._batch is None:
+            self._batch = self._service.db.batch()
+        return self._batch
+    
+    def _added(self, collection: str, document_id: str):
+        """Учесть операцию; при достижении лимита отправить пакет"""
+        self._pending.append((collection, document_id))
+        if len(self._pending) >= self.MAX_BATCH_SIZE:
+            self.flush()
+
+
 class FirestoreService:
     """Сервис для работы с Firebase Firestore"""
     
     _instance = None
     _db = None
     _initialized = False
+    # Создание нового клиента после fork (задаётся в initialize)
+    _client_factory = None
+    # Создание AsyncClient для асинхронных чтений (задаётся в initialize)
+    _async_client_factory = None
+    
+    # Коллекции с контентом сайта (режим слушателей, снимок на диске)
+    CONTENT_COLLECTIONS = ('translations', 'team_members', 'roadmap_milestones', 'roadmap_next_steps')
+    
+    # Версия формата файла снимка контента
+    SNAPSHOT_FORMAT = 1
+    
+    # Размер страницы при постраничном чтении коллекций (iter_collection)
+    PAGE_SIZE = 500
     
     def __new__(cls):
         """Singleton pattern"""
         if cls._instance is None:
             cls._instance = super(FirestoreService, cls).__new__(cls)
+            # Материализованные копии коллекций: {коллекция: {ID документа: данные}}
+            cls._instance._materialized = {}
+            cls._instance._materialized_lock = threading.RLock()
+            cls._instance._watches = {}
+            # Коллекции, подписки на которые сняты перед fork и возобновляются в воркере
+            cls._instance._resume_watches = []
+            cls._instance._change_listeners = []
+            cls._instance._write_listeners = []
+            # Коллекции, загруженные из снимка на диске и ещё не сверенные с Firestore
+            cls._instance._snapshot_collections = set()
+            cls._instance._snapshot_info = None
+            # Фоновая сверка снимка и путь, по которому она перезаписывает снимок
+            cls._instance._reconcile_thread = None
+            cls._instance._reconcile_path = None
+            # Дедлайн чтений и предохранитель (переопределяются в configure)
+            cls._instance._timeout = 5.0
+            cls._instance._breaker = CircuitBreaker('firestore')
+            # Кэш чтений: (коллекция, ID документа или '*...' для выборок, язык) -> данные
+            cls._instance._cache = TTLCache()
+            # Отрицательные результаты: отсутствующие документы и ошибки чтения с backoff
+            cls._instance._negative = NegativeCache()
+            # Пул параллельных чтений (fan_out): создаётся при первом использовании
+            cls._instance._pool = None
+            cls._instance._pool_lock = threading.Lock()
+            cls._instance._pool_workers = 8
+            cls._instance._pool_slots = threading.BoundedSemaphore(8)
+            # Цикл событий асинхронных чтений (поток firestore-aio) и его AsyncClient
+            cls._instance._aio_loop = None
+            cls._instance._aio_thread = None
+            cls._instance._aio_client = None
+            cls._instance._aio_lock = threading.Lock()
         return cls._instance
     
+    def configure(self, config: Dict[str, Any]):
+        """
+        Применить настройки из конфигурации приложения
+        
+        Args:
+            config: app.config или словарь с ключами FIRESTORE_*
+        """
+        self._timeout = config.get('FIRESTORE_TIMEOUT', self._timeout)
+        self._breaker = CircuitBreaker(
+            'firestore',
+            failure_threshold=config.get('FIRESTORE_BREAKER_FAILURES', 5),
+            slow_call_duration=config.get('FIRESTORE_BREAKER_SLOW_CALL', 2.0),
+            reset_timeout=config.get('FIRESTORE_BREAKER_RESET_TIMEOUT', 30.0),
+            max_reset_timeout=config.get('FIRESTORE_BREAKER_MAX_RESET_TIMEOUT', 300.0)
+        )
+        self._cache = TTLCache(
+            ttl=config.get('FIRESTORE_CACHE_TTL', 300),
+            max_bytes=config.get('FIRESTORE_CACHE_MAX_BYTES', 8 * 1024 * 1024)
+        )
+        self._negative = NegativeCache(
+            missing_ttl=config.get('FIRESTORE_NEGATIVE_TTL', 30),
+            base_backoff=config.get('FIRESTORE_BACKOFF_BASE', 1.0),
+            max_backoff=config.get('FIRESTORE_BACKOFF_MAX', 60.0)
+        )
+        self._pool_workers = config.get('FIRESTORE_FAN_OUT_WORKERS', self._pool_workers)
+        self._reset_pool()
+    
     def initialize(self, credentials_path: str = None):
         """
         Инициализация Firebase Admin SDK
@@ -60,6 +226,8 @@ class FirestoreService:
             
             # Получение клиента Firestore
             self._db = firestore.client()
+            self._client_factory = self._new_client
+            self._async_client_factory = self._new_async_client
             self._initialized = True
             
             logger.info("✓ Firebase Firestore успешно инициализирован")
@@ -68,6 +236,79 @@ class FirestoreService:
             logger.error(f"Ошибка инициализации Firebase: {e}")
             logger.warning("Приложение будет работать без Firebase")
     
+    def _new_client(self):
+        """Новый клиент Firestore (firestore.client() возвращает закэшированный в приложении Firebase)"""
+        app = firebase_admin.get_app()
+        return cloud_firestore.Client(credentials=app.credential.get_credential(), project=app.project_id)
+    
+    def _new_async_client(self):
+        """Новый AsyncClient (создаётся в потоке цикла firestore-aio)"""
+        app = firebase_admin.get_app()
+        return cloud_firestore.AsyncClient(credentials=app.credential.get_credential(), project=app.project_id)
+    
+    def release_client(self):
+        """
+        Закрыть клиент Firestore в мастере gunicorn перед fork воркеров (--preload)
+        
+        gRPC-каналы, открытые до fork, в дочернем процессе непригодны. Подписки
+        слушателей снимаются, а кэши и материализованные копии остаются - воркеры
+        получают их copy-on-write. Вызов повторяется перед каждым fork и идемпотентен.
+        
+        Идущая в фоне сверка снимка дожидается завершения: без клиента она бы
+        упала, и воркеры навсегда остались бы со снимком с диска.
+        """
+        reconcile = self._reconcile_thread
+        if reconcile is not None and reconcile is not threading.current_thread():
+            # Чтения сверки ограничены дедлайном FIRESTORE_TIMEOUT
+            reconcile.join()
+        
+        if self._watches:
+            self._resume_watches = list(self._watches)
+            for collection, watch in list(self._watches.items()):
+                try:
+                    watch.unsubscribe()
+                except Exception as e:
+                    logger.warning(f"Ошибка отписки от коллекции {collection}: {e}")
+            self._watches.clear()
+        
+        if self._db is not None and self._client_factory is not None:
+            try:
+                self._db.close()
+            except Exception as e:
+                logger.warning(f"Ошибка закрытия клиента Firestore: {e}")
+            self._db = None
+    
+        # Потоки пула и цикл асинхронных чтений не переживают fork: воркер создаст свои
+        self._reset_pool()
+        self._stop_aio()
+    
+    def reset_client(self) -> bool:
+        """
+        Создать клиент Firestore в воркере после fork, возобновить подписки слушателей
+        и сверку снимка, если в мастере она не завершилась
+        
+        Returns:
+            True если клиент создан
+        """
+        if self._client_factory is None:
+            return False
+        
+        self._reset_pool()
+        # Поток цикла остался в мастере: начинаем с чистого состояния
+        self._aio_loop = self._aio_thread = self._aio_client = None
+        try:
+            self._db = self._client_factory()
+        except Exception as e:
+            logger.error(f"Ошибка создания клиента Firestore после fork: {e}")
+            return False
+        
+        if self._resume_watches:
+            self.start_listeners(self._resume_watches)
+        if self._snapshot_collections:
+            self.reconcile_snapshot_async(self._reconcile_path)
+        logger.info(f"✓ Клиент Firestore создан в воркере {os.getpid()}")
+        return True
+    
     @property
     def db(self):
         """Получить клиент Firestore"""
@@ -78,7 +319,114 @@ class FirestoreService:
         """Проверить доступность Firestore"""
         return self._initialized and self._db is not None
     
-    @lru_cache(maxsize=128)
+    @property
+    def has_content(self) -> bool:
+        """Можно ли читать контент: Firestore доступен или загружен снимок с диска"""
+        return self.is_available or bool(self._materialized)
+    
+    def breaker_stats(self) -> Dict[str, Any]:
+        """Состояние предохранителя чтений и дедлайн для /api/health"""
+        return dict(self._breaker.stats(), timeout=self._timeout)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Счётчики кэша чтений (hits, misses, evictions, объём) для /api/health"""
+        return dict(self._cache.stats(), negative=self._negative.stats())
+    
+    def _check_negative(self, key, strict: bool) -> bool:
+        """
+        Пропустить чтение по отрицательной записи
+        
+        Returns:
+            True если документа нет или ключ в backoff после ошибки
+        
+        Raises:
+            BackoffError: если strict и ключ в backoff
+        """
+        negative = self._negative.check(key)
+        if negative == NegativeCache.FAILED and strict:
+            raise BackoffError(f"{key[0]}/{key[1]}: повтор чтения после ошибки отложен")
+        return negative is not None
+    
+    def _read_failed(self, key):
+        """Включить backoff для ключа после ошибки чтения"""
+        backoff = self._negative.mark_failed(key)
+        logger.warning(f"Повтор чтения {key[0]}/{key[1]} не раньше чем через {backoff:.0f} сек")
+    
+    def fan_out(self, *calls: Callable[[], Any]) -> List[Any]:
+        """
+        Выполнить независимые чтения параллельно: время - максимум из вызовов, а не сумма
+        
+        Вызовы выполняются в общем пуле из FIRESTORE_FAN_OUT_WORKERS потоков. Вызов
+        отдаётся в пул, только если в нём есть свободный поток, иначе выполняется в
+        вызывающем потоке: задачи не ждут в очереди, поэтому вложенный fan_out
+        (загрузчик внутри fan_out) не может занять весь пул ожиданием.
+        
+        Args:
+            calls: Функции без аргументов (functools.partial для чтений с параметрами)
+        
+        Returns:
+            Результаты в порядке вызовов
+        
+        Raises:
+            Исключение первого по порядку неудачного вызова (после завершения остальных)
+        """
+        futures = []
+        inline = []
+        for index, call in enumerate(calls):
+            # Слот освобождается в том же семафоре, даже если _reset_pool успеет его заменить
+            slots = self._pool_slots
+            # Первый вызов всегда выполняет сам вызывающий поток - он всё равно ждёт
+            if index and slots.acquire(blocking=False):
+                # Контекст (в т.ч. контекст приложения Flask) переносится в поток пула
+                context = contextvars.copy_context()
+                try:
+                    futures.append((index, self._get_pool().submit(context.run, self._pool_task, slots, call)))
+                    continue
+                except RuntimeError as e:
+                    # Пул остановлен (_reset_pool из другого потока) - вызов выполняется здесь
+                    slots.release()
+                    logger.warning(f"Пул fan_out недоступен, вызов в текущем потоке: {e}")
+            inline.append((index, call))
+        
+        results = [None] * len(calls)
+        errors = []
+        for index, call in inline:
+            try:
+                results[index] = call()
+            except Exception as e:
+                errors.append((index, e))
+        for index, future in futures:
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                errors.append((index, e))
+        
+        if errors:
+            raise min(errors, key=lambda error: error[0])[1]
+        return results
+    
+    def _pool_task(self, slots: threading.Semaphore, call: Callable[[], Any]) -> Any:
+        """Вызов в потоке пула; слот (семафор, захваченный в fan_out) освобождается для следующего fan_out"""
+        try:
+            return call()
+        finally:
+            slots.release()
+    
+    def _get_pool(self) -> ThreadPoolExecutor:
+        """Пул потоков fan_out (создаётся при первом параллельном чтении)"""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._pool_workers, thread_name_prefix='firestore-fan-out')
+            return self._pool
+    
+    def _reset_pool(self):
+        """Остановить пул и сбросить счётчик свободных потоков (после configure и fork)"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+            self._pool = None
+            self._pool_slots = threading.BoundedSemaphore(self._pool_workers) if self._pool_workers else threading.Semaphore(0)
+    
     def get_translations(self, lang: str = 'ru') -> Dict[str, Any]:
         """
         Получить все переводы для указанного языка
@@ -93,6 +441,13 @@ class FirestoreService:
             logger.warning("Firestore недоступен, используются локальные данные")
             return self._get_default_translations(lang)
         
+        key = ('translations', '*tree', lang)
+        found, translations = self._cache.get(key)
+        if found:
+            return translations
+        if self._check_negative(key, strict=False):
+            return self._get_default_translations(lang)
+        
         try:
             translations = {}
             
@@ -114,13 +469,17 @@ class FirestoreService:
                 translations.update(doc.to_dict())
             
             logger.info(f"✓ Загружены переводы для языка: {lang}")
+            self._cache.set(key, translations)
+            self._negative.forget(key)
             return translations
             
         except Exception as e:
             logger.error(f"Ошибка получения переводов из Firestore: {e}")
+            self._read_failed(key)
             return self._get_default_translations(lang)
     
-    def get_document(self, collection: str, document_id: str, lang: str = 'ru') -> Optional[Dict]:
+    def get_document(self, collection: str, document_id: str, lang: str = 'ru',
+                     strict: bool = False, cache: bool = True) -> Optional[Dict]:
         """
         Получить конкретный документ
         
@@ -128,56 +487,429 @@ class FirestoreService:
             collection: Название коллекции
             document_id: ID документа
             lang: Язык
+            strict: Пробрасывать ошибки чтения (в т.ч. CircuitOpenError и BackoffError) вместо None
+            cache: False - читать из Firestore мимо кэша чтений и снимка на диске
+                   (свежий результат сохраняется в кэш как при обычном промахе)
             
         Returns:
             Данные документа или None
         """
+        materialized = self._get_materialized(collection, cache)
+        if materialized is not None:
+            data = materialized.get(document_id)
+            return self._extract_lang_data(copy.deepcopy(data), lang) if data is not None else None
+        
         if not self.is_available:
             return None
         
+        key = (collection, document_id, lang)
+        if cache:
+            found, data = self._cache.get(key)
+            if found:
+                return data
+            # Отсутствующий документ или недавняя ошибка - без повторного чтения
+            if self._check_negative(key, strict):
+                return None
+        
         try:
             doc_ref = self._db.collection(collection).document(document_id)
-            doc = doc_ref.get()
-            
-            if doc.exists:
-                data = doc.to_dict()
-                # Если есть многоязычные поля, выбираем нужный язык
-                return self._extract_lang_data(data, lang)
-            return None
+            doc = self._breaker.call(doc_ref.get, **self._read_options())
+            return self._document_result(key, doc, lang)
             
         except Exception as e:
             logger.error(f"Ошибка получения документа {collection}/{document_id}: {e}")
+            self._read_error([key], e)
+            if strict:
+                raise
             return None
     
-    def get_collection(self, collection: str, lang: str = 'ru') -> list:
+    def get_documents(self, collection: str, document_ids: List[str], lang: str = 'ru',
+                      strict: bool = False, cache: bool = True) -> Dict[str, Dict]:
+        """
+        Получить несколько документов одним запросом (batch get)
+        
+        Args:
+            collection: Название коллекции
+            document_ids: Список ID документов
+            lang: Язык
+            strict: Пробрасывать ошибки чтения (в т.ч. BackoffError) вместо пустого результата
+            cache: False - читать из Firestore мимо кэша чтений и снимка на диске
+        
+        Returns:
+            Словарь {ID документа: данные}; отсутствующие документы пропускаются
+        """
+        materialized = self._get_materialized(collection, cache)
+        if materialized is not None:
+            return {
+                document_id: self._extract_lang_data(copy.deepcopy(materialized[document_id]), lang)
+                for document_id in document_ids
+                if document_id in materialized
+            }
+        
+        if not self.is_available or not document_ids:
+            return {}
+        
+        result = {}
+        missing = []
+        for document_id in document_ids:
+            if not cache:
+                missing.append(document_id)
+                continue
+            found, data = self._cache.get((collection, document_id, lang))
+            if found:
+                result[document_id] = data
+            elif not self._check_negative((collection, document_id, lang), strict):
+                missing.append(document_id)
+        
+        if not missing:
+            return result
+        
+        try:
+            coll_ref = self._db.collection(collection)
+            refs = [coll_ref.document(document_id) for document_id in missing]
+            
+            # get_all выполняет один BatchGetDocuments вместо N отдельных get()
+            docs = self._breaker.call(lambda: list(self._db.get_all(refs, **self._read_options())))
+            return self._documents_result(collection, docs, lang, result)
+        
+        except Exception as e:
+            logger.error(f"Ошибка пакетного получения документов из {collection}: {e}")
+            self._read_error([(collection, document_id, lang) for document_id in missing], e)
+            if strict:
+                raise
+            return {}
+    
+    def get_collection(self, collection: str, lang: str = 'ru', strict: bool = False,
+                       order_by: Union[str, Sequence[str]] = None,
+                       where: Iterable[firestore_query.Filter] = None,
+                       limit: int = None, select: Iterable[str] = None, cache: bool = True) -> list:
         """
-        Получить все документы из коллекции
+        Получить документы из коллекции
+        
+        Сортировка, фильтры, лимит и проекция выполняются на стороне Firestore
+        (для материализованной копии - в памяти с той же семантикой). В путях полей
+        можно использовать {lang}: select=['{lang}'] читает только поля нужного языка.
         
         Args:
             collection: Название коллекции
             lang: Язык
+            strict: Пробрасывать ошибки чтения вместо пустого списка
+            order_by: Поле или список полей сортировки, префикс '-' - по убыванию
+            where: Фильтры [(поле, оператор, значение)], операторы Firestore ('==', '<', 'in', ...)
+            limit: Максимальное количество документов
+            select: Поля, которые нужно вернуть (проекция)
+            cache: False - читать из Firestore мимо кэша чтений и снимка на диске
             
         Returns:
             Список документов
         """
+        orders, filters, fields = firestore_query.normalize(lang, order_by, where, select)
+        
+        materialized = self._get_materialized(collection, cache)
+        if materialized is not None:
+            docs = firestore_query.apply(
+                (dict(data, id=document_id) for document_id, data in materialized.items()),
+                orders, filters, limit, fields + ['id'] if fields is not None else None
+            )
+            return [self._extract_lang_data(copy.deepcopy(data), lang) for data in docs]
+        
         if not self.is_available:
             return []
         
+        key = (collection, self._query_key(orders, filters, limit, fields), lang)
+        if cache:
+            found, result = self._cache.get(key)
+            if found:
+                return result
+            if self._check_negative(key, strict):
+                return []
+        
         try:
-            docs = self._db.collection(collection).stream()
-            result = []
-            
-            for doc in docs:
-                data = doc.to_dict()
-                data['id'] = doc.id
-                result.append(self._extract_lang_data(data, lang))
+            query = self._build_query(self._db.collection(collection), orders, filters, limit, fields)
+            docs = self._breaker.call(lambda: list(query.stream(**self._read_options())))
+            return self._collection_result(key, docs, lang)
             
+        except Exception as e:
+            logger.error(f"Ошибка получения коллекции {collection}: {e}")
+            self._read_error([key], e)
+            if strict:
+                raise
+            return []
+    
+    # Асинхронные чтения: RPC выполняются через AsyncClient в отдельном цикле событий
+    # (поток firestore-aio), кэш чтений, отрицательный кэш и предохранитель - общие
+    # с синхронным API. Без AsyncClient (фейковый клиент, скрипты) синхронное чтение
+    # выполняется в отдельном потоке, так что вызывать их можно всегда.
+    
+    async def aget_document(self, collection: str, document_id: str, lang: str = 'ru',
+                            strict: bool = False) -> Optional[Dict]:
+        """Асинхронный get_document (те же аргументы и результат)"""
+        if not self._async_reads(collection):
+            return await self._sync_read(self.get_document, collection, document_id, lang, strict)
+        
+        key = (collection, document_id, lang)
+        found, data = self._cache.get(key)
+        if found:
+            return data
+        if self._check_negative(key, strict):
+            return None
+        
+        async def read(client):
+            return await client.collection(collection).document(document_id).get(**self._async_read_options())
+        
+        try:
+            return self._document_result(key, await self._aio_call(read), lang)
+        except Exception as e:
+            logger.error(f"Ошибка получения документа {collection}/{document_id}: {e}")
+            self._read_error([key], e)
+            if strict:
+                raise
+            return None
+    
+    async def aget_documents(self, collection: str, document_ids: List[str], lang: str = 'ru',
+                             strict: bool = False) -> Dict[str, Dict]:
+        """Асинхронный get_documents (те же аргументы и результат)"""
+        if not self._async_reads(collection) or not document_ids:
+            return await self._sync_read(self.get_documents, collection, document_ids, lang, strict)
+        
+        result = {}
+        missing = []
+        for document_id in document_ids:
+            found, data = self._cache.get((collection, document_id, lang))
+            if found:
+                result[document_id] = data
+            elif not self._check_negative((collection, document_id, lang), strict):
+                missing.append(document_id)
+        
+        if not missing:
             return result
-            
+        
+        async def read(client):
+            coll_ref = client.collection(collection)
+            refs = [coll_ref.document(document_id) for document_id in missing]
+            return [doc async for doc in client.get_all(refs, **self._async_read_options())]
+        
+        try:
+            return self._documents_result(collection, await self._aio_call(read), lang, result)
+        except Exception as e:
+            logger.error(f"Ошибка пакетного получения документов из {collection}: {e}")
+            self._read_error([(collection, document_id, lang) for document_id in missing], e)
+            if strict:
+                raise
+            return {}
+    
+    async def aget_collection(self, collection: str, lang: str = 'ru', strict: bool = False,
+                              order_by: Union[str, Sequence[str]] = None,
+                              where: Iterable[firestore_query.Filter] = None,
+                              limit: int = None, select: Iterable[str] = None) -> list:
+        """Асинхронный get_collection (те же аргументы и результат)"""
+        if not self._async_reads(collection):
+            return await self._sync_read(self.get_collection, collection, lang, strict, order_by, where, limit, select)
+        
+        orders, filters, fields = firestore_query.normalize(lang, order_by, where, select)
+        key = (collection, self._query_key(orders, filters, limit, fields), lang)
+        found, result = self._cache.get(key)
+        if found:
+            return result
+        if self._check_negative(key, strict):
+            return []
+        
+        async def read(client):
+            query = self._build_query(client.collection(collection), orders, filters, limit, fields)
+            return [doc async for doc in query.stream(**self._async_read_options())]
+        
+        try:
+            return self._collection_result(key, await self._aio_call(read), lang)
         except Exception as e:
             logger.error(f"Ошибка получения коллекции {collection}: {e}")
+            self._read_error([key], e)
+            if strict:
+                raise
             return []
     
+    def _async_reads(self, collection: str) -> bool:
+        """Читать коллекцию через AsyncClient (нет материализованной копии, клиент доступен)"""
+        return (self.is_available and self._async_client_factory is not None
+                and self._get_materialized(collection) is None)
+    
+    async def _sync_read(self, method: Callable[..., Any], collection: str, *args) -> Any:
+        """Синхронное чтение из async-кода: без сетевого запроса - сразу, иначе в отдельном потоке"""
+        if self._get_materialized(collection) is not None or not self.is_available:
+            return method(collection, *args)
+        return await asyncio.to_thread(method, collection, *args)
+    
+    async def _aio_call(self, read: Callable[[Any], Any]) -> Any:
+        """
+        Выполнить read(client) в цикле firestore-aio через предохранитель
+        
+        AsyncClient (gRPC-канал) привязан к циклу, в котором создан, а async view
+        во Flask получает новый цикл на каждый запрос. Поэтому все асинхронные
+        чтения процесса идут через один долгоживущий цикл и один клиент.
+        """
+        future = asyncio.run_coroutine_threadsafe(self._breaker.call_async(self._aio_run, read), self._get_aio_loop())
+        return await asyncio.wrap_future(future)
+    
+    async def _aio_run(self, read: Callable[[Any], Any]) -> Any:
+        """Выполняется в цикле firestore-aio: AsyncClient создаётся при первом чтении"""
+        if self._aio_client is None:
+            self._aio_client = self._async_client_factory()
+        return await read(self._aio_client)
+    
+    def _get_aio_loop(self) -> asyncio.AbstractEventLoop:
+        """Цикл событий асинхронных чтений (поток firestore-aio запускается при первом чтении)"""
+        with self._aio_lock:
+            if self._aio_loop is None:
+                loop = asyncio.new_event_loop()
+                self._aio_thread = threading.Thread(target=loop.run_forever, name='firestore-aio', daemon=True)
+                self._aio_thread.start()
+                self._aio_loop = loop
+            return self._aio_loop
+    
+    def _stop_aio(self):
+        """Закрыть AsyncClient и цикл асинхронных чтений (создадутся заново при следующем чтении)"""
+        with self._aio_lock:
+            loop, thread, client = self._aio_loop, self._aio_thread, self._aio_client
+            self._aio_loop = self._aio_thread = self._aio_client = None
+        
+        if loop is None:
+            return
+        
+        if client is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(self._aio_close(client), loop).result(timeout=5)
+            except Exception as e:
+                logger.warning(f"Ошибка закрытия AsyncClient: {e}")
+        
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        if not thread.is_alive():
+            loop.close()
+    
+    @staticmethod
+    async def _aio_close(client):
+        """Выполняется в цикле firestore-aio: закрыть HTTP-сессию и gRPC-канал клиента"""
+        client.close()
+        # Async-транспорт закрывает канал корутиной, которую Client.close() не ждёт
+        api = getattr(client, '_firestore_api_internal', None)
+        if api is not None:
+            await api.transport.close()
+    
+    def _async_read_options(self) -> Dict[str, Any]:
+        """Дедлайн для асинхронного чтения (как _read_options)"""
+        return {'timeout': self._timeout, 'retry': AsyncRetry(timeout=self._timeout)}
+    
+    def _document_result(self, key, doc, lang: str) -> Optional[Dict]:
+        """Снимок документа: данные на нужном языке в кэш или отметка об отсутствии"""
+        if not doc.exists:
+            self._negative.mark_missing(key)
+            return None
+        
+        # Если есть многоязычные поля, выбираем нужный язык
+        data = self._extract_lang_data(doc.to_dict(), lang)
+        self._cache.set(key, data)
+        self._negative.forget(key)
+        return data
+    
+    def _documents_result(self, collection: str, docs, lang: str, result: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Снимки пакетного чтения: добавить существующие документы к result"""
+        for doc in docs:
+            data = self._document_result((collection, doc.id, lang), doc, lang)
+            if data is not None:
+                result[doc.id] = data
+        return result
+    
+    def _collection_result(self, key, docs, lang: str) -> list:
+        """Снимки выборки: документы на нужном языке с полем id, результат в кэш"""
+        result = []
+        for doc in docs:
+            data = doc.to_dict()
+            data['id'] = doc.id
+            result.append(self._extract_lang_data(data, lang))
+        
+        self._cache.set(key, result)
+        self._negative.forget(key)
+        return result
+    
+    def _read_error(self, keys: Iterable, error: Exception):
+        """Backoff для ключей неудачного чтения"""
+        # Отказ предохранителя - не чтение, backoff задаёт сам предохранитель
+        if not isinstance(error, CircuitOpenError):
+            for key in keys:
+                self._read_failed(key)
+    
+    def iter_collection(self, collection: str, lang: Optional[str] = 'ru', page_size: int = None,
+                        start_after: str = None) -> Iterator[Dict]:
+        """
+        Постранично перебрать документы коллекции в порядке ID
+        
+        Документы читаются страницами по page_size через курсор (start_after
+        последнего ID) и отдаются по одному, поэтому в памяти держится не больше
+        одной страницы независимо от размера коллекции. Каждая страница - отдельное
+        чтение со своим дедлайном через предохранитель; ошибки пробрасываются.
+        
+        Args:
+            collection: Название коллекции
+            lang: Язык; None - документы как есть (все языки)
+            page_size: Размер страницы (по умолчанию PAGE_SIZE)
+            start_after: ID документа, после которого начать (продолжение перебора)
+        
+        Yields:
+            Данные документа с ключом 'id'
+        """
+        materialized = self._get_materialized(collection)
+        if materialized is not None:
+            docs = (
+                (document_id, materialized[document_id]) for document_id in sorted(materialized)
+                if start_after is None or document_id > start_after
+            )
+        elif self.is_available:
+            docs = self._iter_firestore(collection, page_size or self.PAGE_SIZE, start_after)
+        else:
+            return
+        
+        for document_id, data in docs:
+            data = dict(copy.deepcopy(data), id=document_id)
+            yield data if lang is None else self._extract_lang_data(data, lang)
+    
+    def _iter_firestore(self, collection: str, page_size: int, start_after: str = None) -> Iterator[tuple]:
+        """Постраничное чтение из Firestore: (ID документа, данные)"""
+        # '__name__' - сортировка по ID документа, курсор задаётся строковым ID
+        query = self._db.collection(collection).order_by('__name__').limit(page_size)
+        cursor = start_after
+        
+        while True:
+            page = query.start_after({'__name__': cursor}) if cursor is not None else query
+            try:
+                docs = self._breaker.call(lambda: list(page.stream(**self._read_options())))
+            except Exception as e:
+                logger.error(f"Ошибка постраничного чтения {collection} после {cursor}: {e}")
+                raise
+            
+            for doc in docs:
+                yield doc.id, doc.to_dict()
+            
+            if len(docs) < page_size:
+                return
+            cursor = docs[-1].id
+    
+    def _build_query(self, query, orders, filters, limit, fields):
+        """Применить к запросу Firestore параметры из firestore_query.normalize()"""
+        for field, op, value in filters:
+            query = query.where(filter=FieldFilter(field, op, value))
+        for field, descending in orders:
+            query = query.order_by(field, direction=firestore.Query.DESCENDING if descending else firestore.Query.ASCENDING)
+        if limit is not None:
+            query = query.limit(limit)
+        if fields is not None:
+            query = query.select(fields)
+        return query
+    
+    def _query_key(self, orders, filters, limit, fields) -> str:
+        """Идентификатор выборки в ключе кэша: '*' для всей коллекции, '*{...}' для запроса"""
+        if not (orders or filters or limit is not None or fields is not None):
+            return '*'
+        return '*' + json.dumps([orders, filters, limit, fields], ensure_ascii=False, sort_keys=True, default=str)
+    
     def _extract_lang_data(self, data: Dict, lang: str) -> Dict:
         """
         Извлечь данные для конкретного языка из многоязычных полей
@@ -191,7 +923,8 @@ class FirestoreService:
         """
         # Проверяем, есть ли в данных ключи 'ru' и 'en' на верхнем уровне
         # Это означает структуру типа: {id: '...', ru: {...}, en: {...}}
-        if 'ru' in data and 'en' in data:
+        # Проекция select=['{lang}'] оставляет только ключ нужного языка
+        if ('ru' in data and 'en' in data) or (set(data) - {'id'} == {lang} and isinstance(data[lang], dict)):
             # Извлекаем данные для нужного языка
             lang_data = data.get(lang, data.get('ru', {}))
             
@@ -256,7 +989,8 @@ class FirestoreService:
             doc_ref.set(data, merge=True)
             
             # Очищаем кэш после обновления
-            self.get_translations.cache_clear()
+            self._notify_change(collection, [document_id])
+            self._notify_write({collection: [document_id]})
             
             logger.info(f"✓ Документ {collection}/{document_id} обновлен")
             return True
@@ -285,7 +1019,8 @@ class FirestoreService:
             doc_ref.set(data)
             
             # Очищаем кэш
-            self.get_translations.cache_clear()
+            self._notify_change(collection, [document_id])
+            self._notify_write({collection: [document_id]})
             
             logger.info(f"✓ Документ {collection}/{document_id} создан")
             return True
@@ -313,7 +1048,8 @@ class FirestoreService:
             doc_ref.delete()
             
             # Очищаем кэш
-            self.get_translations.cache_clear()
+            self._notify_change(collection, [document_id])
+            self._notify_write({collection: [document_id]})
             
             logger.info(f"✓ Документ {collection}/{document_id} удален")
             return True
@@ -322,10 +1058,353 @@ class FirestoreService:
             logger.error(f"Ошибка удаления документа: {e}")
             return False
     
-    def clear_cache(self):
-        """Очистить кэш переводов"""
-        self.get_translations.cache_clear()
-        logger.info("✓ Кэш переводов очищен")
+    def batch(self) -> BatchWriter:
+        """
+        Пакетная запись: with firestore_service.batch() as batch: batch.set(...)
+        
+        Raises:
+            RuntimeError: если Firestore недоступен
+        """
+        if not self.is_available:
+            raise RuntimeError("Firestore недоступен")
+        return BatchWriter(self)
+    
+    def clear_cache(self, collection: str = None):
+        """Очистить кэш чтений Firestore (collection - только записи одной коллекции)"""
+        if collection is not None:
+            self._cache.invalidate(collection)
+            self._negative.invalidate(collection)
+            return
+        
+        self._cache.clear()
+        self._negative.clear()
+        logger.info("✓ Кэш чтений Firestore очищен")
+    
+    @property
+    def listeners_active(self) -> bool:
+        """Работает ли режим слушателей (snapshot listeners)"""
+        return bool(self._watches)
+    
+    def add_change_listener(self, callback: Callable[[str, Optional[str]], None]):
+        """
+        Подписаться на изменения контента: записи через этот сервис
+        и события слушателей Firestore
+        
+        Args:
+            callback: Функция callback(collection, lang); lang=None означает все языки
+        """
+        self._change_listeners.append(callback)
+    
+    def add_write_listener(self, callback: Callable[[Dict[str, List[str]]], None]):
+        """
+        Подписаться на записи через этот сервис (update/create/delete_document, batch);
+        в отличие от add_change_listener, события слушателей Firestore сюда не приходят
+        
+        Args:
+            callback: Функция callback(changes), changes - {коллекция: [ID документов]}
+        """
+        self._write_listeners.append(callback)
+    
+    def start_listeners(self, collections: Iterable[str] = None) -> bool:
+        """
+        Включить режим слушателей: подписаться на коллекции через on_snapshot
+        и держать их материализованную копию в памяти. Пока копия есть,
+        get_document/get_documents/get_collection отдают данные из неё без чтений Firestore.
+        
+        Args:
+            collections: Коллекции для подписки (по умолчанию CONTENT_COLLECTIONS)
+        
+        Returns:
+            True если хотя бы одна подписка активна
+        """
+        if not self.is_available:
+            return False
+        
+        for collection in collections or self.CONTENT_COLLECTIONS:
+            if collection in self._watches:
+                continue
+            
+            try:
+                self._watches[collection] = self._db.collection(collection).on_snapshot(
+                    partial(self._on_snapshot, collection)
+                )
+                logger.info(f"✓ Слушатель коллекции {collection} запущен")
+            except Exception as e:
+                logger.error(f"Ошибка подписки на коллекцию {collection}: {e}")
+        
+        return self.listeners_active
+    
+    def stop_listeners(self):
+        """Отписаться от всех коллекций и сбросить материализованные копии"""
+        for collection, watch in list(self._watches.items()):
+            try:
+                watch.unsubscribe()
+            except Exception as e:
+                logger.warning(f"Ошибка отписки от коллекции {collection}: {e}")
+        
+        self._watches.clear()
+        with self._materialized_lock:
+            self._materialized.clear()
+            self._snapshot_collections.clear()
+    
+    @property
+    def snapshot_info(self) -> Optional[Dict[str, Any]]:
+        """Сведения о загруженном снимке контента (версия, время создания, состояние сверки)"""
+        return self._snapshot_info
+    
+    def save_snapshot(self, path: str, collections: Iterable[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Сохранить снимок контентных коллекций на диск
+        
+        Снимок хранит документы как есть (все языки), чтобы при загрузке
+        отдавать их через те же get_document/get_collection.
+        
+        Args:
+            path: Путь к JSON файлу снимка
+            collections: Коллекции (по умолчанию CONTENT_COLLECTIONS)
+        
+        Returns:
+            Заголовок снимка (format, version, created_at) или None при ошибке
+        """
+        if not self.is_available:
+            logger.error("Firestore недоступен, снимок не создан")
+            return None
+        
+        try:
+            data = {
+                collection: self._read_collection_raw(collection)
+                for collection in collections or self.CONTENT_COLLECTIONS
+            }
+            return self._write_snapshot(path, data)
+        
+        except Exception as e:
+            logger.error(f"Ошибка создания снимка контента: {e}")
+            return None
+    
+    def load_snapshot(self, path: str) -> bool:
+        """
+        Загрузить снимок контента с диска в материализованные копии коллекций
+        
+        Пока коллекция не сверена с Firestore (reconcile_snapshot) или не получено
+        первое событие слушателя, чтения отдаются из снимка без обращения к Firestore.
+        
+        Args:
+            path: Путь к JSON файлу снимка
+        
+        Returns:
+            True если снимок загружен
+        """
+        if not path or not os.path.exists(path):
+            return False
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            
+            if snapshot.get('format') != self.SNAPSHOT_FORMAT:
+                logger.warning(f"Снимок {path} имеет неподдерживаемый формат {snapshot.get('format')}, пропущен")
+                return False
+            
+            with self._materialized_lock:
+                for collection, docs in snapshot['collections'].items():
+                    # Копия от слушателя свежее снимка
+                    if collection in self._watches:
+                        continue
+                    self._materialized[collection] = docs
+                    self._snapshot_collections.add(collection)
+            
+            self._snapshot_info = {
+                'version': snapshot['version'],
+                'created_at': snapshot['created_at'],
+                'reconciled': False
+            }
+            logger.info(f"✓ Загружен снимок контента {snapshot['version']} от {snapshot['created_at']}")
+            return True
+        
+        except Exception as e:
+            logger.error(f"Ошибка загрузки снимка {path}: {e}")
+            return False
+    
+    def reconcile_snapshot(self, path: str = None) -> bool:
+        """
+        Сверить загруженный снимок с Firestore
+        
+        Перечитывает коллекции из снимка, уведомляет подписчиков об отличающихся
+        документах и перестаёт отдавать данные из снимка. Если указан path,
+        снимок на диске перезаписывается свежими данными.
+        
+        Returns:
+            True если сверка выполнена
+        """
+        if not self.is_available or not self._snapshot_collections:
+            return False
+        
+        try:
+            started = time.time()
+            fresh = {}
+            
+            for collection in list(self._snapshot_collections):
+                fresh[collection] = self._read_collection_raw(collection)
+            
+            changes = {}
+            with self._materialized_lock:
+                for collection, docs in fresh.items():
+                    # Пока шло чтение, коллекцию мог подхватить слушатель
+                    if collection not in self._snapshot_collections:
+                        continue
+                    
+                    current = self._materialized.pop(collection, {})
+                    self._snapshot_collections.discard(collection)
+                    changes[collection] = [
+                        doc_id for doc_id in set(current) | set(docs)
+                        if current.get(doc_id) != docs.get(doc_id)
+                    ]
+            
+            for collection, doc_ids in changes.items():
+                self._notify_change(collection, doc_ids)
+            
+            if self._snapshot_info is not None:
+                self._snapshot_info['reconciled'] = True
+            
+            changed = sum(len(doc_ids) for doc_ids in changes.values())
+            logger.info(f"✓ Снимок сверен с Firestore за {time.time() - started:.2f} сек, изменено документов: {changed}")
+            
+            if path:
+                self._write_snapshot(path, fresh)
+            return True
+        
+        except Exception as e:
+            logger.error(f"Ошибка сверки снимка с Firestore: {e}")
+            return False
+    
+    def reconcile_snapshot_async(self, path: str = None) -> threading.Thread:
+        """Запустить reconcile_snapshot в фоновом потоке"""
+        thread = threading.Thread(target=self.reconcile_snapshot, args=(path,), name='snapshot-reconcile', daemon=True)
+        self._reconcile_thread, self._reconcile_path = thread, path
+        thread.start()
+        return thread
+    
+    def _read_collection_raw(self, collection: str) -> Dict[str, Dict]:
+        """Прочитать коллекцию из Firestore постранично без извлечения языка: {ID документа: данные}"""
+        return dict(self._iter_firestore(collection, self.PAGE_SIZE))
+    
+    def _read_options(self) -> Dict[str, Any]:
+        """
+        Дедлайн для чтения: timeout ограничивает один RPC, Retry - все повторы вместе,
+        так что вызов не занимает поток дольше FIRESTORE_TIMEOUT
+        """
+        return {'timeout': self._timeout, 'retry': Retry(timeout=self._timeout)}
+    
+    def _write_snapshot(self, path: str, collections: Dict[str, Dict[str, Dict]]) -> Dict[str, Any]:
+        """Атомарно записать снимок (временный файл + rename)"""
+        payload = json.dumps(collections, ensure_ascii=False, sort_keys=True, default=str)
+        header = {
+            'format': self.SNAPSHOT_FORMAT,
+            'version': hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12],
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        }
+        
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # Свой временный файл у каждого процесса: воркеры после fork сверяют снимок одновременно
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(dict(header, collections=collections), f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        
+        logger.info(f"✓ Снимок контента {header['version']} сохранён: {path}")
+        return header
+    
+    def _get_materialized(self, collection: str, cache: bool = True) -> Optional[Dict[str, Dict]]:
+        """Материализованная копия коллекции или None, если её нет (cache=False - только от слушателей)"""
+        if not cache and collection in self._snapshot_collections:
+            # Копия из снимка на диске могла устареть
+            return None
+        # Словарь коллекции заменяется целиком (copy-on-write), поэтому читать его можно без блокировки
+        return self._materialized.get(collection)
+    
+    def _on_snapshot(self, collection: str, docs, changes, read_time):
+        """
+        Обработать событие слушателя (вызывается из потока Firestore)
+        
+        Args:
+            collection: Название коллекции
+            docs: Все документы коллекции
+            changes: Изменения с прошлого события
+            read_time: Время чтения
+        """
+        try:
+            with self._materialized_lock:
+                current = self._materialized.get(collection)
+                
+                if current is None or collection in self._snapshot_collections:
+                    # Первое событие содержит всю коллекцию целиком и заменяет копию из снимка
+                    updated = {doc.id: doc.to_dict() for doc in docs}
+                    changed_ids = list(updated) + [doc_id for doc_id in current or {} if doc_id not in updated]
+                    self._snapshot_collections.discard(collection)
+                else:
+                    updated = dict(current)
+                    changed_ids = []
+                    for change in changes:
+                        doc = change.document
+                        if change.type.name == 'REMOVED':
+                            updated.pop(doc.id, None)
+                        else:
+                            updated[doc.id] = doc.to_dict()
+                        changed_ids.append(doc.id)
+                
+                self._materialized[collection] = updated
+            
+            logger.info(f"✓ Коллекция {collection} обновлена слушателем ({len(changed_ids)} изм.)")
+            self._notify_change(collection, changed_ids)
+        
+        except Exception as e:
+            logger.error(f"Ошибка обработки изменений коллекции {collection}: {e}")
+    
+    def _notify_change(self, collection: str, document_ids: Iterable[str]):
+        """Сбросить кэш чтений по изменённым документам и уведомить подписчиков"""
+        document_ids = list(document_ids)
+        if not document_ids:
+            return
+        
+        for document_id in document_ids:
+            self._cache.invalidate(collection, document_id)
+            self._negative.invalidate(collection, document_id)
+        
+        for lang in self._langs_for_documents(collection, document_ids):
+            for callback in self._change_listeners:
+                try:
+                    callback(collection, lang)
+                except Exception as e:
+                    logger.error(f"Ошибка обработчика изменений {collection}: {e}")
+    
+    def _notify_write(self, changes: Dict[str, List[str]]):
+        """Уведомить подписчиков о записи через сервис (один вызов на операцию или пакет)"""
+        for callback in self._write_listeners:
+            try:
+                callback(changes)
+            except Exception as e:
+                logger.error(f"Ошибка обработчика записи: {e}")
+    
+    def _langs_for_documents(self, collection: str, document_ids: Iterable[str]) -> set:
+        """
+        Определить языки, затронутые изменением документов
+        
+        Документы translations называются {lang}_{section}; остальные коллекции
+        хранят все языки в одном документе и затрагивают все языки (None).
+        """
+        if collection != 'translations':
+            return {None}
+        
+        langs = set()
+        for document_id in document_ids:
+            prefix, separator, _ = document_id.partition('_')
+            langs.add(prefix if separator else None)
+        return langs
 
 
 # Глобальный экземпляр сервиса
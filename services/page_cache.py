@@ -0,0 +1,79 @@
+"""
+Кэш отрендеренных страниц для Smart Care
+HTML главной страницы зависит только от языка, содержимого и шаблонов,
+поэтому повторный запрос с тем же ключом не рендерит Jinja заново.
+"""
+
+import os
+import logging
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+
+class PageCache:
+    """
+    LRU кэш готового HTML в памяти процесса
+    
+    Ключ составляет вызывающий код: (язык, отпечаток контента, версия шаблонов).
+    При изменении контента или шаблона ключ меняется сам, старые записи
+    вытесняются по LRU или сбрасываются через clear().
+    
+    Args:
+        max_entries: Максимальное количество страниц в кэше
+        enabled: False - всегда рендерить (для сравнения и отладки)
+    """
+    
+    def __init__(self, max_entries: int = 32, enabled: bool = True):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = Counter()
+    
+    def get_or_render(self, key: Hashable, render: Callable[[], str]) -> str:
+        """
+        Получить страницу из кэша или отрендерить и сохранить её
+        
+        Args:
+            key: Ключ страницы
+            render: Функция рендера без аргументов
+        """
+        if not self.enabled:
+            return render()
+        
+        with self._lock:
+            html = self._pages.get(key)
+            if html is not None:
+                self._pages.move_to_end(key)
+                self._stats['hits'] += 1
+                return html
+        
+        # Рендер вне блокировки: одновременный рендер одной страницы безопасен
+        self._stats['misses'] += 1
+        html = render()
+        
+        with self._lock:
+            self._pages[key] = html
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_entries:
+                self._pages.popitem(last=False)
+                self._stats['evictions'] += 1
+        return html
+    
+    def clear(self):
+        """Сбросить все страницы"""
+        with self._lock:
+            self._pages.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Счётчики для /api/health"""
+        return dict(self._stats, entries=len(self._pages), enabled=self.enabled)
+
+
+def template_version(template_folder: str, names: Iterable[str]) -> int:
+    """Версия шаблонов: время последнего изменения файлов (нс)"""
+    return max(os.stat(os.path.join(template_folder, name)).st_mtime_ns for name in names)
@@ -0,0 +1,536 @@
+"""
+Общий кэш воркеров для Smart Care (бэкенды Flask-Caching)
+
+SharedMemoryCache - таблица слотов в mmap-файле (по умолчанию в /dev/shm):
+все воркеры gunicorn на хосте читают и пишут одни и те же записи, контент
+загружается из Firestore один раз на хост, а не на каждый процесс.
+TieredCache добавляет к нему второй уровень в Redis (общий для всех хостов).
+
+    CACHE_TYPE=services.shared_cache.SharedMemoryCache
+    CACHE_TYPE=services.shared_cache.TieredCache  (+ CACHE_REDIS_URL)
+"""
+
+import os
+import time
+import fcntl
+import mmap
+import pickle
+import struct
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, NamedTuple, Optional
+
+from flask_caching.backends.base import BaseCache
+from flask_caching.backends.rediscache import RedisCache
+from werkzeug.utils import import_string
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+# Заголовок файла: метка формата, количество и размер слотов; следом - версия содержимого
+_FILE_HEADER = struct.Struct('<8sII')
+_VERSION = struct.Struct('<Q')
+_VERSION_OFFSET = _FILE_HEADER.size
+_MAGIC = b'SCCACHE1'
+_FILE_HEADER_SIZE = 64
+
+# Заголовок слота: хэш ключа (0 - пустой слот), срок (0 - бессрочно), длины ключа и значения
+_SLOT_HEADER = struct.Struct('<QdII')
+
+
+class _Shared(NamedTuple):
+    """Значение ProcessCache в общем кэше вместе со сроком: копия в L1 не переживёт L2"""
+    value: Any
+    expires: float
+
+
+def default_path(namespace: Optional[str] = None) -> str:
+    """
+    Файл кэша в памяти (/dev/shm), если есть, иначе во временном каталоге
+    
+    Args:
+        namespace: Что отличает приложение на хосте (каталог приложения): у разных
+                   копий на одном хосте - разные файлы, а не общий кэш
+    """
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    name = 'smart_care_cache'
+    if namespace:
+        name += '_' + hashlib.sha1(os.path.abspath(namespace).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(directory, name)
+
+
+class SharedMemoryCache(BaseCache):
+    """
+    Кэш в разделяемой памяти: mmap-файл из слотов фиксированного размера
+    
+    Ключ хэшируется в номер слота, коллизии разрешаются перебором нескольких
+    соседних слотов; если все заняты, вытесняется запись с ближайшим сроком.
+    Значение (pickle) вместе с ключом должно помещаться в слот, иначе не кэшируется.
+    Между процессами запись защищена блокировкой fcntl на файл (работает и для
+    воркеров, унаследовавших дескриптор через fork), между потоками - threading.Lock.
+    
+    Args:
+        path: Путь к файлу кэша
+        slots: Количество слотов
+        slot_size: Размер слота в байтах
+        probes: Сколько соседних слотов проверять для ключа
+        default_timeout: Время жизни записи по умолчанию (0 - бессрочно)
+    """
+    
+    def __init__(self, path: Optional[str] = None, slots: int = 512, slot_size: int = 32 * 1024,
+                 probes: int = 4, default_timeout: int = 300):
+        super().__init__(default_timeout=default_timeout)
+        self.path = path or default_path()
+        self.slots = slots
+        self.slot_size = slot_size
+        self.probes = min(probes, slots)
+        self._lock = threading.Lock()
+        self._stats = Counter()
+        
+        size = _FILE_HEADER_SIZE + slots * slot_size
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._locked(exclusive=True):
+            if os.fstat(self._fd).st_size != size:
+                os.ftruncate(self._fd, size)
+            self._mm = mmap.mmap(self._fd, size)
+            magic, file_slots, file_slot_size = _FILE_HEADER.unpack_from(self._mm, 0)
+            if (magic, file_slots, file_slot_size) != (_MAGIC, slots, slot_size):
+                # Новый файл или другая раскладка - размечаем заново
+                self._mm[:size] = bytes(size)
+                _FILE_HEADER.pack_into(self._mm, 0, _MAGIC, slots, slot_size)
+    
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs.update(
+            path=config.get('CACHE_SHARED_PATH') or default_path(app.root_path if app is not None else None),
+            slots=config.get('CACHE_SHARED_SLOTS', 512),
+            slot_size=config.get('CACHE_SHARED_SLOT_SIZE', 32 * 1024)
+        )
+        return cls(*args, **kwargs)
+    
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        """Блокировка потоков процесса и блокировка файла между процессами"""
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+    
+    @staticmethod
+    def _hash(key: str) -> int:
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+        # 0 обозначает пустой слот
+        return int.from_bytes(digest, 'little') | 1
+    
+    def _offset(self, index: int) -> int:
+        return _FILE_HEADER_SIZE + index * self.slot_size
+    
+    def _candidates(self, key_hash: int):
+        start = key_hash % self.slots
+        return [(start + i) % self.slots for i in range(self.probes)]
+    
+    def _find(self, key: str, key_hash: int) -> Optional[int]:
+        """Номер слота с ключом или None"""
+        encoded = key.encode('utf-8')
+        for index in self._candidates(key_hash):
+            offset = self._offset(index)
+            slot_hash, _, key_length, _ = _SLOT_HEADER.unpack_from(self._mm, offset)
+            if slot_hash == key_hash and key_length == len(encoded):
+                start = offset + _SLOT_HEADER.size
+                if self._mm[start:start + key_length] == encoded:
+                    return index
+        return None
+    
+    def _expires_at(self, timeout: Optional[int]) -> float:
+        timeout = self._normalize_timeout(timeout)
+        return time.time() + timeout if timeout > 0 else 0.0
+    
+    def get(self, key: str) -> Any:
+        key_hash = self._hash(key)
+        with self._locked(exclusive=False):
+            index = self._find(key, key_hash)
+            if index is not None:
+                offset = self._offset(index)
+                _, expires, key_length, value_length = _SLOT_HEADER.unpack_from(self._mm, offset)
+                if not expires or expires > time.time():
+                    start = offset + _SLOT_HEADER.size + key_length
+                    payload = self._mm[start:start + value_length]
+                else:
+                    index = None
+        
+        if index is None:
+            self._stats['misses'] += 1
+            return None
+        self._stats['hits'] += 1
+        return pickle.loads(payload)
+    
+    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        encoded = key.encode('utf-8')
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if _SLOT_HEADER.size + len(encoded) + len(payload) > self.slot_size:
+            self._stats['oversized'] += 1
+            return False
+        
+        key_hash = self._hash(key)
+        expires = self._expires_at(timeout)
+        with self._locked(exclusive=True):
+            index = self._find(key, key_hash)
+            if index is None:
+                index = self._free_slot(key_hash)
+            offset = self._offset(index)
+            start = offset + _SLOT_HEADER.size
+            self._mm[start:start + len(encoded)] = encoded
+            self._mm[start + len(encoded):start + len(encoded) + len(payload)] = payload
+            _SLOT_HEADER.pack_into(self._mm, offset, key_hash, expires, len(encoded), len(payload))
+        return True
+    
+    def _free_slot(self, key_hash: int) -> int:
+        """Пустой или истёкший слот среди кандидатов, иначе слот записи с ближайшим сроком"""
+        now = time.time()
+        victim, victim_expires = None, None
+        for index in self._candidates(key_hash):
+            slot_hash, expires, _, _ = _SLOT_HEADER.unpack_from(self._mm, self._offset(index))
+            if slot_hash == 0 or (expires and expires <= now):
+                return index
+            expires = expires or float('inf')
+            if victim is None or expires < victim_expires:
+                victim, victim_expires = index, expires
+        self._stats['evictions'] += 1
+        return victim
+    
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        if self.has(key):
+            return False
+        return self.set(key, value, timeout)
+    
+    def delete(self, key: str) -> bool:
+        key_hash = self._hash(key)
+        with self._locked(exclusive=True):
+            index = self._find(key, key_hash)
+            if index is None:
+                return False
+            _SLOT_HEADER.pack_into(self._mm, self._offset(index), 0, 0.0, 0, 0)
+        return True
+    
+    def has(self, key: str) -> bool:
+        key_hash = self._hash(key)
+        with self._locked(exclusive=False):
+            index = self._find(key, key_hash)
+            if index is None:
+                return False
+            _, expires, _, _ = _SLOT_HEADER.unpack_from(self._mm, self._offset(index))
+        return not expires or expires > time.time()
+    
+    def clear(self) -> bool:
+        with self._locked(exclusive=True):
+            for index in range(self.slots):
+                _SLOT_HEADER.pack_into(self._mm, self._offset(index), 0, 0.0, 0, 0)
+        return True
+    
+    def version(self) -> int:
+        """Версия содержимого - чтение 8 байт без блокировки"""
+        return _VERSION.unpack_from(self._mm, _VERSION_OFFSET)[0]
+    
+    def bump_version(self) -> int:
+        """Увеличить версию содержимого (видна всем процессам хоста)"""
+        with self._locked(exclusive=True):
+            version = _VERSION.unpack_from(self._mm, _VERSION_OFFSET)[0] + 1
+            _VERSION.pack_into(self._mm, _VERSION_OFFSET, version)
+        return version
+    
+    def stats(self) -> Dict[str, int]:
+        """Счётчики этого процесса и заполненность общих слотов"""
+        with self._locked(exclusive=False):
+            used = sum(
+                1 for index in range(self.slots)
+                if _SLOT_HEADER.unpack_from(self._mm, self._offset(index))[0]
+            )
+        return dict(self._stats, slots=self.slots, used=used)
+
+
+class TieredCache(BaseCache):
+    """
+    Двухуровневый кэш: SharedMemoryCache на хосте (L1) и Redis (L2)
+    
+    Чтение идёт в L1, при промахе - в L2, найденное в L2 копируется в L1
+    не дольше l1_timeout секунд, чтобы изменения с других хостов доходили
+    и без явной инвалидации. Запись и удаление применяются к обоим уровням.
+    
+    Args:
+        l1: Кэш хоста
+        l2: RedisCache (или другой бэкенд Flask-Caching)
+        l1_timeout: Максимальное время жизни копии из L2 в L1
+        default_timeout: Время жизни записи по умолчанию
+    """
+    
+    def __init__(self, l1: BaseCache, l2: BaseCache, l1_timeout: int = 60, default_timeout: int = 300):
+        super().__init__(default_timeout=default_timeout)
+        self.l1 = l1
+        self.l2 = l2
+        self.l1_timeout = l1_timeout
+        self._l2_version: Optional[int] = None
+        self._stats = Counter()
+    
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        l1 = SharedMemoryCache.factory(app, config, [], dict(kwargs))
+        l2 = RedisCache.factory(app, config, [], dict(kwargs))
+        return cls(l1, l2, l1_timeout=config.get('CACHE_L1_TIMEOUT', 60), **kwargs)
+    
+    def _l1_timeout(self, timeout: Optional[int]) -> int:
+        timeout = self._normalize_timeout(timeout)
+        return min(timeout, self.l1_timeout) if timeout > 0 else self.l1_timeout
+    
+    def get(self, key: str) -> Any:
+        value = self.l1.get(key)
+        if value is not None:
+            self._stats['l1_hits'] += 1
+            return value
+        
+        try:
+            value = self.l2.get(key)
+        except Exception as e:
+            # Redis недоступен - работаем только с кэшем хоста
+            logger.warning(f"Ошибка чтения L2 кэша: {e}")
+            self._stats['l2_errors'] += 1
+            value = None
+        
+        if value is None:
+            self._stats['misses'] += 1
+            return None
+        self._stats['l2_hits'] += 1
+        self.l1.set(key, value, timeout=self.l1_timeout)
+        return value
+    
+    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        self.l1.set(key, value, timeout=self._l1_timeout(timeout))
+        try:
+            return bool(self.l2.set(key, value, timeout=timeout))
+        except Exception as e:
+            logger.warning(f"Ошибка записи L2 кэша: {e}")
+            self._stats['l2_errors'] += 1
+            return False
+    
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        if self.get(key) is not None:
+            return False
+        return self.set(key, value, timeout)
+    
+    def delete(self, key: str) -> bool:
+        deleted = self.l1.delete(key)
+        try:
+            deleted = bool(self.l2.delete(key)) or deleted
+        except Exception as e:
+            logger.warning(f"Ошибка удаления из L2 кэша: {e}")
+            self._stats['l2_errors'] += 1
+        return deleted
+    
+    def has(self, key: str) -> bool:
+        return self.get(key) is not None
+    
+    def clear(self) -> bool:
+        self.l1.clear()
+        try:
+            # Очистка Redis удаляет и ключ версии: без него версия вернулась бы к
+            # уже виденному другими процессами значению и их L1 не сбросился бы
+            version = int(self.l2.get(self.VERSION_KEY) or 0)
+            cleared = bool(self.l2.clear())
+            self._l2_version = int(self.l2.inc(self.VERSION_KEY, delta=version + 1))
+            return cleared
+        except Exception as e:
+            logger.warning(f"Ошибка очистки L2 кэша: {e}")
+            self._stats['l2_errors'] += 1
+            return False
+    
+    # Версия содержимого в Redis - общая для всех хостов
+    VERSION_KEY = 'cache_version'
+    
+    def version(self) -> int:
+        """
+        Версия содержимого из Redis (при его недоступности - версия хоста)
+        
+        Изменение версии другим хостом очищает L1: иначе скопированные из L2
+        записи жили бы на этом хосте до l1_timeout после инвалидации.
+        """
+        try:
+            version = int(self.l2.get(self.VERSION_KEY) or 0)
+        except Exception as e:
+            logger.warning(f"Ошибка чтения версии L2 кэша: {e}")
+            self._stats['l2_errors'] += 1
+            return self.l1.version()
+    
+        if version != self._l2_version:
+            if self._l2_version is not None:
+                self.l1.clear()
+                self._stats['l1_resets'] += 1
+            self._l2_version = version
+        return version
+    
+    def bump_version(self) -> int:
+        """Увеличить версию в Redis и на хосте"""
+        self.l1.bump_version()
+        try:
+            self._l2_version = int(self.l2.inc(self.VERSION_KEY))
+            return self._l2_version
+        except Exception as e:
+            logger.warning(f"Ошибка записи версии L2 кэша: {e}")
+            self._stats['l2_errors'] += 1
+            return self.l1.version()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Счётчики уровней для /api/health"""
+        return dict(self._stats, l1=self.l1.stats())
+
+
+class ProcessCache(BaseCache):
+    """
+    Кэш в памяти процесса (L1) перед общим кэшем (L2)
+    
+    L1 хранит объекты без pickle, поэтому попадание не тратит время на
+    десериализацию. Согласованность между воркерами - через версию содержимого
+    общего кэша: sync() в начале каждого запроса читает версию (для
+    SharedMemoryCache - 8 байт из mmap) и очищает L1, если она изменилась.
+    Очистка и bump_version() увеличивают версию; delete() - нет, чтобы сброс
+    нескольких ключей не очищал L1 воркеров несколько раз подряд: вызывающий
+    код поднимает версию один раз на инвалидацию. Приложение делает это при
+    каждой записи через FirestoreService, а воркер, увидевший
+    новую версию, сбрасывает вместе с L1 и кэш чтений Firestore - иначе он
+    заново записал бы в L2 устаревшие документы. Запись в Firestore в обход
+    сервиса (миграция, консоль Firebase) версию не меняет: её видно после
+    истечения кэшей или после `flask --app app clear-cache`.
+    
+    Значения L1 отдаются без копирования: вызывающий код не должен их изменять.
+    В общий кэш значение пишется вместе со сроком, и копия в L1 после попадания
+    в L2 живёт не дольше записи в L2.
+    
+    Args:
+        shared: Общий кэш (L2); версия берётся из его version()/bump_version(),
+                если они есть, иначе ведётся в процессе
+        max_entries: Максимальное количество записей L1 (LRU)
+        default_timeout: Время жизни записи по умолчанию
+    """
+    
+    def __init__(self, shared: BaseCache, max_entries: int = 256, default_timeout: int = 300):
+        super().__init__(default_timeout=default_timeout)
+        self.shared = shared
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = Counter()
+        self._local_version = 0
+        self._version = self._shared_version()
+    
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        shared_type = import_string(config.get('CACHE_L2_TYPE') or 'services.shared_cache.SharedMemoryCache')
+        shared = shared_type.factory(app, config, [], dict(kwargs))
+        return cls(shared, max_entries=config.get('CACHE_L1_MAX_ENTRIES', 256), **kwargs)
+    
+    def _shared_version(self) -> int:
+        version = getattr(self.shared, 'version', None)
+        return version() if version is not None else self._local_version
+    
+    def bump_version(self) -> int:
+        """Увеличить версию: L1 остальных воркеров сбросится на их следующем sync()"""
+        bump = getattr(self.shared, 'bump_version', None)
+        if bump is not None:
+            bump()
+        else:
+            self._local_version += 1
+        self.sync()
+        return self._version
+    
+    def sync(self) -> bool:
+        """
+        Сверить версию с общим кэшем; при изменении очистить L1
+        
+        Returns:
+            True если L1 был очищен
+        """
+        version = self._shared_version()
+        if version == self._version:
+            return False
+        
+        with self._lock:
+            self._entries.clear()
+            self._version = version
+        self._stats['resets'] += 1
+        return True
+    
+    def _expires_at(self, timeout: Optional[int]) -> float:
+        timeout = self._normalize_timeout(timeout)
+        return time.time() + timeout if timeout > 0 else 0.0
+    
+    def _remember(self, key: str, value: Any, expires: float):
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (not entry[1] or entry[1] > time.time()):
+                self._entries.move_to_end(key)
+                self._stats['l1_hits'] += 1
+                return entry[0]
+        
+        shared = self.shared.get(key)
+        if shared is None or (isinstance(shared, _Shared) and shared.expires and shared.expires <= time.time()):
+            self._stats['misses'] += 1
+            return None
+        
+        self._stats['l2_hits'] += 1
+        if isinstance(shared, _Shared):
+            value, expires = shared
+        else:
+            # Запись без срока (из другого кода) - L1 по умолчанию
+            value, expires = shared, self._expires_at(None)
+        self._remember(key, value, expires)
+        return value
+    
+    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        expires = self._expires_at(timeout)
+        self._remember(key, value, expires)
+        return self.shared.set(key, _Shared(value, expires), timeout=timeout)
+    
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        if self.get(key) is not None:
+            return False
+        return self.set(key, value, timeout)
+    
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            self._entries.pop(key, None)
+        # Копии ключа в L1 других воркеров сбросятся после bump_version() вызывающего кода
+        return self.shared.delete(key)
+    
+    def has(self, key: str) -> bool:
+        return self.get(key) is not None
+    
+    def clear(self) -> bool:
+        with self._lock:
+            self._entries.clear()
+        cleared = self.shared.clear()
+        self.bump_version()
+        return cleared
+    
+    def stats(self) -> Dict[str, Any]:
+        """Попадания по уровням для /api/health"""
+        lookups = self._stats['l1_hits'] + self._stats['l2_hits'] + self._stats['misses']
+        l2_lookups = self._stats['l2_hits'] + self._stats['misses']
+        return dict(
+            self._stats,
+            entries=len(self._entries),
+            version=self._version,
+            l1_hit_rate=round(self._stats['l1_hits'] / lookups, 3) if lookups else None,
+            l2_hit_rate=round(self._stats['l2_hits'] / l2_lookups, 3) if l2_lookups else None,
+            l2=self.shared.stats() if hasattr(self.shared, 'stats') else {}
+        )
@@ -0,0 +1,159 @@
+"""
+Статический экспорт Smart Care
+Все языковые версии главной страницы, страницы ошибок и JSON API
+записываются в каталог для хостинга на CDN или в объектном хранилище.
+Статика получает имена с отпечатком содержимого, текстовые файлы -
+предсжатые копии .gz (и .br, если установлен brotli).
+"""
+
+import os
+import gzip
+import json
+import hashlib
+import logging
+import shutil
+from typing import Any, Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него пишутся только .gz
+    brotli = None
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+# Файлы, для которых имеет смысл предсжатие
+COMPRESSIBLE_EXTENSIONS = ('.html', '.json', '.css', '.js', '.svg', '.txt', '.xml')
+
+MANIFEST_NAME = 'export-manifest.json'
+
+
+def fingerprinted_name(filename: str, digest: str) -> str:
+    """Имя файла с отпечатком: 'css/style.css' -> 'css/style.1a2b3c4d5e.css'"""
+    base, ext = os.path.splitext(filename)
+    return f'{base}.{digest}{ext}'
+
+
+def precompress(path: str) -> int:
+    """
+    Записать рядом с файлом сжатые копии path.gz и path.br
+    
+    Returns:
+        Количество записанных копий
+    """
+    if not path.endswith(COMPRESSIBLE_EXTENSIONS):
+        return 0
+    
+    with open(path, 'rb') as f:
+        data = f.read()
+    
+    # mtime=0: одинаковое содержимое даёт одинаковый .gz (стабильные ETag на CDN)
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    written = 1
+    
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+        written += 1
+    return written
+
+
+class StaticExporter:
+    """
+    Запись файлов статического экспорта в каталог
+    
+    Манифест export-manifest.json хранит ключи языков (отпечаток контента,
+    версия шаблонов и статики): при инкрементальном экспорте язык с тем же
+    ключом не рендерится повторно.
+    
+    Args:
+        output_dir: Каталог экспорта
+        static_folder: Каталог статики приложения
+    """
+    
+    def __init__(self, output_dir: str, static_folder: str):
+        self.output_dir = output_dir
+        self.static_folder = static_folder
+        self.manifest = self._load_manifest()
+        self.files = 0
+        self.compressed = 0
+    
+    def export_assets(self, url_prefix: str = 'static') -> Dict[str, str]:
+        """
+        Скопировать статику под именами с отпечатком содержимого
+        
+        Файлы с тем же отпечатком уже лежат в каталоге и не копируются заново;
+        старые версии не удаляются, чтобы закэшированные CDN страницы не ломались.
+        
+        Returns:
+            {исходное имя: имя с отпечатком} для подстановки в url_for('static')
+        """
+        names = {}
+        for root, _, files in os.walk(self.static_folder):
+            for name in sorted(files):
+                source = os.path.join(root, name)
+                filename = os.path.relpath(source, self.static_folder).replace(os.sep, '/')
+                
+                with open(source, 'rb') as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()[:10]
+                names[filename] = fingerprinted_name(filename, digest)
+                
+                target = os.path.join(self.output_dir, url_prefix, names[filename])
+                if os.path.exists(target):
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copyfile(source, target)
+                self.files += 1
+                self.compressed += precompress(target)
+        return names
+    
+    def write(self, relative_path: str, data: bytes):
+        """Записать файл экспорта и его сжатые копии"""
+        path = os.path.join(self.output_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        self.files += 1
+        self.compressed += precompress(path)
+    
+    def write_redirect(self, relative_path: str, location: str):
+        """Страница-перенаправление для маршрутов, которых нет на статическом хостинге"""
+        html = (
+            '<!DOCTYPE html><html><head><meta charset="utf-8">'
+            f'<meta http-equiv="refresh" content="0; url={location}">'
+            f'<link rel="canonical" href="{location}"></head></html>'
+        )
+        self.write(relative_path, html.encode('utf-8'))
+    
+    def is_current(self, lang: str, key: str) -> bool:
+        """Язык уже экспортирован с тем же ключом"""
+        return self.manifest['languages'].get(lang) == key
+    
+    def mark(self, lang: str, key: str):
+        """Запомнить ключ экспортированного языка"""
+        self.manifest['languages'][lang] = key
+    
+    def save_manifest(self, assets: Dict[str, str]):
+        """Сохранить манифест экспорта"""
+        self.manifest['assets'] = assets
+        path = os.path.join(self.output_dir, MANIFEST_NAME)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    
+    def _load_manifest(self) -> Dict[str, Any]:
+        """Манифест предыдущего экспорта или пустой"""
+        path = os.path.join(self.output_dir, MANIFEST_NAME)
+        try:
+            with open(path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            manifest.setdefault('languages', {})
+            return manifest
+        except (OSError, ValueError):
+            return {'languages': {}, 'assets': {}}
+    
+    @staticmethod
+    def assets_version(assets: Optional[Dict[str, str]]) -> str:
+        """Отпечаток набора статики (меняется при изменении любого файла)"""
+        payload = json.dumps(assets or {}, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()[:10]
@@ -0,0 +1,231 @@
+"""
+Кэш чтений Firestore для Smart Care
+TTL + ограничение объёма в байтах + точечная инвалидация + статистика
+"""
+
+import copy
+import time
+import pickle
+import logging
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+# Ключ записи: (коллекция, ID документа или '*...' для выборок по коллекции, язык)
+CacheKey = Tuple[str, str, Optional[str]]
+
+
+class TTLCache:
+    """
+    Потокобезопасный LRU кэш с временем жизни записей и лимитом объёма
+    
+    Размер записи оценивается длиной pickle-представления значения. При превышении
+    max_bytes вытесняются самые давно использованные записи. Значения копируются
+    при записи и чтении, чтобы вызывающий код не мог испортить закэшированные данные.
+    
+    Args:
+        ttl: Время жизни записи (сек)
+        max_bytes: Максимальный суммарный размер значений (байт)
+    """
+    
+    def __init__(self, ttl: float = 300, max_bytes: int = 8 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = Counter()
+    
+    def get(self, key: CacheKey) -> Tuple[bool, Any]:
+        """
+        Получить значение
+        
+        Returns:
+            (найдено, значение)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            
+            if entry is None:
+                self._stats['misses'] += 1
+                return False, None
+            
+            value, expires_at, size = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return False, None
+            
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+        
+        return True, copy.deepcopy(value)
+    
+    def set(self, key: CacheKey, value: Any, ttl: float = None):
+        """Сохранить значение (слишком большое для лимита не кэшируется)"""
+        try:
+            size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception as e:
+            logger.warning(f"Значение {key} не кэшируется: {e}")
+            return
+        
+        if size > self.max_bytes:
+            self._stats['oversized'] += 1
+            return
+        
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        value = copy.deepcopy(value)
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats['evictions'] += 1
+    
+    def invalidate(self, collection: str = None, document_id: str = None, lang: str = None) -> int:
+        """
+        Удалить записи по коллекции, документу и/или языку
+        
+        Выборки по коллекции (ID вида '*...') удаляются при изменении любого её документа.
+        
+        Returns:
+            Количество удалённых записей
+        """
+        with self._lock:
+            keys = [
+                key for key in self._entries
+                if (collection is None or key[0] == collection)
+                and (document_id is None or key[1] == document_id or key[1].startswith('*'))
+                and (lang is None or key[2] == lang)
+            ]
+            for key in keys:
+                self._remove(key)
+        
+        self._stats['invalidations'] += len(keys)
+        return len(keys)
+    
+    def clear(self):
+        """Очистить кэш"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Счётчики hit/miss/eviction и текущий объём"""
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._bytes, max_bytes=self.max_bytes)
+    
+    def _remove(self, key: CacheKey):
+        """Удалить запись (вызывать под блокировкой)"""
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+
+class BackoffError(Exception):
+    """Чтение не выполнено: ключ в периоде backoff после ошибки"""
+
+
+class NegativeCache:
+    """
+    Кэш отрицательных результатов чтения: «документ не найден» и ошибки
+    
+    Пока запись жива, чтение ключа не идёт в Firestore. Отсутствующий документ
+    запоминается на missing_ttl секунд. Ошибка чтения включает backoff, который
+    удваивается с каждой ошибкой подряд по тому же ключу (до max_backoff);
+    успешное чтение или запись документа сбрасывает запись.
+    
+    Args:
+        missing_ttl: Время (сек), на которое запоминается отсутствие документа
+        base_backoff: Первый интервал (сек) после ошибки чтения
+        max_backoff: Максимальный интервал (сек)
+    """
+    
+    MISSING = 'missing'
+    FAILED = 'failed'
+    
+    def __init__(self, missing_ttl: float = 30, base_backoff: float = 1, max_backoff: float = 60):
+        self.missing_ttl = missing_ttl
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._entries = {}  # key -> (тип, expires_at, ошибок подряд)
+        self._lock = threading.Lock()
+        self._stats = Counter()
+    
+    def check(self, key: CacheKey) -> Optional[str]:
+        """
+        Действует ли отрицательная запись для ключа
+        
+        Returns:
+            MISSING, FAILED или None (нужно читать из Firestore)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            kind, expires_at, _ = entry
+            if time.monotonic() >= expires_at:
+                # Запись ошибки не удаляем: счётчик нужен для следующего интервала
+                if kind == self.MISSING:
+                    del self._entries[key]
+                return None
+            self._stats[f'saved_{kind}'] += 1
+            return kind
+    
+    def mark_missing(self, key: CacheKey):
+        """Запомнить, что документа нет"""
+        with self._lock:
+            self._entries[key] = (self.MISSING, time.monotonic() + self.missing_ttl, 0)
+            self._stats['missing'] += 1
+    
+    def mark_failed(self, key: CacheKey) -> float:
+        """
+        Учесть ошибку чтения ключа
+        
+        Returns:
+            Интервал backoff (сек)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            failures = entry[2] + 1 if entry is not None and entry[0] == self.FAILED else 1
+            backoff = min(self.base_backoff * 2 ** (failures - 1), self.max_backoff)
+            self._entries[key] = (self.FAILED, time.monotonic() + backoff, failures)
+            self._stats['failures'] += 1
+            return backoff
+    
+    def forget(self, key: CacheKey):
+        """Сбросить запись после успешного чтения"""
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def invalidate(self, collection: str = None, document_id: str = None) -> int:
+        """Сбросить записи коллекции/документа (после записи в Firestore)"""
+        with self._lock:
+            keys = [
+                key for key in self._entries
+                if (collection is None or key[0] == collection)
+                and (document_id is None or key[1] == document_id or key[1].startswith('*'))
+            ]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+    
+    def clear(self):
+        """Очистить кэш"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Счётчики: сэкономленные чтения (saved_reads) по видам записей"""
+        with self._lock:
+            saved = self._stats['saved_missing'] + self._stats['saved_failed']
+            return dict(self._stats, saved_reads=saved, entries=len(self._entries))
@@ -0,0 +1,89 @@
+"""
+Прогрев кэшей Smart Care при старте воркера
+До завершения прогрева /api/health отвечает 503, и балансировщик
+не направляет запросы на холодный воркер.
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+
+class WarmUp:
+    """
+    Однократный прогрев: задачи выполняются по очереди, время каждой запоминается
+    
+    Ошибка задачи записывается и не останавливает прогрев: загрузчики контента
+    сами переходят на локальные данные, а воркер, который никогда не станет
+    готовым, хуже воркера с частично холодным кэшем.
+    """
+    
+    def __init__(self):
+        self.state = 'pending'
+        self.timings = {}
+        self.errors = {}
+        self.duration = None
+        self._done = threading.Event()
+    
+    @property
+    def ready(self) -> bool:
+        """Прогрев завершён (или отключён)"""
+        return self._done.is_set()
+    
+    def run(self, tasks: Iterable[Tuple[str, Callable[[], Any]]]) -> bool:
+        """
+        Выполнить задачи прогрева
+        
+        Args:
+            tasks: Пары (название, функция без аргументов)
+        
+        Returns:
+            True если все задачи выполнены без ошибок
+        """
+        self.state = 'running'
+        started = time.time()
+        
+        for name, task in tasks:
+            task_started = time.time()
+            try:
+                task()
+            except Exception as e:
+                logger.error(f"Ошибка прогрева ({name}): {e}")
+                self.errors[name] = str(e)
+            self.timings[name] = round(time.time() - task_started, 3)
+        
+        self.duration = round(time.time() - started, 3)
+        self.state = 'ready'
+        self._done.set()
+        
+        details = ', '.join(f'{name} {seconds:.2f}' for name, seconds in self.timings.items())
+        logger.info(f"✓ Прогрев завершён за {self.duration:.2f} сек ({details})")
+        return not self.errors
+    
+    def start(self, tasks: Iterable[Tuple[str, Callable[[], Any]]]) -> threading.Thread:
+        """Запустить run в фоновом потоке"""
+        thread = threading.Thread(target=self.run, args=(list(tasks),), name='warmup', daemon=True)
+        thread.start()
+        return thread
+    
+    def skip(self):
+        """Прогрев отключён: воркер готов сразу"""
+        self.state = 'disabled'
+        self._done.set()
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Дождаться завершения прогрева"""
+        return self._done.wait(timeout)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Состояние для /api/health"""
+        return {
+            'state': self.state,
+            'duration': self.duration,
+            'timings': dict(self.timings),
+            'errors': dict(self.errors)
+        }
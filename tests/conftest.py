@@ -0,0 +1,63 @@
+"""
+Общие фикстуры тестов: FirestoreService и приложение с фейковым клиентом
+Firestore из benchmarks/fake_firestore (без сети и credentials)
+"""
+
+import os
+import tempfile
+
+# До импорта приложения: тестовая конфигурация, без прогрева и снимка с диска
+os.environ.setdefault('FLASK_ENV', 'testing')
+os.environ.setdefault('WARMUP', 'false')
+os.environ.setdefault('CONTENT_SNAPSHOT_PATH', os.path.join(tempfile.mkdtemp(), 'content_snapshot.json'))
+
+import pytest
+
+from services.firestore_service import firestore_service
+from benchmarks.fake_firestore import FakeFirestoreClient, install, sample_data
+
+
+def reset_service(service):
+    """Вернуть синглтон FirestoreService в исходное состояние (без клиента, пустые кэши)"""
+    service.release_client()
+    service._db = None
+    service._initialized = False
+    service._client_factory = None
+    service._async_client_factory = None
+    service._resume_watches = []
+    with service._materialized_lock:
+        service._materialized.clear()
+        service._snapshot_collections.clear()
+    service._snapshot_info = None
+    service._reconcile_thread = None
+    service._reconcile_path = None
+    service.configure({})
+
+
+@pytest.fixture
+def fake_client():
+    """FakeFirestoreClient с контентом sample_data(), подключённый к firestore_service"""
+    client = install(firestore_service, FakeFirestoreClient(sample_data()))
+    firestore_service.configure({})
+    yield client
+    reset_service(firestore_service)
+
+
+@pytest.fixture
+def flask_app(fake_client):
+    """Приложение Smart Care с фейковым Firestore и пустыми кэшами"""
+    import app as app_module
+    
+    app_module.cache.clear()
+    app_module.page_cache.clear()
+    app_module.compressor.clear()
+    yield app_module.app
+    app_module.cache.clear()
+    app_module.page_cache.clear()
+    app_module.compressor.clear()
+
+
+@pytest.fixture
+def client(flask_app):
+    """Тестовый клиент приложения"""
+    return flask_app.test_client()
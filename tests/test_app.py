@@ -0,0 +1,208 @@
+"""Маршруты приложения: ETag/304, кэш страниц, режим языка только из URL, API контента, статический экспорт, прогрев"""
+
+import json
+import os
+import threading
+from itertools import chain
+
+import pytest
+
+from services.firestore_service import firestore_service
+from services.warmup import WarmUp
+
+
+def test_index_conditional_request(client):
+    response = client.get('/en')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    
+    cached = client.get('/en', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+
+
+def test_etag_changes_after_content_write(client):
+    etag = client.get('/api/team/en').headers['ETag']
+    assert client.get('/api/team/en', headers={'If-None-Match': etag}).status_code == 304
+    
+    firestore_service.update_document('team_members', 'member_1', {'en': {'name': 'Renamed'}})
+    
+    response = client.get('/api/team/en', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert 'Renamed' in [member.get('name') for member in response.json]
+
+
+
+def test_listener_event_refreshes_content(client, fake_client):
+    firestore_service.start_listeners(['team_members'])
+    assert 'Renamed' not in [member.get('name') for member in client.get('/api/team/en').json]
+    
+    # Изменение в консоли Firebase доходит через слушатель и сбрасывает кэш контента
+    fake_client.collection('team_members').document('member_1').set({'en': {'name': 'Renamed'}}, merge=True)
+    
+    assert 'Renamed' in [member.get('name') for member in client.get('/api/team/en').json]
+
+
+def test_page_cache_reuses_html_until_content_changes(client):
+    import app as app_module
+    
+    before = app_module.page_cache.stats()
+    first = client.get('/en')
+    assert client.get('/en').data == first.data
+    client.get('/ru')
+    assert app_module.page_cache.stats()['hits'] - before.get('hits', 0) == 1
+    assert app_module.page_cache.stats()['entries'] == 2
+    
+    # Запись сбрасывает страницы через invalidate_content, ключ меняется с отпечатком контента
+    firestore_service.update_document('team_members', 'member_1', {'en': {'name': 'Renamed'}})
+    assert app_module.page_cache.stats()['entries'] == 0
+    
+    response = client.get('/en')
+    assert b'Renamed' in response.data
+    assert response.headers['ETag'] != first.headers['ETag']
+    assert app_module.page_cache.stats()['misses'] - before.get('misses', 0) == 3
+
+
+def test_page_cache_key_follows_template_mtime(client, flask_app):
+    import app as app_module
+    
+    before = app_module.page_cache.stats()
+    first = client.get('/en')
+    template = os.path.join(flask_app.root_path, flask_app.template_folder, 'base.html')
+    stat = os.stat(template)
+    os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    try:
+        # Тот же контент, но шаблон изменён: новый ключ страницы и ETag, HTML рендерится заново
+        response = client.get('/en', headers={'If-None-Match': first.headers['ETag']})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != first.headers['ETag']
+        assert app_module.page_cache.stats()['misses'] - before.get('misses', 0) == 2
+        assert app_module.page_cache.stats()['entries'] == 2
+    finally:
+        os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+def test_api_rejects_unsupported_language(client):
+    assert client.get('/api/translations/zz').status_code == 400
+
+
+@pytest.fixture
+def url_only(flask_app, monkeypatch):
+    monkeypatch.setitem(flask_app.config, 'LANGUAGE_URL_ONLY', True)
+
+
+def test_url_only_root_redirects_by_accept_language(client, url_only):
+    response = client.get('/', headers={'Accept-Language': 'en-US,en;q=0.9'})
+    
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/en')
+    assert 'Accept-Language' in response.headers['Vary']
+
+
+def test_url_only_pages_do_not_set_cookie(client, url_only):
+    response = client.get('/ru')
+    
+    assert response.status_code == 200
+    assert 'Set-Cookie' not in response.headers
+    assert 'Cookie' not in response.headers.get('Vary', '')
+
+
+def test_session_language_without_url_only(client):
+    client.get('/set-language/en')
+    response = client.get('/api/team')
+    
+    assert response.json[0]['title'].endswith('(en)')
+
+
+def test_write_in_other_worker_resets_firestore_read_cache(client, flask_app, fake_client, tmp_path):
+    import app as app_module
+    from services.shared_cache import ProcessCache, SharedMemoryCache
+    
+    path = str(tmp_path / 'cache')
+    worker = ProcessCache(SharedMemoryCache(path, slots=64, slot_size=32 * 1024))
+    other_worker = ProcessCache(SharedMemoryCache(path, slots=64, slot_size=32 * 1024))
+    extensions = flask_app.extensions['cache']
+    original, extensions[app_module.cache] = extensions[app_module.cache], worker
+    try:
+        assert 'Renamed' not in [member.get('name') for member in client.get('/api/team/en').json]
+        
+        # Запись через сервис в другом воркере: он сбрасывает кэш контента в L2,
+        # а кэш чтений Firestore этого воркера о записи не знает
+        fake_client.collection('team_members').document('member_1').set({'en': {'name': 'Renamed'}}, merge=True)
+        other_worker.clear()
+        
+        names = [member.get('name') for member in client.get('/api/team/en').json]
+        assert 'Renamed' in names
+        assert worker.stats()['resets'] == 1
+    finally:
+        extensions[app_module.cache] = original
+
+
+def test_export_static_fingerprints_assets_and_skips_unchanged(flask_app, tmp_path):
+    output = str(tmp_path / 'dist')
+    runner = flask_app.test_cli_runner()
+    
+    result = runner.invoke(args=['export-static', '--output', output, '--incremental'])
+    assert result.exit_code == 0, result.output
+    assert 'Языки: ru, en' in result.output
+    
+    with open(os.path.join(output, 'export-manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    style = manifest['assets']['css/style.css']
+    assert style != 'css/style.css' and style.startswith('css/style.')
+    assert os.path.exists(os.path.join(output, 'static', style + '.gz'))
+    # Страницы ссылаются на статику с отпечатками, а не на исходные имена
+    with open(os.path.join(output, 'en', 'index.html'), encoding='utf-8') as f:
+        page = f.read()
+    assert f'/static/{style}' in page
+    assert '/static/css/style.css' not in page
+    
+    result = runner.invoke(args=['export-static', '--output', output, '--incremental'])
+    assert 'без изменений' in result.output
+    assert 'файлов: 0' in result.output
+    
+    # Изменился контент одного языка - рендерится только он
+    firestore_service.update_document('translations', 'en_hero', {'subtitle': 'Updated'})
+    result = runner.invoke(args=['export-static', '--output', output, '--incremental'])
+    assert 'Языки: en;' in result.output
+    with open(os.path.join(output, 'en', 'index.html'), encoding='utf-8') as f:
+        assert 'Updated' in f.read()
+    
+    # Без --incremental экспортируются все языки
+    result = runner.invoke(args=['export-static', '--output', output])
+    assert 'Языки: ru, en' in result.output
+
+
+def test_health_is_unavailable_until_warmup_finishes(client, monkeypatch):
+    import app as app_module
+    
+    warmup = WarmUp()
+    monkeypatch.setattr(app_module, 'warmup', warmup)
+    started, gate = threading.Event(), threading.Event()
+    
+    def hold():
+        started.set()
+        gate.wait()
+    
+    response = client.get('/api/health')
+    assert response.status_code == 503
+    assert response.json['status'] == 'warming_up'
+    
+    # Первая задача ждёт сигнала: пока прогрев идёт, воркер не готов
+    warmup.start(chain([('gate', hold)], app_module.warmup_tasks()))
+    assert started.wait(timeout=10)
+    assert client.get('/api/health').json['warmup']['state'] == 'running'
+    assert client.get('/api/health').status_code == 503
+    gate.set()
+    assert warmup.wait(timeout=10)
+    
+    response = client.get('/api/health')
+    assert response.status_code == 200
+    assert response.json['status'] == 'healthy'
+    assert response.json['warmup']['errors'] == {}
+    assert {'templates', 'content_ru', 'content_en', 'page_ru', 'page_en'} <= set(response.json['warmup']['timings'])
+    
+    # Страницы уже отрендерены прогревом
+    hits = app_module.page_cache.stats().get('hits', 0)
+    client.get('/en')
+    assert app_module.page_cache.stats()['hits'] == hits + 1
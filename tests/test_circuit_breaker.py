@@ -0,0 +1,135 @@
+"""Переходы состояний CircuitBreaker: closed -> open -> half_open (проба) -> closed/open"""
+
+import asyncio
+import types
+
+import pytest
+
+from services import circuit_breaker
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+class FakeClock:
+    """Управляемое time.monotonic"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(circuit_breaker, 'time', types.SimpleNamespace(monotonic=fake.monotonic))
+    return fake
+
+
+def fail():
+    raise RuntimeError('backend down')
+
+
+def trip(breaker):
+    """Разомкнуть предохранитель ошибками подряд"""
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(RuntimeError):
+            breaker.call(fail)
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker('test', failure_threshold=3, reset_timeout=10)
+    
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            breaker.call(fail)
+    assert breaker.state == CircuitBreaker.CLOSED
+    
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: 'ok')
+    assert breaker.stats()['trips'] == 1
+    assert breaker.stats()['rejected'] == 1
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker('test', failure_threshold=2)
+    
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    assert breaker.call(lambda: 'ok') == 'ok'
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_slow_call_counts_as_failure(clock):
+    breaker = CircuitBreaker('test', failure_threshold=1, slow_call_duration=1.0)
+    
+    def slow():
+        clock.now += 2
+        return 'late'
+    
+    assert breaker.call(slow) == 'late'
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_allows_single_probe(clock):
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=10)
+    trip(breaker)
+    
+    clock.now += 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    # Пока проба не завершилась, остальные вызовы отклоняются
+    assert not breaker.allow_request()
+    
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_probe_doubles_reset_timeout(clock):
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=10, max_reset_timeout=25)
+    trip(breaker)
+    
+    clock.now += 10
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    assert breaker.stats()['reset_timeout'] == 20
+    
+    clock.now += 19
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 1
+    with pytest.raises(RuntimeError):
+        breaker.call(fail)
+    # Не больше max_reset_timeout
+    assert breaker.stats()['reset_timeout'] == 25
+    
+    clock.now += 25
+    assert breaker.call(lambda: 'ok') == 'ok'
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()['reset_timeout'] == 10
+
+
+def test_cancelled_probe_releases_half_open(clock):
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=10)
+    trip(breaker)
+    clock.now += 10
+    
+    async def cancelled_probe():
+        task = asyncio.create_task(breaker.call_async(asyncio.sleep, 10))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    
+    asyncio.run(cancelled_probe())
+    
+    # Отмена не считается ни успехом, ни неудачей: следующий вызов снова пробный
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.stats()['consecutive_failures'] == 1
+    assert asyncio.run(breaker.call_async(asyncio.sleep, 0, 'ok')) == 'ok'
+    assert breaker.state == CircuitBreaker.CLOSED
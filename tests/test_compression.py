@@ -0,0 +1,43 @@
+"""Сжатие ответов: согласование кодировки и валидаторы 200/304"""
+
+import gzip
+
+import pytest
+
+from services import compression
+
+
+def test_negotiates_encoding(client):
+    identity = client.get('/en')
+    assert 'Content-Encoding' not in identity.headers
+    assert 'Accept-Encoding' in identity.headers['Vary']
+    
+    gzipped = client.get('/en', headers={'Accept-Encoding': 'gzip'})
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(gzipped.data) == identity.data
+    
+    if compression.brotli is None:
+        pytest.skip('brotli не установлен')
+    encoded = client.get('/en', headers={'Accept-Encoding': 'gzip, br'})
+    assert encoded.headers['Content-Encoding'] == 'br'
+    assert compression.brotli.decompress(encoded.data) == identity.data
+
+
+@pytest.mark.parametrize('path', ['/en', '/api/team/en', '/static/css/style.css'])
+def test_not_modified_keeps_validators_of_compressed_response(client, path):
+    headers = {'Accept-Encoding': 'gzip'}
+    response = client.get(path, headers=headers)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    etag = response.headers['ETag']
+    assert etag.startswith('W/')
+    
+    cached = client.get(path, headers=dict(headers, **{'If-None-Match': etag}))
+    assert cached.status_code == 304
+    assert cached.headers['ETag'] == etag
+    assert 'Accept-Encoding' in cached.headers['Vary']
+
+
+def test_uncompressed_client_gets_strong_etag(client):
+    etag = client.get('/api/team/en').headers['ETag']
+    assert not etag.startswith('W/')
+    assert client.get('/api/team/en', headers={'If-None-Match': etag}).status_code == 304
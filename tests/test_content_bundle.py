@@ -0,0 +1,86 @@
+"""ContentBundles: проверка версии мимо кэша чтений, ленивая single-flight пересборка"""
+
+import threading
+import time
+
+from services.content_bundle import BUNDLE_COLLECTION, VERSION_COLLECTION, VERSION_DOCUMENT, ContentBundles
+from services.firestore_service import firestore_service
+
+
+def test_version_written_by_other_process_is_seen(fake_client):
+    bundles = ContentBundles(firestore_service)
+    bundles.rebuild_all()
+    assert bundles.get('en') is not None
+    
+    # Другой процесс (миграция) пересобрал бандлы мимо этого FirestoreService:
+    # его кэш чтений держит прежние версию и бандл
+    bundle = fake_client.collection(BUNDLE_COLLECTION).document('en').get().to_dict()
+    fake_client.collection(BUNDLE_COLLECTION).document('en').set(dict(bundle, version='v2'))
+    fake_client.collection(VERSION_COLLECTION).document(VERSION_DOCUMENT).set({'version': 'v2'})
+    
+    writes = fake_client.calls['set'] + fake_client.calls['commit']
+    assert bundles.get('en')['version'] == 'v2'
+    # Свежий бандл перечитан, а не пересобран
+    assert fake_client.calls['set'] + fake_client.calls['commit'] == writes
+
+
+def test_concurrent_stale_reads_rebuild_once(fake_client, monkeypatch):
+    bundles = ContentBundles(firestore_service)
+    bundles.rebuild_all()
+    bundles.bump_version()
+    
+    rebuilds = []
+    release = threading.Event()
+    rebuild = bundles.rebuild
+    
+    def slow_rebuild(lang, version):
+        rebuilds.append(lang)
+        release.wait(2)
+        return rebuild(lang, version)
+    
+    monkeypatch.setattr(bundles, 'rebuild', slow_rebuild)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(bundles.get('ru'))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while bundles._flights.coalesced < 3:
+        time.sleep(0.005)
+    release.set()
+    for thread in threads:
+        thread.join()
+    
+    assert rebuilds == ['ru']
+    assert len({result['version'] for result in results}) == 1
+
+
+def test_write_only_bumps_version_and_rebuilds_lazily(fake_client):
+    bundles = ContentBundles(firestore_service)
+    version = bundles.rebuild_all()
+    bundles.get('ru')
+    bundles.get('en')
+    # Кэш чтений, которым пользуются остальные запросы воркера
+    hero = firestore_service.get_document('translations', 'ru_hero', 'ru')
+    
+    writes = fake_client.calls['set'] + fake_client.calls['commit']
+    bundles.on_write({'team_members': ['member_1']})
+    # Одна запись версии, без пересборки в потоке записи
+    assert fake_client.calls['set'] + fake_client.calls['commit'] == writes + 1
+    
+    rebuilt = bundles.get('ru')
+    assert rebuilt['version'] != version
+    stored = fake_client.collection(BUNDLE_COLLECTION).document('en').get().to_dict()
+    assert stored['version'] == version
+    
+    gets = fake_client.calls['get']
+    assert firestore_service.get_document('translations', 'ru_hero', 'ru') == hero
+    assert fake_client.calls['get'] == gets
+
+
+def test_uncached_read_skips_read_cache(fake_client):
+    firestore_service.get_document('translations', 'ru_hero', 'ru')
+    fake_client.collection('translations').document('ru_hero').set({'ru': {'title': 'New'}})
+    
+    fresh = firestore_service.get_document('translations', 'ru_hero', 'ru', cache=False)
+    assert fresh == {'title': 'New'}
+    assert fake_client.calls['get'] == 2
+    assert firestore_service.get_documents('translations', ['ru_hero'], 'ru', cache=False) == {'ru_hero': fresh}
@@ -0,0 +1,179 @@
+"""ContentCache: single-flight при промахе, stale-while-revalidate, fallback и инвалидация"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from flask import Flask
+from flask_caching import Cache
+
+from services.content_cache import ContentCache
+
+
+@pytest.fixture
+def content_cache():
+    app = Flask(__name__)
+    app.config.update(CONTENT_CACHE_SOFT_TTL=600, CONTENT_CACHE_HARD_TTL=3600, SUPPORTED_LANGUAGES=['ru', 'en'])
+    return ContentCache(app, Cache(app, config={'CACHE_TYPE': 'SimpleCache'}))
+
+
+def wait_for(condition, timeout=2.0):
+    """Дождаться условия (фоновые потоки)"""
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, 'условие не выполнено'
+        time.sleep(0.005)
+
+
+def test_concurrent_misses_load_once(content_cache):
+    calls = []
+    release = threading.Event()
+    
+    def loader():
+        calls.append(1)
+        release.wait(2)
+        return {'team': ['A']}
+    
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(content_cache.get_versioned('content:ru:team', loader)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    # Все, кроме ведущего, ждут его загрузку
+    wait_for(lambda: content_cache.stats().get('coalesced') == 7)
+    release.set()
+    for thread in threads:
+        thread.join()
+    
+    assert len(calls) == 1
+    assert len(results) == 8
+    assert all(result == results[0] for result in results)
+    assert content_cache.stats()['loads'] == 1
+
+
+def test_waiters_get_leader_error(content_cache):
+    release = threading.Event()
+    
+    def loader():
+        release.wait(2)
+        raise RuntimeError('Firestore down')
+    
+    errors = []
+    
+    def load():
+        try:
+            content_cache.get_versioned('content:ru:team', loader)
+        except RuntimeError as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=load) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: content_cache.stats().get('coalesced') == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+    
+    assert len(errors) == 3
+
+
+def test_stale_value_served_while_refreshing(content_cache):
+    versions = iter(['v1', 'v2'])
+    loader = lambda: next(versions)
+    
+    assert content_cache.get('content:ru:team', loader) == 'v1'
+    content_cache.soft_ttl = 0
+    # Устаревшее значение отдаётся сразу, обновление - в фоне
+    assert content_cache.get('content:ru:team', loader) == 'v1'
+    wait_for(lambda: content_cache.stats().get('refreshes') == 1)
+    
+    content_cache.soft_ttl = 600
+    assert content_cache.get('content:ru:team', loader) == 'v2'
+
+
+def test_failed_refresh_keeps_last_value(content_cache):
+    content_cache.get('content:ru:team', lambda: 'v1')
+    content_cache.soft_ttl = 0
+    
+    def broken():
+        raise RuntimeError('Firestore down')
+    
+    assert content_cache.get('content:ru:team', broken) == 'v1'
+    wait_for(lambda: content_cache.stats().get('refresh_errors') == 1)
+    assert content_cache.get('content:ru:team', broken) == 'v1'
+
+
+def test_fallback_when_nothing_cached(content_cache):
+    def broken():
+        raise RuntimeError('Firestore down')
+    
+    assert content_cache.get('content:ru:team', broken, lambda: 'local') == 'local'
+    with pytest.raises(RuntimeError):
+        content_cache.get('content:ru:team', broken)
+
+
+def test_fingerprint_follows_content(content_cache):
+    _, first = content_cache.get_versioned('content:ru:first', lambda: {'a': 1, 'b': 2})
+    _, same = content_cache.get_versioned('content:ru:same', lambda: {'b': 2, 'a': 1})
+    _, changed = content_cache.get_versioned('content:ru:changed', lambda: {'a': 1, 'b': 3})
+    
+    assert first == same
+    assert first != changed
+
+
+def test_invalidate_by_language_and_collection(content_cache):
+    loads = []
+    
+    @content_cache.cached('team', collections=['team_members'])
+    def team(lang='ru'):
+        loads.append(('team', lang))
+        return lang
+    
+    @content_cache.cached('roadmap', collections=['roadmap_milestones'])
+    def roadmap(lang='ru'):
+        loads.append(('roadmap', lang))
+        return lang
+    
+    for lang in ('ru', 'en'):
+        team(lang)
+        roadmap(lang)
+    
+    assert content_cache.invalidate(lang='en', collection='team_members') == 1
+    for lang in ('ru', 'en'):
+        team(lang)
+        roadmap(lang)
+    
+    assert loads.count(('team', 'en')) == 2
+    assert loads.count(('team', 'ru')) == 1
+    assert loads.count(('roadmap', 'en')) == 1
+
+
+def test_cancelled_async_leader_gives_waiters_fallback(content_cache):
+    async def scenario():
+        started = asyncio.Event()
+        
+        async def loader():
+            started.set()
+            await asyncio.sleep(10)
+        
+        leader = asyncio.create_task(
+            content_cache.aget_versioned('content:ru:team', loader, lambda: 'sync', lambda: 'local')
+        )
+        await started.wait()
+        waiter = asyncio.create_task(
+            content_cache.aget_versioned('content:ru:team', loader, lambda: 'sync', lambda: 'local')
+        )
+        while not content_cache.stats().get('coalesced'):
+            await asyncio.sleep(0.005)
+        
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+    
+    value, _ = asyncio.run(scenario())
+    assert value == 'local'
+    assert content_cache.stats()['inflight'] == 0
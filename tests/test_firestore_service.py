@@ -0,0 +1,368 @@
+"""FirestoreService с фейковым клиентом: кэш чтений, отрицательный кэш, fan_out"""
+
+import asyncio
+import os
+import threading
+import time
+from functools import partial
+
+import pytest
+
+from benchmarks.fake_firestore import FakeQuery
+from services.firestore_service import firestore_service
+from services.ttl_cache import BackoffError
+
+
+def test_reads_are_cached(fake_client):
+    first = firestore_service.get_document('translations', 'ru_hero', 'ru')
+    second = firestore_service.get_document('translations', 'ru_hero', 'ru')
+    
+    assert first == second
+    assert fake_client.calls['get'] == 1
+
+
+def test_write_invalidates_read_cache(fake_client):
+    firestore_service.get_document('translations', 'ru_hero', 'ru')
+    firestore_service.update_document('translations', 'ru_hero', {'title': 'Новый'})
+    
+    assert firestore_service.get_document('translations', 'ru_hero', 'ru')['title'] == 'Новый'
+    assert fake_client.calls['get'] == 2
+
+
+def test_missing_document_read_once(fake_client):
+    for _ in range(3):
+        assert firestore_service.get_document('team_members', 'nobody', 'ru') is None
+    
+    assert fake_client.calls['get'] == 1
+    assert firestore_service.cache_stats()['negative']['saved_reads'] == 2
+
+
+def test_failed_read_backs_off(fake_client, monkeypatch):
+    def broken(name):
+        raise RuntimeError('unavailable')
+    
+    monkeypatch.setattr(fake_client, 'collection', broken)
+    assert firestore_service.get_document('team_members', 'member_1', 'ru') is None
+    with pytest.raises(BackoffError):
+        firestore_service.get_document('team_members', 'member_1', 'ru', strict=True)
+
+
+def test_batch_get_skips_cached_documents(fake_client):
+    firestore_service.get_document('translations', 'ru_hero', 'ru')
+    docs = firestore_service.get_documents('translations', ['ru_hero', 'ru_meta', 'ru_nothing'], 'ru')
+    
+    assert sorted(docs) == ['ru_hero', 'ru_meta']
+    assert fake_client.calls['get_all'] == 1
+
+
+
+def test_batch_commits_in_chunks_and_notifies_once(fake_client, monkeypatch):
+    changes, writes = [], []
+    monkeypatch.setattr(firestore_service, '_change_listeners', [lambda collection, lang: changes.append((collection, lang))])
+    monkeypatch.setattr(firestore_service, '_write_listeners', [writes.append])
+    
+    with firestore_service.batch() as batch:
+        for i in range(1201):
+            batch.set('team_members', f'member_{i}', {'ru': {'name': str(i)}})
+        batch.delete('roadmap_milestones', 'milestone_1')
+    
+    assert (batch.commits, batch.written) == (3, 1202)
+    assert fake_client.calls['commit'] == 3
+    assert sorted(changes) == [('roadmap_milestones', None), ('team_members', None)]
+    assert len(writes) == 1 and len(writes[0]['team_members']) == 1201
+
+def test_fan_out_runs_calls_concurrently():
+    def slow(value):
+        time.sleep(0.1)
+        return value
+    
+    started = time.perf_counter()
+    results = firestore_service.fan_out(*(partial(slow, i) for i in range(3)))
+    
+    assert results == [0, 1, 2]
+    assert time.perf_counter() - started < 0.25
+
+
+def test_fan_out_raises_first_error_after_all_calls():
+    finished = []
+    
+    def slow():
+        time.sleep(0.05)
+        finished.append(1)
+    
+    def broken(message):
+        raise ValueError(message)
+    
+    with pytest.raises(ValueError, match='first'):
+        firestore_service.fan_out(slow, partial(broken, 'first'), partial(broken, 'second'))
+    assert finished == [1]
+
+
+def test_nested_fan_out_with_small_pool_does_not_deadlock():
+    firestore_service.configure({'FIRESTORE_FAN_OUT_WORKERS': 1})
+    try:
+        def inner(i):
+            return firestore_service.fan_out(partial(time.sleep, 0.01), lambda: i)[1]
+        
+        result = []
+        thread = threading.Thread(
+            target=lambda: result.append(firestore_service.fan_out(*(partial(inner, i) for i in range(4))))
+        )
+        thread.start()
+        thread.join(5)
+        assert result == [[0, 1, 2, 3]]
+    finally:
+        firestore_service.configure({})
+
+
+
+def free_slots():
+    """Сколько слотов пула fan_out можно занять сейчас (слоты возвращаются)"""
+    slots = firestore_service._pool_slots
+    taken = 0
+    while slots.acquire(blocking=False):
+        taken += 1
+    for _ in range(taken):
+        slots.release()
+    return taken
+
+
+def test_pool_reset_during_fan_out_keeps_slot_counts(fake_client):
+    started, release = threading.Event(), threading.Event()
+    
+    def blocked():
+        started.set()
+        release.wait(2)
+        return 'pool'
+    
+    result = []
+    thread = threading.Thread(target=lambda: result.append(firestore_service.fan_out(lambda: 'inline', blocked)))
+    thread.start()
+    assert started.wait(2)
+    # configure/post_fork заменяет пул и семафор, пока задача ещё выполняется
+    firestore_service.configure({})
+    release.set()
+    thread.join(2)
+    
+    assert result == [['inline', 'pool']]
+    assert free_slots() == firestore_service._pool_workers
+
+
+def test_fan_out_runs_inline_when_pool_rejects(fake_client, monkeypatch):
+    class StoppedPool:
+        def submit(self, *args):
+            raise RuntimeError('cannot schedule new futures after shutdown')
+    
+    monkeypatch.setattr(firestore_service, '_get_pool', lambda: StoppedPool())
+    
+    assert firestore_service.fan_out(lambda: 1, lambda: 2, lambda: 3) == [1, 2, 3]
+    assert free_slots() == firestore_service._pool_workers
+
+def fork_worker(check):
+    """
+    Сымитировать воркер gunicorn: fork, post_fork (reset_client) и проверка в дочернем процессе
+    
+    Returns:
+        True если check() в воркере вернул True
+    """
+    pid = os.fork()
+    if pid == 0:
+        try:
+            firestore_service.reset_client()
+            thread = firestore_service._reconcile_thread
+            if thread is not None:
+                thread.join(5)
+            os._exit(0 if check() else 1)
+        except BaseException:
+            os._exit(2)
+    
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status) == 0
+
+
+def reconciled():
+    return firestore_service.snapshot_info['reconciled'] and not firestore_service._snapshot_collections
+
+
+@pytest.fixture
+def snapshot(fake_client, tmp_path):
+    """Снимок контента на диске, загруженный как при старте приложения"""
+    path = str(tmp_path / 'content_snapshot.json')
+    firestore_service.save_snapshot(path)
+    assert firestore_service.load_snapshot(path)
+    return path
+
+
+def test_release_client_waits_for_snapshot_reconcile(fake_client, snapshot):
+    fake_client.latency = 0.05
+    firestore_service.reconcile_snapshot_async(snapshot)
+    # pre_fork: закрытие клиента не обрывает сверку
+    firestore_service.release_client()
+    
+    assert reconciled()
+    assert fork_worker(reconciled)
+
+
+def test_worker_retries_reconcile_failed_in_master(fake_client, snapshot, monkeypatch):
+    def unavailable(name):
+        raise RuntimeError('unavailable')
+    
+    collection = fake_client.collection
+    monkeypatch.setattr(fake_client, 'collection', unavailable)
+    firestore_service.reconcile_snapshot_async(snapshot).join()
+    firestore_service.release_client()
+    assert not firestore_service.snapshot_info['reconciled']
+    
+    # В воркере Firestore снова доступен: сверка запускается из reset_client
+    monkeypatch.setattr(fake_client, 'collection', collection)
+    assert fork_worker(reconciled)
+
+
+def test_concurrent_snapshot_writes_do_not_collide(fake_client, snapshot):
+    # Воркеры после fork перезаписывают снимок одновременно
+    failed = []
+    
+    def save():
+        for _ in range(20):
+            if firestore_service.save_snapshot(snapshot) is None:
+                failed.append(1)
+    
+    threads = [threading.Thread(target=save) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert not failed
+    assert os.listdir(os.path.dirname(snapshot)) == [os.path.basename(snapshot)]
+    assert firestore_service.load_snapshot(snapshot)
+
+
+def test_async_reads_share_cache_with_sync_api(fake_client):
+    async def read():
+        return await asyncio.gather(
+            firestore_service.aget_document('translations', 'ru_hero', 'ru'),
+            firestore_service.aget_collection('team_members', 'ru', select=['{lang}']),
+            firestore_service.aget_documents('translations', ['ru_meta', 'ru_nothing'], 'ru')
+        )
+    
+    hero, team, docs = asyncio.run(read())
+    
+    assert hero == firestore_service.get_document('translations', 'ru_hero', 'ru')
+    assert team == firestore_service.get_collection('team_members', 'ru', select=['{lang}'])
+    assert list(docs) == ['ru_meta']
+    assert fake_client.calls['get'] == 1
+    assert fake_client.calls['stream'] == 1
+
+
+def test_release_client_closes_async_client_and_loop(fake_client):
+    asyncio.run(firestore_service.aget_document('translations', 'ru_hero', 'ru'))
+    loop, client = firestore_service._aio_loop, firestore_service._aio_client
+    
+    firestore_service.release_client()
+    
+    assert client.closed
+    assert loop.is_closed()
+    assert firestore_service._aio_loop is None
+
+
+@pytest.fixture
+def changes(fake_client, monkeypatch):
+    """Уведомления подписчиков изменений: [(коллекция, язык)]"""
+    received = []
+    monkeypatch.setattr(firestore_service, '_change_listeners', [lambda collection, lang: received.append((collection, lang))])
+    return received
+
+
+def test_listeners_serve_reads_from_materialized_copy(fake_client):
+    assert firestore_service.start_listeners(['team_members', 'translations'])
+    fake_client.calls.clear()
+    
+    team = firestore_service.get_collection('team_members', 'en', select=['{lang}'], order_by='{lang}.name')
+    hero = firestore_service.get_document('translations', 'ru_hero', 'ru')
+    
+    assert [member['id'] for member in team] == ['member_1', 'member_2']
+    assert hero is not None
+    assert not fake_client.calls
+
+
+def test_listener_events_update_copy_and_notify(fake_client, changes):
+    firestore_service.start_listeners(['team_members', 'translations'])
+    changes.clear()
+    
+    # Правка в консоли Firebase: событие приходит только через слушатель
+    fake_client.collection('team_members').document('member_1').set({'en': {'name': 'Renamed'}}, merge=True)
+    fake_client.collection('translations').document('en_hero').delete()
+    
+    assert firestore_service.get_document('team_members', 'member_1', 'en')['name'] == 'Renamed'
+    assert firestore_service.get_document('translations', 'en_hero', 'en') is None
+    assert changes == [('team_members', None), ('translations', 'en')]
+
+
+def test_first_listener_event_replaces_snapshot_copy(fake_client, snapshot, changes):
+    # Пока воркер не слушал, документ удалили, а другой изменили
+    with fake_client._lock:
+        del fake_client._data['team_members']['member_2']
+        fake_client._data['team_members']['member_1']['ru']['name'] = 'Новое имя'
+    firestore_service.get_document('team_members', 'member_1', 'ru')
+    
+    firestore_service.start_listeners(['team_members'])
+    
+    assert 'team_members' not in firestore_service._snapshot_collections
+    assert firestore_service.get_document('team_members', 'member_1', 'ru')['name'] == 'Новое имя'
+    assert firestore_service.get_document('team_members', 'member_2', 'ru') is None
+    assert ('team_members', None) in changes
+
+
+def test_listener_event_invalidates_read_cache(fake_client):
+    firestore_service.get_document('translations', 'ru_hero', 'ru')
+    firestore_service.start_listeners(['translations'])
+    firestore_service.stop_listeners()
+    fake_client.calls.clear()
+    
+    # Копия сброшена, а кэш чтений очищен первым событием: чтение идёт в Firestore
+    firestore_service.get_document('translations', 'ru_hero', 'ru')
+    assert fake_client.calls['get'] == 1
+
+
+def test_collection_query_is_pushed_down(fake_client, monkeypatch):
+    queries = []
+    stream = FakeQuery.stream
+    monkeypatch.setattr(FakeQuery, 'stream', lambda self, **kwargs: queries.append(self) or stream(self, **kwargs))
+    with fake_client._lock:
+        fake_client._data['roadmap_milestones']['milestone_2']['en']['status'] = 'done'
+    
+    query = dict(where=[('{lang}.status', '==', 'upcoming')], order_by='-{lang}.title', limit=2,
+                 select=['{lang}.title'])
+    docs = firestore_service.get_collection('roadmap_milestones', 'en', **query)
+    
+    # Фильтр, сортировка, лимит и проекция ушли в запрос, а не применены к коллекции в памяти
+    assert [(q._filters, q._orders, q._limit, q._fields) for q in queries] == [
+        ([('en.status', '==', 'upcoming')], [('en.title', True)], 2, ['en.title'])
+    ]
+    assert docs == [{'title': 'milestone 4 (en)', 'id': 'milestone_4'},
+                    {'title': 'milestone 3 (en)', 'id': 'milestone_3'}]
+    
+    # Материализованная копия отвечает на тот же запрос так же
+    firestore_service.start_listeners(['roadmap_milestones'])
+    assert firestore_service.get_collection('roadmap_milestones', 'en', **query) == docs
+    assert len(queries) == 1
+
+
+@pytest.mark.parametrize('page_size, pages', [(5, 6), (13, 3)])
+def test_iter_collection_pages_by_document_id(fake_client, monkeypatch, page_size, pages):
+    cursors = []
+    stream = FakeQuery.stream
+    monkeypatch.setattr(FakeQuery, 'stream', lambda self, **kwargs: cursors.append(self._cursor) or stream(self, **kwargs))
+    expected = sorted(fake_client._data['translations'])
+    
+    docs = list(firestore_service.iter_collection('translations', lang=None, page_size=page_size))
+    
+    # 26 документов: курсор каждой страницы - ID последнего документа предыдущей;
+    # при кратном размере последняя страница пустая
+    assert [doc['id'] for doc in docs] == expected
+    assert len(cursors) == pages
+    assert cursors == [None] + [{'__name__': expected[i * page_size - 1]} for i in range(1, pages)]
+    
+    resumed = firestore_service.iter_collection('translations', 'ru', page_size=page_size, start_after='en_meta')
+    assert [doc['id'] for doc in resumed] == expected[expected.index('en_meta') + 1:]
@@ -0,0 +1,39 @@
+"""migrate_to_firestore: разница с манифестом прошлой миграции"""
+
+import pytest
+
+
+@pytest.fixture
+def migration(fake_client):
+    """Модуль миграции поверх фейкового клиента (инициализация при импорте уже выполнена)"""
+    import migrate_to_firestore
+    return migrate_to_firestore
+
+
+def test_second_run_reads_only_manifest(migration, fake_client):
+    target = migration.collect_documents()
+    first = migration.diff_documents(target, migration.read_manifest())
+    assert not first['changed'] and not first['removed']
+    migration.apply_diff(target, first)
+    
+    fake_client.calls.clear()
+    second = migration.diff_documents(migration.collect_documents(), migration.read_manifest())
+    
+    assert not any(second.values())
+    assert dict(fake_client.calls) == {'get': 1}
+
+
+def test_removes_only_documents_written_by_migration(migration, fake_client):
+    target = migration.collect_documents()
+    migration.apply_diff(target, migration.diff_documents(target, migration.read_manifest()))
+    # Документ, созданный в консоли Firebase
+    fake_client.collection('team_members').document('from_console').set({'ru': {'name': 'Гость'}})
+    
+    removed_id = next(iter(target['team_members']))
+    del target['team_members'][removed_id]
+    diff = migration.diff_documents(target, migration.read_manifest())
+    
+    assert diff['removed'] == [('team_members', removed_id)]
+    migration.apply_diff(target, diff)
+    assert not fake_client.collection('team_members').document(removed_id).get().exists
+    assert fake_client.collection('team_members').document('from_console').get().exists
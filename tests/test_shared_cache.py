@@ -0,0 +1,152 @@
+"""SharedMemoryCache между процессами, TieredCache и инвалидация L1 в ProcessCache"""
+
+import os
+import types
+
+import pytest
+from flask_caching.backends.rediscache import RedisCache
+
+from benchmarks.fake_redis import FakeRedis
+from services import shared_cache
+from services.shared_cache import ProcessCache, SharedMemoryCache, TieredCache
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'cache')
+
+
+def test_entries_shared_with_forked_process(path):
+    cache = SharedMemoryCache(path, slots=16, slot_size=1024)
+    cache.set('parent', {'value': 1})
+    
+    pid = os.fork()
+    if pid == 0:
+        # Дочерний процесс (как воркер gunicorn): видит запись родителя и пишет свою
+        ok = cache.get('parent') == {'value': 1} and cache.set('child', [1, 2, 3])
+        os._exit(0 if ok else 1)
+    
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert cache.get('child') == [1, 2, 3]
+
+
+def test_expiry_and_oversized_values(path, monkeypatch):
+    now = types.SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(shared_cache, 'time', types.SimpleNamespace(time=lambda: now.value))
+    cache = SharedMemoryCache(path, slots=4, slot_size=256)
+    
+    assert not cache.set('big', 'x' * 1024)
+    assert cache.get('big') is None
+    cache.set('short', 1, timeout=10)
+    assert cache.get('short') == 1
+    now.value += 10
+    assert cache.get('short') is None
+
+
+def test_process_cache_invalidation_reaches_other_worker(path):
+    worker_a = ProcessCache(SharedMemoryCache(path, slots=16, slot_size=1024))
+    worker_b = ProcessCache(SharedMemoryCache(path, slots=16, slot_size=1024))
+    
+    worker_a.set('content:ru:team', ['old'])
+    assert worker_b.get('content:ru:team') == ['old']
+    
+    worker_a.delete('content:ru:team')
+    worker_a.bump_version()
+    # L1 воркера B держит старое значение до сверки версии в начале запроса
+    assert worker_b.get('content:ru:team') == ['old']
+    assert worker_b.sync()
+    assert worker_b.get('content:ru:team') is None
+    assert worker_b.stats()['resets'] == 1
+
+
+def test_default_path_is_namespaced_by_app_root(tmp_path):
+    site = shared_cache.default_path(str(tmp_path / 'site'))
+    
+    assert site == shared_cache.default_path(str(tmp_path / 'site'))
+    assert site != shared_cache.default_path(str(tmp_path / 'staging'))
+    assert site != shared_cache.default_path()
+
+
+def test_process_cache_deletes_bump_version_once(path):
+    worker_a = ProcessCache(SharedMemoryCache(path, slots=16, slot_size=1024))
+    worker_b = ProcessCache(SharedMemoryCache(path, slots=16, slot_size=1024))
+    
+    for key in ('content:ru:team', 'content:ru:roadmap', 'content:en:team'):
+        worker_a.set(key, [key])
+        worker_a.delete(key)
+    assert not worker_b.sync()
+    
+    # Одна инвалидация - один сброс L1 в каждом воркере
+    worker_a.bump_version()
+    assert worker_b.sync()
+    assert not worker_b.sync()
+    assert worker_b.stats()['resets'] == 1
+
+
+def test_process_cache_l1_copy_expires_with_l2(path, monkeypatch):
+    now = types.SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(shared_cache, 'time', types.SimpleNamespace(time=lambda: now.value))
+    worker_a = ProcessCache(SharedMemoryCache(path, slots=16, slot_size=1024), default_timeout=300)
+    worker_b = ProcessCache(SharedMemoryCache(path, slots=16, slot_size=1024), default_timeout=300)
+    
+    worker_a.set('page', 'html', timeout=10)
+    now.value += 5
+    assert worker_b.get('page') == 'html'
+    # Копия в L1 воркера B живёт до срока записи в L2, а не default_timeout от попадания
+    now.value += 6
+    assert worker_b.get('page') is None
+
+
+class DownRedis(FakeRedis):
+    """Redis, до которого нет соединения"""
+    
+    def _command(self, name):
+        raise ConnectionError('redis недоступен')
+
+
+def tiered(path, redis):
+    return TieredCache(SharedMemoryCache(path, slots=16, slot_size=1024),
+                       RedisCache(host=redis), l1_timeout=60)
+
+
+def test_tiered_cache_fills_l1_from_l2(tmp_path):
+    redis = FakeRedis()
+    host_a = tiered(str(tmp_path / 'a'), redis)
+    host_b = tiered(str(tmp_path / 'b'), redis)
+    
+    host_a.set('content:ru:team', ['team'])
+    assert host_b.get('content:ru:team') == ['team']
+    assert host_b.get('content:ru:team') == ['team']
+    assert host_b.stats()['l2_hits'] == 1
+    assert host_b.stats()['l1_hits'] == 1
+    assert redis.calls['get'] == 1
+
+
+def test_tiered_cache_falls_back_to_l1_when_redis_is_down(path):
+    cache = tiered(path, DownRedis())
+    
+    assert not cache.set('content:ru:team', ['team'])
+    assert cache.get('content:ru:team') == ['team']
+    assert cache.get('content:ru:missing') is None
+    assert cache.version() == cache.l1.version()
+    assert cache.bump_version() == cache.l1.version() == 1
+    assert cache.stats()['l2_errors'] == 4
+
+
+def test_tiered_cache_clear_invalidates_other_hosts(tmp_path):
+    redis = FakeRedis()
+    host_a = ProcessCache(tiered(str(tmp_path / 'a'), redis))
+    host_b = ProcessCache(tiered(str(tmp_path / 'b'), redis))
+    
+    host_a.bump_version()
+    host_a.set('content:ru:team', ['old'])
+    host_b.sync()
+    assert host_b.get('content:ru:team') == ['old']
+    
+    version = host_a.shared.version()
+    host_a.clear()
+    # Версия в Redis пережила очистку и выросла - L1 другого хоста сбрасывается
+    assert host_a.shared.version() > version
+    assert host_b.sync()
+    assert host_b.get('content:ru:team') is None
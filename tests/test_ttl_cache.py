@@ -0,0 +1,96 @@
+"""TTLCache (кэш чтений) и NegativeCache (отсутствующие документы, backoff после ошибок)"""
+
+import types
+
+import pytest
+
+from services import ttl_cache
+from services.ttl_cache import NegativeCache, TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = types.SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(ttl_cache, 'time', types.SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def test_entry_expires_after_ttl(clock):
+    cache = TTLCache(ttl=10)
+    cache.set(('team', 'a', 'ru'), {'name': 'A'})
+    
+    assert cache.get(('team', 'a', 'ru')) == (True, {'name': 'A'})
+    clock.value += 10
+    assert cache.get(('team', 'a', 'ru')) == (False, None)
+    assert cache.stats()['expirations'] == 1
+
+
+def test_values_are_copied():
+    cache = TTLCache()
+    value = {'items': [1]}
+    cache.set(('team', 'a', 'ru'), value)
+    value['items'].append(2)
+    
+    _, cached = cache.get(('team', 'a', 'ru'))
+    cached['items'].append(3)
+    assert cache.get(('team', 'a', 'ru'))[1] == {'items': [1]}
+
+
+def test_evicts_least_recently_used_over_max_bytes():
+    cache = TTLCache(max_bytes=600)
+    for name in ('a', 'b', 'c'):
+        cache.set(('team', name, 'ru'), 'x' * 150)
+    cache.get(('team', 'a', 'ru'))
+    cache.set(('team', 'd', 'ru'), 'x' * 150)
+    
+    assert cache.get(('team', 'a', 'ru'))[0]
+    assert not cache.get(('team', 'b', 'ru'))[0]
+    assert cache.stats()['evictions'] == 1
+
+
+def test_invalidate_document_drops_collection_queries():
+    cache = TTLCache()
+    cache.set(('team', 'a', 'ru'), 1)
+    cache.set(('team', 'b', 'ru'), 2)
+    cache.set(('team', '*all', 'ru'), [1, 2])
+    cache.set(('roadmap', 'a', 'ru'), 3)
+    
+    assert cache.invalidate('team', 'a') == 2
+    assert cache.get(('team', 'b', 'ru'))[0]
+    assert not cache.get(('team', '*all', 'ru'))[0]
+    assert cache.get(('roadmap', 'a', 'ru'))[0]
+
+
+def test_missing_document_is_remembered(clock):
+    negative = NegativeCache(missing_ttl=30)
+    negative.mark_missing(('team', 'x', 'ru'))
+    
+    assert negative.check(('team', 'x', 'ru')) == NegativeCache.MISSING
+    clock.value += 30
+    assert negative.check(('team', 'x', 'ru')) is None
+    assert negative.stats()['saved_reads'] == 1
+
+
+def test_failure_backoff_grows_exponentially(clock):
+    negative = NegativeCache(base_backoff=1, max_backoff=5)
+    key = ('team', 'x', 'ru')
+    
+    assert [negative.mark_failed(key) for _ in range(4)] == [1, 2, 4, 5]
+    assert negative.check(key) == NegativeCache.FAILED
+    clock.value += 5
+    # Запись ошибки переживает истечение: следующая ошибка продолжает ряд
+    assert negative.check(key) is None
+    assert negative.mark_failed(key) == 5
+    
+    negative.forget(key)
+    assert negative.mark_failed(key) == 1
+
+
+def test_invalidate_after_write():
+    negative = NegativeCache()
+    negative.mark_missing(('team', 'x', 'ru'))
+    negative.mark_missing(('roadmap', 'x', 'ru'))
+    
+    assert negative.invalidate('team', 'x') == 1
+    assert negative.check(('team', 'x', 'ru')) is None
+    assert negative.check(('roadmap', 'x', 'ru')) == NegativeCache.MISSING